@@ -1,2 +1,6 @@
-from data_resource_api.api.core import VersionedResource, VersionedResourceMany
+from data_resource_api.api.core import (
+    CompiledResource,
+    VersionedResource,
+    VersionedResourceMany,
+)
 from data_resource_api.api.v1_0_0 import ResourceHandler
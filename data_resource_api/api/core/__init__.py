@@ -1,4 +1,5 @@
 from data_resource_api.api.core.versioned_resource import (
+    CompiledResource,
     VersionedResource,
     VersionedResourceMany,
 )
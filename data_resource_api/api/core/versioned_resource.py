@@ -2,10 +2,20 @@
 
 This class extends the Flask Restful Resource class with the ability to
 look for the API version number in the request header.
+
+Note:
+    The requests a resource serves are compiled into a dispatch table when its
+    descriptor loads, so a request only looks up its verb, route and API
+    version instead of checking the API schema again.
 """
 
 from data_resource_api.api.v1_0_0 import ResourceHandler as V1_0_0_ResourceHandler
-from data_resource_api.app.utils.exception_handler import MethodNotAllowed
+from data_resource_api.api.v1_0_0.resource_handler import EXPORT_MIMETYPES, NDJSON
+from data_resource_api.app.utils.exception_handler import ApiError, MethodNotAllowed
+from data_resource_api.app.utils.relationship_expander import RelationshipExpander
+from data_resource_api.app.utils.response_cache import ResponseCache
+from data_resource_api.app.utils.row_counter import RowCounter
+from data_resource_api.factories.orm_factory import SEARCH_COLUMN
 from flask import request
 from flask_restful import Resource
 from data_resource_api.logging import LogFactory
@@ -13,35 +23,198 @@ from data_resource_api.logging import LogFactory
 
 logger = LogFactory.get_console_logger("versioned-resource")
 
+DEFAULT_API_VERSION = "1.0.0"
+
+# The handlers keep no state between requests, so each version has one
+RESOURCE_HANDLERS = {"1.0.0": V1_0_0_ResourceHandler()}
+
+# Routes of a data resource
+COLLECTION = "collection"
+ITEM = "item"
+QUERY = "query"
+EXPORT = "export"
+UPSERT = "upsert"
+SEARCH = "search"
+AGGREGATE = "aggregate"
+
+
+class Route:
+    """A request served by a resource.
+
+    Attributes:
+        action (function): The method of the resource that serves the request.
+        handler (ResourceHandler): The handler of the requested API version.
+        secured (bool): Whether the request needs a token.
+    """
+
+    __slots__ = ["action", "handler", "secured"]
+
+    def __init__(self, action, handler, secured):
+        self.action = action
+        self.handler = handler
+        self.secured = secured
+
+
+class CompiledResource:
+    """The state a resource serves requests with, compiled from its descriptor.
+
+    Attributes:
+        data_model (object): SQLAlchemy ORM model.
+        table_schema (dict): Table schema of the descriptor.
+        api_schema (dict): API schema of the descriptor.
+        restricted_fields (list): Fields that must not be returned.
+        row_serializer (RowSerializer): Serializer compiled for the data model.
+        validator (ResourceValidator): Validator compiled for the table schema.
+        dispatch_table (dict): The route serving each verb, route and API version.
+    """
 
-class VersionedResourceParent(Resource):
     __slots__ = [
-        "data_resource_name",
         "data_model",
         "table_schema",
         "api_schema",
         "restricted_fields",
+        "row_serializer",
+        "validator",
+        "dispatch_table",
     ]
 
-    def __init__(self):
+    def __init__(
+        self,
+        data_model,
+        table_schema: dict,
+        api_schema: dict,
+        restricted_fields: list = None,
+        row_serializer=None,
+        validator=None,
+        dispatch_table: dict = None,
+    ):
+        self.data_model = data_model
+        self.table_schema = table_schema
+        self.api_schema = api_schema
+        self.restricted_fields = [] if restricted_fields is None else restricted_fields
+        self.row_serializer = row_serializer
+        self.validator = validator
+        self.dispatch_table = {} if dispatch_table is None else dispatch_table
+
+    def with_dispatch_table(self, dispatch_table: dict):
+        """Copy the state with another dispatch table.
+
+        Args:
+            dispatch_table (dict): The dispatch table of the copy.
+
+        Returns:
+            CompiledResource: The copy.
+        """
+        return CompiledResource(
+            self.data_model,
+            self.table_schema,
+            self.api_schema,
+            self.restricted_fields,
+            self.row_serializer,
+            self.validator,
+            dispatch_table,
+        )
+
+
+class VersionedResourceParent(Resource):
+    __slots__ = ["data_resource_name", "compiled", "route"]
+
+    def __init__(self, route: str = None):
         Resource.__init__(self)
+        self.route = route
 
     def get_api_version(self, headers):
         try:
             api_version = headers["X-Api-Version"]
         except KeyError:
-            api_version = "1.0.0"
+            api_version = DEFAULT_API_VERSION
         return api_version
 
-    def get_resource_handler(self, headers):
-        if self.get_api_version(headers) == "1.0.0":
-            return V1_0_0_ResourceHandler()
-        else:
-            return V1_0_0_ResourceHandler()
+    @classmethod
+    def get_routes(cls, compiled: CompiledResource) -> dict:
+        """List the requests enabled in the API schema.
+
+        Args:
+            compiled (CompiledResource): The state of the resource.
+
+        Returns:
+            dict: The action serving each verb and route, and whether it is
+                secured.
+        """
+        return {}
+
+    @classmethod
+    def compile_dispatch(cls, compiled: CompiledResource) -> dict:
+        """Build the dispatch table of the resource from its API schema.
+
+        Args:
+            compiled (CompiledResource): The state of the resource.
+
+        Returns:
+            dict: The route serving each verb, route and API version.
+        """
+        dispatch_table = {}
+        for (verb, route), (action, secured) in cls.get_routes(compiled).items():
+            for api_version, handler in RESOURCE_HANDLERS.items():
+                dispatch_table[(verb, route, api_version)] = Route(
+                    action, handler, secured
+                )
+        return dispatch_table
+
+    @classmethod
+    def load(cls, compiled: CompiledResource):
+        """Serve requests with a newly compiled state.
+
+        Note:
+            This is called whenever the descriptor of the resource loads. The
+            state and its dispatch table are replaced in one assignment, so
+            requests being served never see them half loaded.
+
+        Args:
+            compiled (CompiledResource): The state of the resource.
+        """
+        cls.compiled = compiled.with_dispatch_table(cls.compile_dispatch(compiled))
+
+    def dispatch(self, verb: str, **kwargs):
+        """Serve a request with the action compiled for it.
+
+        Args:
+            verb (str): The HTTP method in lower case.
+            kwargs (dict): The arguments of the URL.
+
+        Returns:
+            object: The response of the action.
+        """
+        api_version = self.get_api_version(request.headers)
+        if api_version not in RESOURCE_HANDLERS:
+            api_version = DEFAULT_API_VERSION
+
+        # Pinned, so a reload does not change the state in the middle of a request
+        self.compiled = type(self).compiled
+        route = self.compiled.dispatch_table.get((verb, self.route, api_version))
+        if route is None:
+            raise MethodNotAllowed()
+        return route.action(self, route, **kwargs)
+
+    def get(self, **kwargs):
+        return self.dispatch("get", **kwargs)
+
+    def post(self, **kwargs):
+        return self.dispatch("post", **kwargs)
+
+    def put(self, **kwargs):
+        return self.dispatch("put", **kwargs)
+
+    def patch(self, **kwargs):
+        return self.dispatch("patch", **kwargs)
+
+    def delete(self, **kwargs):
+        return self.dispatch("delete", **kwargs)
 
 
 class VersionedResourceMany(VersionedResourceParent):
-    def error_if_resource_is_disabled(self, verb: str, resource: str, api_schema: dict):
+    @staticmethod
+    def error_if_resource_is_disabled(verb: str, resource: str, api_schema: dict):
         """This will raise an exception that will return an error to the client
         if they attempt to access a disabled resource.
 
@@ -61,7 +234,8 @@ class VersionedResourceMany(VersionedResourceParent):
         except KeyError:
             raise MethodNotAllowed()
 
-    def is_secured(self, verb: str, resource: str, api_schema: dict):
+    @staticmethod
+    def is_secured(verb: str, resource: str, api_schema: dict):
         """Defaults to secured for security."""
         try:
             secured = False
@@ -76,86 +250,109 @@ class VersionedResourceMany(VersionedResourceParent):
         except KeyError:
             return True
 
-    def get(self, id=None):
-        # route should be parent/<id>/child
-        paths = request.path.split("/")
-        parent, child = paths[1], paths[3]
-
-        resource = f"/{parent}/{child}"
-        self.error_if_resource_is_disabled("get", resource, self.api_schema)
-
-        if self.is_secured("get", resource, self.api_schema):
-            return self.get_resource_handler(request.headers).get_many_one_secure(
-                id, parent, child
-            )
+    @classmethod
+    def get_routes(cls, compiled: CompiledResource) -> dict:
+        actions = {
+            "get": cls.get_related,
+            "put": cls.put_related,
+            "patch": cls.patch_related,
+            "delete": cls.delete_related,
+        }
+
+        routes = {}
+        for custom_resource in compiled.api_schema.get("custom", []):
+            resource = custom_resource["resource"]
+            _, parent, child = resource.split("/")
+            for verb, action in actions.items():
+                try:
+                    cls.error_if_resource_is_disabled(
+                        verb, resource, compiled.api_schema
+                    )
+                except MethodNotAllowed:
+                    continue
+
+                secured = cls.is_secured(verb, resource, compiled.api_schema)
+                # Both ends of the relationship are served with its settings
+                routes[(verb, resource)] = (action, secured)
+                routes[(verb, f"/{child}/{parent}")] = (action, secured)
+        return routes
+
+    def get_parent_and_child(self):
+        # The route is the relationship as requested, /<parent>/<child>
+        _, parent, child = self.route.split("/")
+        return parent, child
+
+    def get_related(self, route: Route, id: int):
+        parent, child = self.get_parent_and_child()
+        if route.secured:
+            return route.handler.get_many_one_secure(id, parent, child)
         else:
-            return self.get_resource_handler(request.headers).get_many_one(
-                id, parent, child
-            )
+            return route.handler.get_many_one(id, parent, child)
 
-    def put(self, id=None):
+    def put_related(self, route: Route, id: int):
         # Replaces all data
-        paths = request.path.split("/")
-        parent, child = paths[1], paths[3]
-
-        resource = f"/{parent}/{child}"
-        self.error_if_resource_is_disabled("put", resource, self.api_schema)
-
+        parent, child = self.get_parent_and_child()
         value = request.json[child]
-        if self.is_secured("put", resource, self.api_schema):
-            return self.get_resource_handler(request.headers).put_many_one_secure(
-                id, parent, child, value
-            )
+        if route.secured:
+            return route.handler.put_many_one_secure(id, parent, child, value)
         else:
-            return self.get_resource_handler(request.headers).put_many_one(
-                id, parent, child, value
-            )
+            return route.handler.put_many_one(id, parent, child, value)
 
-    def patch(self, id=None):
+    def patch_related(self, route: Route, id: int):
         # Adds data
-        paths = request.path.split("/")
-        parent, child = paths[1], paths[3]
-
-        resource = f"/{parent}/{child}"
-        self.error_if_resource_is_disabled("patch", resource, self.api_schema)
-
+        parent, child = self.get_parent_and_child()
         value = request.json[child]
-        if self.is_secured("put", resource, self.api_schema):
-            return self.get_resource_handler(request.headers).patch_many_one_secure(
-                id, parent, child, value
-            )
+        if route.secured:
+            return route.handler.patch_many_one_secure(id, parent, child, value)
         else:
-            return self.get_resource_handler(request.headers).patch_many_one(
-                id, parent, child, value
-            )
-
-    def delete(self, id=None):
-        paths = request.path.split("/")
-        parent, child = paths[1], paths[3]
-
-        resource = f"/{parent}/{child}"
-        self.error_if_resource_is_disabled("delete", resource, self.api_schema)
+            return route.handler.patch_many_one(id, parent, child, value)
 
+    def delete_related(self, route: Route, id: int):
+        parent, child = self.get_parent_and_child()
         value = request.json[child]  # Needs an except KeyError
-        if self.is_secured("delete", resource, self.api_schema):
-            return self.get_resource_handler(request.headers).delete_many_one_secure(
-                id, parent, child, value
-            )
+        if route.secured:
+            return route.handler.delete_many_one_secure(id, parent, child, value)
         else:
-            return self.get_resource_handler(request.headers).delete_many_one(
-                id, parent, child, value
-            )
+            return route.handler.delete_many_one(id, parent, child, value)
 
 
 class VersionedResource(VersionedResourceParent):
-    _query_route = '/query'
-
-    def get(self, id=None):
-        if not self.api_schema["get"]["enabled"]:
-            raise MethodNotAllowed()
-        if request.path.endswith("/query"):
-            raise MethodNotAllowed()
-
+    @classmethod
+    def get_routes(cls, compiled: CompiledResource) -> dict:
+        api_schema = compiled.api_schema
+        get = api_schema.get("get", {})
+        post = api_schema.get("post", {})
+        upsert = api_schema.get("upsert", {})
+
+        routes = {}
+        if get.get("enabled", False):
+            secured = get.get("secured", True)
+            routes[("get", COLLECTION)] = (cls.get_all, secured)
+            routes[("get", ITEM)] = (cls.get_one, secured)
+            routes[("get", EXPORT)] = (cls.export, secured)
+            # Aggregating only reads, so it follows the settings of GET
+            routes[("post", AGGREGATE)] = (cls.aggregate, secured)
+            if SEARCH_COLUMN in compiled.data_model.__table__.columns:
+                routes[("get", SEARCH)] = (cls.search, secured)
+
+        if post.get("enabled", False):
+            secured = post.get("secured", True)
+            routes[("post", COLLECTION)] = (cls.insert, secured)
+            routes[("post", QUERY)] = (cls.query, secured)
+            if upsert.get("enabled", False):
+                routes[("post", UPSERT)] = (cls.upsert, upsert.get("secured", True))
+
+        for verb in ("put", "patch"):
+            settings = api_schema.get(verb, {})
+            if settings.get("enabled", False):
+                routes[(verb, ITEM)] = (cls.update, settings.get("secured", True))
+
+        delete = api_schema.get("delete", {})
+        if delete.get("enabled", False):
+            routes[("delete", ITEM)] = (cls.delete_one, delete.get("secured", True))
+        return routes
+
+    def get_all(self, route: Route):
         offset = 0
         limit = 20
         try:
@@ -168,125 +365,344 @@ class VersionedResource(VersionedResourceParent):
         except KeyError:
             pass
 
-        if id is None:
-            if self.api_schema["get"]["secured"]:
-                return self.get_resource_handler(request.headers).get_all_secure(
-                    self.data_model,
-                    self.data_resource_name,
-                    self.restricted_fields,
-                    offset,
-                    limit,
-                )
-            else:
-                return self.get_resource_handler(request.headers).get_all(
-                    self.data_model,
-                    self.data_resource_name,
-                    self.restricted_fields,
-                    offset,
-                    limit,
-                )
+        after = request.args.get("after")
+        before = request.args.get("before")
+
+        count_settings = RowCounter.get_count_settings(self.compiled.api_schema)
+        if request.args.get("count", "true").lower() == "false":
+            count_settings = None
+
+        cache_settings = ResponseCache.get_cache_settings(self.compiled.api_schema)
+
+        row_serializer = self.get_row_serializer()
+        expander = self.get_expander(row_serializer)
+
+        if self.is_secured(route, expander):
+            response = route.handler.get_all_secure(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.restricted_fields,
+                offset,
+                limit,
+                after,
+                before,
+                count_settings,
+                row_serializer,
+                request.if_none_match,
+                cache_settings,
+                expander,
+            )
         else:
-            if self.api_schema["get"]["secured"]:
-                return self.get_resource_handler(request.headers).get_one_secure(
-                    id, self.data_model, self.data_resource_name, self.table_schema
-                )
-            else:
-                return self.get_resource_handler(request.headers).get_one(
-                    id, self.data_model, self.data_resource_name, self.table_schema
-                )
+            response = route.handler.get_all(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.restricted_fields,
+                offset,
+                limit,
+                after,
+                before,
+                count_settings,
+                row_serializer,
+                request.if_none_match,
+                cache_settings,
+                expander,
+            )
 
-    def post(self):
-        if not self.api_schema["post"]["enabled"]:
-            raise MethodNotAllowed()
+        return self.add_cache_control(response)
+
+    def get_one(self, route: Route, id: int):
+        cache_settings = ResponseCache.get_cache_settings(self.compiled.api_schema)
+
+        row_serializer = self.get_row_serializer()
+        expander = self.get_expander(row_serializer)
+
+        if self.is_secured(route, expander):
+            response = route.handler.get_one_secure(
+                id,
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.table_schema,
+                row_serializer,
+                request.if_none_match,
+                cache_settings,
+                expander,
+            )
+        else:
+            response = route.handler.get_one(
+                id,
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.table_schema,
+                row_serializer,
+                request.if_none_match,
+                cache_settings,
+                expander,
+            )
+
+        return self.add_cache_control(response)
+
+    def is_secured(self, route: Route, expander) -> bool:
+        """Whether a read needs a token, including for its expansions."""
+        if expander is not None:
+            return route.secured or expander.secured
+        return route.secured
+
+    def get_row_serializer(self):
+        """Narrow the serializer to the fields requested with `?fields=`.
+
+        Returns:
+            RowSerializer: The serializer to read rows with.
+        """
+        fields = [
+            field.strip()
+            for field in request.args.get("fields", "").split(",")
+            if field.strip()
+        ]
+        if len(fields) == 0 or self.compiled.row_serializer is None:
+            return self.compiled.row_serializer
+
+        return self.compiled.row_serializer.narrow(fields)
+
+    def get_expander(self, row_serializer):
+        """Resolve the relationships requested with `?expand=`.
+
+        Args:
+            row_serializer (RowSerializer): The serializer to read rows with.
+
+        Returns:
+            RelationshipExpander: The relationships to expand, or None.
+        """
+        names = [
+            name.strip()
+            for name in request.args.get("expand", "").split(",")
+            if name.strip()
+        ]
+        if len(names) == 0:
+            return None
+
+        return RelationshipExpander(
+            self.compiled.data_model,
+            self.data_resource_name,
+            self.compiled.api_schema,
+            row_serializer,
+            names,
+        )
+
+    def add_cache_control(self, response):
+        """Add the Cache-Control header configured for GET requests.
+
+        Args:
+            response (tuple): The body, status code and headers from the handler.
+
+        Returns:
+            tuple: The same response, with the header added if one is configured.
+        """
+        cache_control = self.compiled.api_schema["get"].get("cache_control")
+        if cache_control is None:
+            return response
+
+        body, status_code, headers = response
+        headers = dict(headers)
+        headers["Cache-Control"] = cache_control
+        return body, status_code, headers
+
+    def search(self, route: Route):
+        search_query = request.args.get("q")
+        offset = request.args.get("offset", 0)
+        limit = request.args.get("limit", 20)
+        cache_settings = ResponseCache.get_cache_settings(self.compiled.api_schema)
+
+        if route.secured:
+            response = route.handler.search_secure(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.restricted_fields,
+                search_query,
+                offset,
+                limit,
+                self.get_row_serializer(),
+                request.if_none_match,
+                cache_settings,
+            )
+        else:
+            response = route.handler.search(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.restricted_fields,
+                search_query,
+                offset,
+                limit,
+                self.get_row_serializer(),
+                request.if_none_match,
+                cache_settings,
+            )
+
+        return self.add_cache_control(response)
+
+    def is_bulk_request(self):
+        """A POST with a JSON array or NDJSON body inserts many items."""
+        if request.mimetype == NDJSON:
+            return True
+        return isinstance(request.get_json(silent=True), list)
+
+    def export(self, route: Route):
+        mimetype = request.accept_mimetypes.best_match(EXPORT_MIMETYPES)
+        if mimetype is None:
+            raise ApiError(
+                "Unsupported export format. Accept one of: {}.".format(
+                    ", ".join(EXPORT_MIMETYPES)
+                ),
+                406,
+            )
+
+        if route.secured:
+            return route.handler.export_all_secure(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.restricted_fields,
+                mimetype,
+                self.get_row_serializer(),
+            )
+        else:
+            return route.handler.export_all(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.restricted_fields,
+                mimetype,
+                self.get_row_serializer(),
+            )
+
+    def query(self, route: Route):
+        if route.secured:
+            return route.handler.query_secure(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.restricted_fields,
+                self.compiled.table_schema,
+                request,
+                self.get_row_serializer(),
+                self.compiled.validator,
+                ResponseCache.get_cache_settings(self.compiled.api_schema),
+            )
+        else:
+            return route.handler.query(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.restricted_fields,
+                self.compiled.table_schema,
+                request,
+                self.get_row_serializer(),
+                self.compiled.validator,
+                ResponseCache.get_cache_settings(self.compiled.api_schema),
+            )
 
-        if self.api_schema["post"]["secured"]:
-            if request.path.endswith("/query"):
-                return self.get_resource_handler(request.headers).query_secure(
-                    self.data_model,
+    def insert(self, route: Route):
+        if self.is_bulk_request():
+            if route.secured:
+                return route.handler.insert_many_secure(
+                    self.compiled.data_model,
                     self.data_resource_name,
-                    self.restricted_fields,
-                    self.table_schema,
+                    self.compiled.table_schema,
                     request,
+                    self.compiled.validator,
                 )
             else:
-                return self.get_resource_handler(request.headers).insert_one_secure(
-                    self.data_model, self.data_resource_name, self.table_schema, request
-                )
-        else:
-            if request.path.endswith("/query"):
-                return self.get_resource_handler(request.headers).query(
-                    self.data_model,
+                return route.handler.insert_many(
+                    self.compiled.data_model,
                     self.data_resource_name,
-                    self.restricted_fields,
-                    self.table_schema,
+                    self.compiled.table_schema,
                     request,
-                )
-            else:
-                return self.get_resource_handler(request.headers).insert_one(
-                    self.data_model, self.data_resource_name, self.table_schema, request
+                    self.compiled.validator,
                 )
 
-    def put(self, id):
-        if not self.api_schema["put"]["enabled"]:
-            raise MethodNotAllowed()
-        if request.path.endswith("/query"):
-            raise MethodNotAllowed()
+        if route.secured:
+            return route.handler.insert_one_secure(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.table_schema,
+                request,
+                self.compiled.validator,
+            )
+        else:
+            return route.handler.insert_one(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.table_schema,
+                request,
+                self.compiled.validator,
+            )
 
-        if self.api_schema["put"]["secured"]:
-            return self.get_resource_handler(request.headers).update_one_secure(
-                id,
-                self.data_model,
+    def aggregate(self, route: Route):
+        if route.secured:
+            return route.handler.aggregate_secure(
+                self.compiled.data_model,
                 self.data_resource_name,
-                self.table_schema,
-                self.restricted_fields,
+                self.compiled.restricted_fields,
+                self.compiled.table_schema,
                 request,
-                mode="PUT",
+                self.compiled.validator,
+                ResponseCache.get_cache_settings(self.compiled.api_schema),
             )
         else:
-            return self.get_resource_handler(request.headers).update_one(
-                id,
-                self.data_model,
+            return route.handler.aggregate(
+                self.compiled.data_model,
                 self.data_resource_name,
-                self.table_schema,
-                self.restricted_fields,
+                self.compiled.restricted_fields,
+                self.compiled.table_schema,
                 request,
-                mode="PUT",
+                self.compiled.validator,
+                ResponseCache.get_cache_settings(self.compiled.api_schema),
             )
 
-    def patch(self, id):
-        if not self.api_schema["patch"]["enabled"]:
-            raise MethodNotAllowed()
-        if request.path.endswith("/query"):
-            raise MethodNotAllowed()
+    def upsert(self, route: Route):
+        upsert_schema = self.compiled.api_schema.get("upsert", {})
+
+        if route.secured:
+            return route.handler.upsert_many_secure(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.table_schema,
+                upsert_schema,
+                request,
+                self.compiled.validator,
+            )
+        else:
+            return route.handler.upsert_many(
+                self.compiled.data_model,
+                self.data_resource_name,
+                self.compiled.table_schema,
+                upsert_schema,
+                request,
+                self.compiled.validator,
+            )
 
-        if self.api_schema["patch"]["secured"]:
-            return self.get_resource_handler(request.headers).update_one_secure(
+    def update(self, route: Route, id: int):
+        # PUT replaces the item and PATCH only changes the fields it is sent
+        if route.secured:
+            return route.handler.update_one_secure(
                 id,
-                self.data_model,
+                self.compiled.data_model,
                 self.data_resource_name,
-                self.table_schema,
-                self.restricted_fields,
+                self.compiled.table_schema,
+                self.compiled.restricted_fields,
                 request,
-                mode="PATCH",
+                mode=request.method,
+                validator=self.compiled.validator,
             )
         else:
-            return self.get_resource_handler(request.headers).update_one(
+            return route.handler.update_one(
                 id,
-                self.data_model,
+                self.compiled.data_model,
                 self.data_resource_name,
-                self.table_schema,
-                self.restricted_fields,
+                self.compiled.table_schema,
+                self.compiled.restricted_fields,
                 request,
-                mode="PATCH",
+                mode=request.method,
+                validator=self.compiled.validator,
             )
 
-    def delete(self, id):
-        if self.api_schema["delete"]["enabled"]:
-            raise MethodNotAllowed()
-        if request.path.endswith("/query"):
-            raise MethodNotAllowed()
-
-        if self.api_schema["delete"]["secured"]:
+    def delete_one(self, route: Route, id: int):
+        if route.secured:
             return {"message": "Unimplemented secure delete"}
         else:
             return {"message": "Unimplemented unsecure delete"}
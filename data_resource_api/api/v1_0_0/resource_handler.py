@@ -1,8 +1,15 @@
 """Generic Resource Handler."""
 
+import base64
+import csv
+import datetime
+import io
+import json
 import math
 import re
 from collections import OrderedDict
+from hashlib import sha1
+from urllib.parse import urlencode
 
 from brighthive_authlib import token_required
 from data_resource_api.app.utils.exception_handler import (
@@ -11,27 +18,153 @@ from data_resource_api.app.utils.exception_handler import (
     InternalServerError,
     SchemaValidationFailure,
 )
+from data_resource_api.app.utils.json_converter import (
+    safe_json_dumps,
+    unknown_field_json_converter,
+)
 from data_resource_api.app.utils.junc_holder import JuncHolder
+from data_resource_api.app.utils.query_compiler import (
+    AGGREGATE_MAX_GROUPS,
+    AGGREGATE_OPTIONS,
+    QueryCompiler,
+)
+from data_resource_api.app.utils.row_counter import DEFAULT_TTL, RowCounter
+from data_resource_api.app.utils.resource_validator import ResourceValidator
+from data_resource_api.app.utils.response_cache import ResponseCache
+from data_resource_api.app.utils.row_serializer import RowSerializer
 from data_resource_api.config import ConfigurationFactory
 from data_resource_api.db import Session
+from data_resource_api.factories.orm_factory import SEARCH_COLUMN, SEARCH_LANGUAGE
 from data_resource_api.logging import LogFactory
-from sqlalchemy import and_
-from tableschema import Schema, validate
+from flask import Response
+from sqlalchemy import and_, any_, func, literal, literal_column, select, tuple_
+from sqlalchemy.dialects import postgresql
+from werkzeug.http import quote_etag, unquote_etag
+
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+EXPORT_MIMETYPES = [NDJSON, CSV]
+EXPORT_BATCH_SIZE = 1000
+BULK_INSERT_BATCH_SIZE = 1000
+API_VERSION = "1.0.0"
 
 
 class ResourceHandler:
     def __init__(self):
         self.logger = LogFactory.get_console_logger("resource-handler")
 
-    def build_json_from_object(self, obj: object, restricted_fields: dict = []):
-        resp = {
-            key: value if value is not None else ""
-            for key, value in obj.__dict__.items()
-            if not key.startswith("_")
-            and not callable(key)
-            and key not in restricted_fields
-        }
-        return resp
+    def get_row_serializer(self, data_model, restricted_fields, row_serializer=None):
+        """Return the serializer compiled for the data resource.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            restricted_fields (list): Fields that must not be returned.
+            row_serializer (RowSerializer): The precompiled serializer, if any.
+
+        Returns:
+            RowSerializer: The serializer to read rows with.
+        """
+        if row_serializer is None:
+            row_serializer = RowSerializer(data_model, restricted_fields)
+        return row_serializer
+
+    def get_validator(self, table_schema, restricted_fields=[], validator=None):
+        """Return the validator compiled for the data resource.
+
+        Args:
+            table_schema (dict): The Table Schema object to use for validation.
+            restricted_fields (list): Fields that must not be returned.
+            validator (ResourceValidator): The precompiled validator, if any.
+
+        Returns:
+            ResourceValidator: The validator to check requests with.
+        """
+        if validator is None:
+            validator = ResourceValidator(table_schema, restricted_fields)
+        return validator
+
+    def cached_read(
+        self,
+        data_resource_name,
+        cache_settings,
+        key,
+        if_none_match,
+        read,
+        row_serializer=None,
+    ):
+        """Serve a read from the response cache, reading through on a miss.
+
+        Args:
+            data_resource_name (str): Name of the data resource.
+            cache_settings (dict): How long to cache the response.
+            key (tuple): Everything besides the resource the response depends on.
+            if_none_match (ETags): Entity tags from the If-None-Match header.
+            read (function): Builds the full response when it is not cached.
+            row_serializer (RowSerializer): The serializer the response is read
+                with. Responses narrowed to different fields are cached apart.
+
+        Return:
+            tuple: The cached or freshly read response.
+        """
+        fields = None if row_serializer is None else row_serializer.column_names
+        key = (API_VERSION, fields) + key
+        response = ResponseCache.get(data_resource_name, key)
+        if response is None:
+            generation = ResponseCache.get_generation(data_resource_name)
+            response = read()
+            ResponseCache.set(
+                data_resource_name, key, response, cache_settings["ttl"], generation
+            )
+
+        if len(response) > 2 and "ETag" in response[2]:
+            etag = unquote_etag(response[2]["ETag"])[0]
+            if self.is_not_modified(if_none_match, etag):
+                return self.not_modified(etag)
+
+        return response
+
+    def commit_changes(self, session, *data_resource_names):
+        """Commit a write and invalidate the caches of the changed resources.
+
+        Note:
+            Other workers are told through a notification sent with the commit.
+            This worker's caches are cleared right away so that it always reads
+            its own writes.
+
+        Args:
+            session (object): SQLAlchemy session.
+            data_resource_names (str): Names of the data resources that changed.
+        """
+        ResponseCache.notify(session, data_resource_names)
+        session.commit()
+
+        for data_resource_name in data_resource_names:
+            ResponseCache.invalidate(data_resource_name)
+            RowCounter.invalidate(data_resource_name)
+
+    def is_not_modified(self, if_none_match, etag: str) -> bool:
+        """Check if the client already has the current version of a response.
+
+        Args:
+            if_none_match (ETags): Entity tags from the If-None-Match header.
+            etag (str): The unquoted entity tag of the current response.
+
+        Returns:
+            bool: True if one of the client's tags matches.
+        """
+        return if_none_match is not None and if_none_match.contains(etag)
+
+    def not_modified(self, etag: str):
+        """Build a 304 Not Modified response.
+
+        Args:
+            etag (str): The unquoted entity tag of the current response.
+
+        Returns:
+            dict, int, dict: An empty body, the HTTP status code and ETag header.
+        """
+        return {}, 304, {"ETag": quote_etag(etag)}
 
     def compute_offset(self, page: int, items_per_page: int) -> int:
         """Compute the offset value for pagination.
@@ -56,24 +189,37 @@ class ResourceHandler:
 
         return int(math.ceil((int(offset) + 1) / int(items_per_page)))
 
-    def build_links(self, endpoint: str, offset: int, limit: int, rows: int):
+    def build_links(
+        self,
+        endpoint: str,
+        offset: int,
+        limit: int,
+        rows: int,
+        has_next: bool = False,
+        args: dict = None,
+    ):
         """Build links for a paginated response
         Args:
             endpoint (str): Name of the endpoint to provide in the link.
             offset (int): Database query offset.
             limit (int): Number of items to return in query.
-            rows (int): Count of rows in table.
+            rows (int): Count of rows in table, or None if the rows were not counted.
+            has_next (bool): Whether another page exists when the rows were not counted.
+            args (dict): Other query string arguments to keep in the links.
 
         Returns:
             dict: The links based on the offset and limit
         """
         offset = int(offset)
         limit = int(limit)
-        rows = int(rows)
 
         # URL and pages
         url_link = "/{}?offset={}&limit={}"
-        total_pages = int(math.ceil(int(rows) / int(limit)))
+        if args is not None:
+            # Braces are percent-encoded, so they cannot break the format below
+            url_link = "/{}?" + urlencode(args) + "&offset={}&limit={}"
+        if rows is None:
+            url_link += "&count=false"
         current_page = self.compute_page(offset, limit)
 
         # Links
@@ -99,6 +245,18 @@ class ResourceHandler:
             )
             links.append(prev)
 
+        if rows is None:
+            if has_next:
+                next["rel"] = "next"
+                next["href"] = url_link.format(
+                    endpoint, self.compute_offset(current_page + 1, limit), limit
+                )
+                links.append(next)
+            return links
+
+        rows = int(rows)
+        total_pages = int(math.ceil(int(rows) / int(limit)))
+
         if current_page < total_pages:
             next["rel"] = "next"
             next["href"] = url_link.format(
@@ -112,237 +270,1623 @@ class ResourceHandler:
         )
         links.append(last)
 
-        return links
+        return links
+
+    def build_cursor_links(
+        self,
+        endpoint: str,
+        limit: int,
+        current: tuple,
+        first_cursor: str,
+        last_cursor: str,
+        has_prev: bool,
+        has_next: bool,
+    ):
+        """Build links for a cursor paginated response.
+
+        Args:
+            endpoint (str): Name of the endpoint to provide in the link.
+            limit (int): Number of items to return in query.
+            current (tuple): The cursor parameter and value of the current request.
+            first_cursor (str): Cursor of the first row on the page.
+            last_cursor (str): Cursor of the last row on the page.
+            has_prev (bool): Whether rows exist before this page.
+            has_next (bool): Whether rows exist after this page.
+
+        Returns:
+            dict: The links based on the cursors and limit
+        """
+        limit = int(limit)
+        url_link = "/{}?{}={}&limit={}"
+
+        current_param, current_cursor = current
+
+        # Links
+        current = OrderedDict()
+        first = OrderedDict()
+        prev = OrderedDict()
+        next = OrderedDict()
+        links = []
+
+        current["rel"] = "self"
+        current["href"] = url_link.format(
+            endpoint, current_param, current_cursor, limit
+        )
+        links.append(current)
+
+        first["rel"] = "first"
+        first["href"] = url_link.format(endpoint, "after", "", limit)
+        links.append(first)
+
+        if has_prev:
+            prev["rel"] = "prev"
+            prev["href"] = url_link.format(endpoint, "before", first_cursor, limit)
+            links.append(prev)
+
+        if has_next:
+            next["rel"] = "next"
+            next["href"] = url_link.format(endpoint, "after", last_cursor, limit)
+            links.append(next)
+
+        return links
+
+    def encode_cursor(self, values: list) -> str:
+        """Encode primary key values into an opaque pagination cursor.
+
+        Args:
+            values (list): The primary key values of a row.
+
+        Returns:
+            str: The URL safe cursor.
+        """
+        return base64.urlsafe_b64encode(safe_json_dumps(values).encode("utf-8")).decode(
+            "utf-8"
+        )
+
+    def decode_cursor(self, cursor: str, key_length: int) -> list:
+        """Decode a pagination cursor into primary key values.
+
+        Args:
+            cursor (str): The cursor provided by the client.
+            key_length (int): Number of columns in the primary key.
+
+        Returns:
+            list: The primary key values.
+
+        Raises:
+            ApiError: If the cursor is malformed.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+        except Exception:
+            raise ApiError("Invalid pagination cursor.", 400)
+
+        if not isinstance(values, list) or len(values) != key_length:
+            raise ApiError("Invalid pagination cursor.", 400)
+
+        return values
+
+    def validate_email(email_address):
+        """Rudimentary email address validator.
+
+        Args:
+            email_address (str): Email address string to validate.
+        Return:
+            bool: True if the email address is valid, False if not.
+        """
+        email_regex = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
+        is_valid = False
+
+        if email_regex.match(email_address):
+            is_valid = True
+
+        return is_valid
+
+    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
+    def get_all_secure(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        offset=0,
+        limit=1,
+        after=None,
+        before=None,
+        count_settings={"strategy": "exact"},
+        row_serializer=None,
+        if_none_match=None,
+        cache_settings=None,
+        expander=None,
+    ):
+        """Wrapper method for get_all method.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            offset (int): Pagination offset.
+            limit (int): Result limit.
+            after (str): Cursor to return the rows after.
+            before (str): Cursor to return the rows before.
+            count_settings (dict): How to count the rows, or None to skip counting.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+            if_none_match (ETags): Entity tags from the If-None-Match header.
+            cache_settings (dict): How long to cache the response, or None.
+            expander (RelationshipExpander): Relationships to add to each item.
+
+        Return:
+            function: The wrapped method.
+        """
+        return self.get_all(
+            data_model,
+            data_resource_name,
+            restricted_fields,
+            offset,
+            limit,
+            after,
+            before,
+            count_settings,
+            row_serializer,
+            if_none_match,
+            cache_settings,
+            expander,
+        )
+
+    def get_all(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        offset=0,
+        limit=1,
+        after=None,
+        before=None,
+        count_settings={"strategy": "exact"},
+        row_serializer=None,
+        if_none_match=None,
+        cache_settings=None,
+        expander=None,
+    ):
+        """Retrieve a paginated list of items.
+
+        Note:
+            Providing an `after` or `before` cursor switches from offset pagination
+            to keyset pagination on the primary key. An empty `after` cursor
+            returns the first page.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            offset (int): Pagination offset.
+            limit (int): Result limit.
+            after (str): Cursor to return the rows after.
+            before (str): Cursor to return the rows before.
+            count_settings (dict): How to count the rows, or None to skip counting.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+            if_none_match (ETags): Entity tags from the If-None-Match header.
+            cache_settings (dict): How long to cache the response, or None.
+            expander (RelationshipExpander): Relationships to add to each item.
+
+        Return:
+            dict, int, dict: The response object, associated HTTP status code and
+                the ETag header.
+        """
+        # Expanded items can change without the rows changing, so skip the cache
+        if cache_settings is not None and expander is None:
+            key = ("get_all", offset, limit, after, before, count_settings is None)
+            return self.cached_read(
+                data_resource_name,
+                cache_settings,
+                key,
+                if_none_match,
+                lambda: self.get_all(
+                    data_model,
+                    data_resource_name,
+                    restricted_fields,
+                    offset,
+                    limit,
+                    after,
+                    before,
+                    count_settings,
+                    row_serializer,
+                ),
+                row_serializer,
+            )
+
+        row_serializer = self.get_row_serializer(
+            data_model, restricted_fields, row_serializer
+        )
+
+        if after is not None or before is not None:
+            return self.get_all_by_cursor(
+                data_model,
+                data_resource_name,
+                row_serializer,
+                limit,
+                after,
+                before,
+                if_none_match,
+                expander,
+            )
+
+        session = Session()
+        response = OrderedDict()
+        response[data_resource_name] = []
+        response["links"] = []
+        links = []
+
+        try:
+            query = row_serializer.select().order_by(
+                *row_serializer.primary_key_columns
+            )
+
+            if count_settings is None:
+                # Fetch one extra row to find out if another page exists
+                query = query.limit(int(limit) + 1).offset(int(offset))
+                results = session.execute(query).fetchall()
+                has_next = len(results) > int(limit)
+                results = results[: int(limit)]
+            else:
+                query = query.limit(int(limit)).offset(int(offset))
+                results = session.execute(query).fetchall()
+
+            if count_settings is None:
+                if len(results) > 0 or int(offset) > 0:
+                    links = self.build_links(
+                        data_resource_name, offset, limit, None, has_next
+                    )
+            else:
+                row_count = RowCounter.count(
+                    session,
+                    data_model,
+                    count_settings["strategy"],
+                    count_settings.get("ttl", DEFAULT_TTL),
+                )
+                if row_count > 0:
+                    links = self.build_links(
+                        data_resource_name, offset, limit, row_count
+                    )
+
+            if expander is not None:
+                expanded = expander.load(session, results)
+        except Exception:
+            raise InternalServerError()
+        finally:
+            session.close()
+
+        if expander is None:
+            etag = row_serializer.etag(results, links)
+        else:
+            etag = row_serializer.etag(results, [links, expanded])
+        if self.is_not_modified(if_none_match, etag):
+            return self.not_modified(etag)
+
+        for row in results:
+            item = row_serializer.serialize(row)
+            if expander is not None:
+                expander.attach(item, row, expanded)
+            response[data_resource_name].append(item)
+        response["links"] = links
+
+        return response, 200, {"ETag": quote_etag(etag)}
+
+    def get_all_by_cursor(
+        self,
+        data_model,
+        data_resource_name,
+        row_serializer,
+        limit,
+        after,
+        before,
+        if_none_match=None,
+        expander=None,
+    ):
+        """Retrieve a page of items using keyset pagination.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+            limit (int): Result limit.
+            after (str): Cursor to return the rows after.
+            before (str): Cursor to return the rows before.
+            if_none_match (ETags): Entity tags from the If-None-Match header.
+            expander (RelationshipExpander): Relationships to add to each item.
+
+        Return:
+            dict, int, dict: The response object, associated HTTP status code and
+                the ETag header.
+        """
+        if after is not None and before is not None:
+            raise ApiError("Only one of 'after' or 'before' may be provided.", 400)
+
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ApiError("Invalid pagination limit.", 400)
+
+        pk_columns = row_serializer.primary_key_columns
+        if len(pk_columns) == 1:
+            key = pk_columns[0]
+        else:
+            key = tuple_(*pk_columns)
+
+        def cursor_key(cursor):
+            values = self.decode_cursor(cursor, len(pk_columns))
+            if len(pk_columns) == 1:
+                return values[0]
+            return tuple_(*values)
+
+        session = Session()
+        response = OrderedDict()
+        response[data_resource_name] = []
+        response["links"] = []
+
+        try:
+            query = row_serializer.select()
+            if before is not None:
+                query = query.where(key < cursor_key(before)).order_by(
+                    *[column.desc() for column in pk_columns]
+                )
+            else:
+                if after:
+                    query = query.where(key > cursor_key(after))
+                query = query.order_by(*pk_columns)
+
+            # Fetch one extra row to find out if another page exists
+            results = session.execute(query.limit(limit + 1)).fetchall()
+            has_more = len(results) > limit
+            results = results[:limit]
+            if before is not None:
+                results.reverse()
+
+            if len(results) > 0:
+                first_cursor = self.encode_cursor(
+                    row_serializer.primary_key_values(results[0])
+                )
+                last_cursor = self.encode_cursor(
+                    row_serializer.primary_key_values(results[-1])
+                )
+                if before is not None:
+                    current = ("before", before)
+                    has_prev, has_next = has_more, True
+                else:
+                    current = ("after", after)
+                    has_prev, has_next = bool(after), has_more
+
+                response["links"] = self.build_cursor_links(
+                    data_resource_name,
+                    limit,
+                    current,
+                    first_cursor,
+                    last_cursor,
+                    has_prev,
+                    has_next,
+                )
+
+            if expander is not None:
+                expanded = expander.load(session, results)
+        except ApiError:
+            raise
+        except Exception:
+            raise InternalServerError()
+        finally:
+            session.close()
+
+        if expander is None:
+            etag = row_serializer.etag(results, response["links"])
+        else:
+            etag = row_serializer.etag(results, [response["links"], expanded])
+        if self.is_not_modified(if_none_match, etag):
+            return self.not_modified(etag)
+
+        for row in results:
+            item = row_serializer.serialize(row)
+            if expander is not None:
+                expander.attach(item, row, expanded)
+            response[data_resource_name].append(item)
+
+        return response, 200, {"ETag": quote_etag(etag)}
+
+    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
+    def export_all_secure(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        mimetype=NDJSON,
+        row_serializer=None,
+    ):
+        """Wrapper method for export_all method.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            restricted_fields (list): Fields that must not be exported.
+            mimetype (str): Either NDJSON or CSV.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+
+        Return:
+            function: The wrapped method.
+        """
+        return self.export_all(
+            data_model, data_resource_name, restricted_fields, mimetype, row_serializer
+        )
+
+    def export_all(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        mimetype=NDJSON,
+        row_serializer=None,
+    ):
+        """Stream every item of the data resource.
+
+        Note:
+            Rows are read through a server-side cursor in batches of
+            `EXPORT_BATCH_SIZE` and written to the response as they arrive, so
+            memory use does not grow with the size of the table.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            restricted_fields (list): Fields that must not be exported.
+            mimetype (str): Either NDJSON or CSV.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+
+        Return:
+            object: A streamed Flask response.
+        """
+        row_serializer = self.get_row_serializer(
+            data_model, restricted_fields, row_serializer
+        )
+
+        if mimetype == CSV:
+            extension = "csv"
+            line_buffer = io.StringIO()
+            writer = csv.writer(line_buffer)
+
+            def format_row(values):
+                line_buffer.seek(0)
+                line_buffer.truncate()
+                writer.writerow(values)
+                return line_buffer.getvalue()
+
+            def format_header():
+                return format_row(row_serializer.column_names)
+
+            def format_values(row):
+                return format_row(
+                    [self.csv_value(value) for value in row_serializer.values(row)]
+                )
+
+        else:
+            extension = "ndjson"
+
+            def format_header():
+                return ""
+
+            def format_values(row):
+                return safe_json_dumps(row_serializer.serialize(row)) + "\n"
+
+        def generate():
+            session = Session()
+            try:
+                query = (
+                    row_serializer.select()
+                    .order_by(*row_serializer.primary_key_columns)
+                    .execution_options(stream_results=True)
+                )
+                results = session.execute(query)
+                yield format_header()
+                while True:
+                    rows = results.fetchmany(EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield format_values(row)
+            except Exception:
+                self.logger.exception(f"Failed to export '{data_resource_name}'.")
+                raise
+            finally:
+                session.close()
+
+        return Response(
+            generate(),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": "attachment; filename={}.{}".format(
+                    data_resource_name, extension
+                )
+            },
+        )
+
+    def csv_value(self, value):
+        """Convert a database value into a CSV cell.
+
+        Args:
+            value (any): The value read from the database.
+
+        Returns:
+            any: A value the CSV writer can output.
+        """
+        if value is None:
+            return ""
+        if isinstance(value, (dict, list)):
+            return safe_json_dumps(value)
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return unknown_field_json_converter(value)
+        return value
+
+    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
+    def query_secure(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        table_schema,
+        request_obj,
+        row_serializer=None,
+        validator=None,
+        cache_settings=None,
+    ):
+        """Wrapper method for query."""
+        return self.query(
+            data_model,
+            data_resource_name,
+            restricted_fields,
+            table_schema,
+            request_obj,
+            row_serializer,
+            validator,
+            cache_settings,
+        )
+
+    def query(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        table_schema,
+        request_obj,
+        row_serializer=None,
+        validator=None,
+        cache_settings=None,
+    ):
+        """Query the data resource."""
+
+        try:
+            request_obj = request_obj.json
+        except Exception:
+            raise ApiError("No request body found.", 400)
+
+        if cache_settings is not None:
+            body = json.dumps(request_obj, sort_keys=True, default=str)
+            key = ("query", sha1(body.encode()).hexdigest())
+            return self.cached_read(
+                data_resource_name,
+                cache_settings,
+                key,
+                None,
+                lambda: self.run_query(
+                    data_model,
+                    data_resource_name,
+                    restricted_fields,
+                    table_schema,
+                    request_obj,
+                    row_serializer,
+                    validator,
+                ),
+                row_serializer,
+            )
+
+        return self.run_query(
+            data_model,
+            data_resource_name,
+            restricted_fields,
+            table_schema,
+            request_obj,
+            row_serializer,
+            validator,
+        )
+
+    def run_query(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        table_schema,
+        request_obj,
+        row_serializer=None,
+        validator=None,
+    ):
+        """Find the items that match the conditions of a query body.
+
+        Note:
+            Results are returned in pages of `limit` items. When more items
+            match, the response includes a `next` cursor to send as `after`.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            restricted_fields (list): Fields that must not be queried or returned.
+            table_schema (dict): The Table Schema object to use for validation.
+            request_obj (dict): The query body.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+            validator (ResourceValidator): The precompiled validator, if any.
+
+        Return:
+            dict, int: The response object and associated HTTP status code.
+        """
+        validator = self.get_validator(table_schema, restricted_fields, validator)
+        validator.check_schema()
+        if not isinstance(request_obj, dict):
+            raise ApiError("Invalid request body.", 400)
+
+        row_serializer = self.get_row_serializer(
+            data_model, restricted_fields, row_serializer
+        )
+
+        compiler = QueryCompiler(data_model, validator)
+        condition, options = compiler.split(request_obj)
+        where = compiler.where(condition)
+        sort_keys = compiler.sort(
+            options.get("sort", []), row_serializer.primary_key_columns
+        )
+        limit = compiler.limit(options.get("limit"))
+        compiler.check_errors()
+
+        after = options.get("after")
+        if after:
+            values = self.decode_cursor(after, len(sort_keys))
+            where = and_(where, compiler.after(sort_keys, values))
+
+        query = row_serializer.select().where(where)
+        for idx, (column, _) in enumerate(sort_keys):
+            # The sort values are selected last to build the next cursor from
+            query = query.column(column.label(f"sort_{idx}"))
+        query = query.order_by(*compiler.order_by(sort_keys)).limit(limit + 1)
+
+        session = Session()
+        try:
+            results = session.execute(query).fetchall()
+        except Exception:
+            raise ApiUnhandledError("Failed to query the data resource.", 400)
+        finally:
+            session.close()
+
+        if len(results) == 0:
+            return {"message": "No matches found"}, 404
+
+        response = OrderedDict()
+        response["results"] = [row_serializer.serialize(row) for row in results[:limit]]
+        if len(results) > limit:
+            last_row = results[limit - 1]
+            response["next"] = self.encode_cursor(
+                list(last_row[len(last_row) - len(sort_keys) :])
+            )
+
+        return response, 200
+
+    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
+    def aggregate_secure(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        table_schema,
+        request_obj,
+        validator=None,
+        cache_settings=None,
+    ):
+        """Wrapper method for aggregate."""
+        return self.aggregate(
+            data_model,
+            data_resource_name,
+            restricted_fields,
+            table_schema,
+            request_obj,
+            validator,
+            cache_settings,
+        )
+
+    def aggregate(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        table_schema,
+        request_obj,
+        validator=None,
+        cache_settings=None,
+    ):
+        """Aggregate the data resource."""
+        try:
+            request_obj = request_obj.json
+        except Exception:
+            raise ApiError("No request body found.", 400)
+
+        if cache_settings is not None:
+            body = json.dumps(request_obj, sort_keys=True, default=str)
+            key = ("aggregate", sha1(body.encode()).hexdigest())
+            return self.cached_read(
+                data_resource_name,
+                cache_settings,
+                key,
+                None,
+                lambda: self.run_aggregate(
+                    data_model,
+                    data_resource_name,
+                    restricted_fields,
+                    table_schema,
+                    request_obj,
+                    validator,
+                ),
+            )
+
+        return self.run_aggregate(
+            data_model,
+            data_resource_name,
+            restricted_fields,
+            table_schema,
+            request_obj,
+            validator,
+        )
+
+    def run_aggregate(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        table_schema,
+        request_obj,
+        validator=None,
+    ):
+        """Group the items that match the conditions of a body and aggregate them.
+
+        Note:
+            The body takes the conditions of `/query` bodies, the `group_by`
+            fields and the `aggregates` to compute for each group. The groups
+            are computed by a single GROUP BY and returned ordered by their
+            fields.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            restricted_fields (list): Fields that must not be grouped or aggregated.
+            table_schema (dict): The Table Schema object to use for validation.
+            request_obj (dict): The aggregate body.
+            validator (ResourceValidator): The precompiled validator, if any.
+
+        Return:
+            dict, int: The response object and associated HTTP status code.
+        """
+        validator = self.get_validator(table_schema, restricted_fields, validator)
+        validator.check_schema()
+        if not isinstance(request_obj, dict):
+            raise ApiError("Invalid request body.", 400)
+
+        compiler = QueryCompiler(data_model, validator)
+        condition, options = compiler.split(request_obj, AGGREGATE_OPTIONS)
+        where = compiler.where(condition)
+        groups = compiler.group_by(options.get("group_by", []))
+        aggregates = compiler.aggregates(
+            options.get("aggregates"), [column.key for column in groups]
+        )
+        compiler.check_errors()
+
+        query = (
+            select(groups + aggregates)
+            .select_from(data_model.__table__)
+            .where(where)
+            .group_by(*groups)
+            .order_by(*[column.asc().nullslast() for column in groups])
+            .limit(AGGREGATE_MAX_GROUPS + 1)
+        )
+
+        session = Session()
+        try:
+            results = session.execute(query).fetchall()
+        except Exception:
+            raise ApiUnhandledError("Failed to aggregate the data resource.", 400)
+        finally:
+            session.close()
+
+        if len(results) > AGGREGATE_MAX_GROUPS:
+            raise ApiError(
+                f"More than {AGGREGATE_MAX_GROUPS} groups found. Group by fewer "
+                "fields or add conditions.",
+                400,
+            )
+
+        names = [column.key for column in groups + aggregates]
+        response = OrderedDict()
+        response["results"] = [
+            {
+                name: unknown_field_json_converter(value) or value
+                for name, value in zip(names, row)
+            }
+            for row in results
+        ]
+
+        return response, 200
+
+    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
+    def search_secure(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        search_query,
+        offset=0,
+        limit=20,
+        row_serializer=None,
+        if_none_match=None,
+        cache_settings=None,
+    ):
+        """Wrapper method for search."""
+        return self.search(
+            data_model,
+            data_resource_name,
+            restricted_fields,
+            search_query,
+            offset,
+            limit,
+            row_serializer,
+            if_none_match,
+            cache_settings,
+        )
+
+    def search(
+        self,
+        data_model,
+        data_resource_name,
+        restricted_fields,
+        search_query,
+        offset=0,
+        limit=20,
+        row_serializer=None,
+        if_none_match=None,
+        cache_settings=None,
+    ):
+        """Find the items whose searchable fields match a full-text query.
+
+        Note:
+            The query accepts the web search syntax of PostgreSQL: quoted
+            phrases, `or` and `-` to exclude a word. The best matches come first.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            restricted_fields (list): Fields that must not be returned.
+            search_query (str): The words to search for.
+            offset (int): Pagination offset.
+            limit (int): Result limit.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+            if_none_match (ETags): Entity tags from the If-None-Match header.
+            cache_settings (dict): How long to cache the response, or None.
+
+        Return:
+            dict, int, dict: The response object, associated HTTP status code and
+                the ETag header.
+        """
+        if search_query is None or search_query.strip() == "":
+            raise ApiError("Missing search query.", 400)
+
+        try:
+            offset = int(offset)
+            limit = int(limit)
+        except ValueError:
+            raise ApiError("Offset and limit must be integers.", 400)
+
+        if cache_settings is not None:
+            key = ("search", search_query, offset, limit)
+            return self.cached_read(
+                data_resource_name,
+                cache_settings,
+                key,
+                if_none_match,
+                lambda: self.search(
+                    data_model,
+                    data_resource_name,
+                    restricted_fields,
+                    search_query,
+                    offset,
+                    limit,
+                    row_serializer,
+                ),
+                row_serializer,
+            )
+
+        row_serializer = self.get_row_serializer(
+            data_model, restricted_fields, row_serializer
+        )
+
+        search_column = data_model.__table__.columns[SEARCH_COLUMN]
+        ts_query = func.websearch_to_tsquery(SEARCH_LANGUAGE, search_query)
+        query = (
+            row_serializer.select()
+            .where(search_column.op("@@")(ts_query))
+            .order_by(
+                func.ts_rank(search_column, ts_query).desc(),
+                *row_serializer.primary_key_columns,
+            )
+            # Fetch one extra row to find out if another page exists
+            .limit(limit + 1)
+            .offset(offset)
+        )
+
+        session = Session()
+        try:
+            results = session.execute(query).fetchall()
+        except Exception:
+            raise InternalServerError()
+        finally:
+            session.close()
+
+        has_next = len(results) > limit
+        results = results[:limit]
+
+        links = []
+        if len(results) > 0 or offset > 0:
+            links = self.build_links(
+                f"{data_resource_name}/search",
+                offset,
+                limit,
+                None,
+                has_next,
+                {"q": search_query},
+            )
+
+        etag = row_serializer.etag(results, links)
+        if self.is_not_modified(if_none_match, etag):
+            return self.not_modified(etag)
+
+        response = OrderedDict()
+        response[data_resource_name] = [
+            row_serializer.serialize(row) for row in results
+        ]
+        response["links"] = links
+
+        return response, 200, {"ETag": quote_etag(etag)}
+
+    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
+    def insert_one_secure(
+        self, data_model, data_resource_name, table_schema, request_obj, validator=None
+    ):
+        """Wrapper method for insert one method.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            table_schema (dict): The Table Schema object to use for validation.
+            request_obj (dict): HTTP request object.
+            validator (ResourceValidator): The precompiled validator, if any.
+
+        Return:
+            function: The wrapped method.
+        """
+        return self.insert_one(
+            data_model, data_resource_name, table_schema, request_obj, validator
+        )
+
+    def insert_one(
+        self, data_model, data_resource_name, table_schema, request_obj, validator=None
+    ):
+        """Insert a new object.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            table_schema (dict): The Table Schema object to use for validation.
+            request_obj (dict): HTTP request object.
+            validator (ResourceValidator): The precompiled validator, if any.
+
+        Return:
+            dict, int: The response object and associated HTTP status code.
+        """
+        try:
+            request_obj = request_obj.json
+        except Exception:
+            raise ApiError("No request body found.", 400)
+
+        validator = self.get_validator(table_schema, validator=validator)
+        validator.check_schema()
+
+        values, many_query, errors = self.check_insert_fields(
+            data_resource_name, validator, request_obj
+        )
+
+        if len(errors) > 0:
+            raise ApiError("Invalid request body.", 400, errors)
+
+        try:
+            session = Session()
+            new_object = data_model()
+            for field, value in values.items():
+                setattr(new_object, field, value)
+            session.add(new_object)
+            session.flush()
+            id_value = getattr(new_object, table_schema["primaryKey"])
+
+            # process the many_query
+            for field, values, table in many_query:
+                self.process_many_query(
+                    session, table, id_value, field, data_resource_name, values
+                )
+
+            self.commit_changes(
+                session, data_resource_name, *[field for field, _, _ in many_query]
+            )
+
+            return {"message": "Successfully added new resource.", "id": id_value}, 201
+        except Exception:
+            raise ApiUnhandledError("Failed to create new resource.", 400)
+        finally:
+            session.close()
+
+    def check_insert_fields(
+        self, data_resource_name: str, validator: object, request_obj: dict
+    ):
+        """Check an object that is about to be inserted.
+
+        Args:
+            data_resource_name (str): Name of the data resource.
+            validator (ResourceValidator): The validator of the data resource.
+            request_obj (dict): The object to insert.
+
+        Return:
+            dict, list, list: The cast values to insert, the many to many
+                relationships to insert and the validation errors.
+        """
+        errors = []
+
+        # Check for required fields
+        for field in validator.required_fields:
+            if field not in request_obj:
+                errors.append(f"Required field '{field}' is missing.")
+
+        values = {}
+        many_query = []
+
+        for field, value in request_obj.items():
+            if field in validator.accepted_fields:
+                values[field], error = validator.cast(field, value)
+                if error is not None:
+                    errors.append(error)
+            else:
+                junc_table = JuncHolder.lookup_table(field, data_resource_name)
+
+                if junc_table is not None:
+                    if not isinstance(value, list):
+                        value = [value]
+                    many_query.append([field, value, junc_table])
+                else:
+                    errors.append(f"Unknown field '{field}' found.")
+
+        return values, many_query, errors
+
+    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
+    def insert_many_secure(
+        self, data_model, data_resource_name, table_schema, request_obj, validator=None
+    ):
+        """Wrapper method for insert many method.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            table_schema (dict): The Table Schema object to use for validation.
+            request_obj (dict): HTTP request object.
+            validator (ResourceValidator): The precompiled validator, if any.
+
+        Return:
+            function: The wrapped method.
+        """
+        return self.insert_many(
+            data_model, data_resource_name, table_schema, request_obj, validator
+        )
+
+    def insert_many(
+        self, data_model, data_resource_name, table_schema, request_obj, validator=None
+    ):
+        """Insert many new objects.
+
+        Note:
+            The body is either a JSON array or NDJSON. Objects that fail
+            validation are reported and skipped. The rest are written with one
+            multi-row INSERT per batch of `BULK_INSERT_BATCH_SIZE` objects. If a
+            batch is rejected by the database its objects are retried one at a
+            time to find the ones at fault.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            table_schema (dict): The Table Schema object to use for validation.
+            request_obj (dict): HTTP request object.
+            validator (ResourceValidator): The precompiled validator, if any.
+
+        Return:
+            dict, int: The response object and associated HTTP status code.
+        """
+        items = self.get_bulk_items(request_obj)
+
+        validator = self.get_validator(table_schema, validator=validator)
+        validator.check_schema()
+
+        errors = []
+        pending = []
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "errors": ["Item must be an object."]})
+                continue
+
+            values, many_query, item_errors = self.check_insert_fields(
+                data_resource_name, validator, item
+            )
+            if len(item_errors) > 0:
+                errors.append({"index": index, "errors": item_errors})
+                continue
+
+            pending.append((index, values, many_query))
+
+        def write_batch(session, batch):
+            return self.insert_batch(session, data_model, data_resource_name, batch)
+
+        # Relationships are written along with the objects
+        data_resource_names = [data_resource_name]
+        for _, _, many_query in pending:
+            for field, _, _ in many_query:
+                if field not in data_resource_names:
+                    data_resource_names.append(field)
+
+        new_ids = self.write_batches(
+            data_resource_names,
+            pending,
+            write_batch,
+            errors,
+            "Failed to create new resource.",
+        )
+        ids = [new_ids.get(index) for index in range(len(items))]
+
+        created = len(items) - len(errors)
+        response = OrderedDict()
+        response["message"] = f"Successfully added {created} new resources."
+        response["ids"] = ids
+        if len(errors) > 0:
+            response["errors"] = sorted(errors, key=lambda error: error["index"])
+
+        if created == 0 and len(items) > 0:
+            response["message"] = "Failed to create new resources."
+            return response, 400
+
+        return response, 201
+
+    def write_batches(
+        self,
+        data_resource_names: list,
+        pending: list,
+        write_batch,
+        errors: list,
+        error_message: str,
+    ) -> dict:
+        """Write validated objects in batches, one transaction per batch.
+
+        Note:
+            If the database rejects a batch it is rolled back and its objects
+            are written one at a time, so only the objects at fault fail.
+
+        Args:
+            data_resource_names (list): Names of the data resources written to.
+            pending (list): Tuples starting with the request index of each object.
+            write_batch (function): Writes a batch in a session and returns the
+                result of each object keyed by request index.
+            errors (list): Errors of the failed objects are appended here.
+            error_message (str): Error reported for an object that failed.
+
+        Return:
+            dict: The result of each written object keyed by request index.
+        """
+        results = {}
+        session = Session()
+        try:
+            for start in range(0, len(pending), BULK_INSERT_BATCH_SIZE):
+                batch = pending[start : start + BULK_INSERT_BATCH_SIZE]
+                try:
+                    results.update(write_batch(session, batch))
+                    self.commit_changes(session, *data_resource_names)
+                    continue
+                except Exception:
+                    session.rollback()
+
+                for item in batch:
+                    try:
+                        result = write_batch(session, [item])
+                        self.commit_changes(session, *data_resource_names)
+                        results.update(result)
+                    except Exception:
+                        session.rollback()
+                        errors.append({"index": item[0], "errors": [error_message]})
+        finally:
+            session.close()
+
+        return results
 
-    def validate_email(email_address):
-        """Rudimentary email address validator.
+    def get_bulk_items(self, request_obj) -> list:
+        """Read the objects of a bulk request.
 
         Args:
-            email_address (str): Email address string to validate.
+            request_obj (dict): HTTP request object with a JSON array or NDJSON body.
+
         Return:
-            bool: True if the email address is valid, False if not.
+            list: The objects to insert.
         """
-        email_regex = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
-        is_valid = False
+        if request_obj.mimetype == NDJSON:
+            items = []
+            lines = request_obj.get_data(as_text=True).splitlines()
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    raise ApiError(
+                        "Invalid request body.",
+                        400,
+                        [f"Line {line_number} is not valid JSON."],
+                    )
+            return items
 
-        if email_regex.match(email_address):
-            is_valid = True
+        try:
+            items = request_obj.json
+        except Exception:
+            raise ApiError("No request body found.", 400)
 
-        return is_valid
+        if not isinstance(items, list):
+            raise ApiError("Invalid request body.", 400, ["Expected a JSON array."])
 
-    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
-    def get_all_secure(
-        self, data_model, data_resource_name, restricted_fields, offset=0, limit=1
-    ):
-        """Wrapper method for get_all method.
+        return items
+
+    def insert_batch(
+        self, session: object, data_model, data_resource_name: str, batch: list
+    ) -> dict:
+        """Insert a batch of validated objects and their relationships.
+
+        Note:
+            PostgreSQL does not guarantee the order of the rows returned by a
+            multi-row INSERT, so the primary key of each object is drawn from
+            its sequence first and objects are only inserted together once their
+            keys are known. Objects whose key cannot be known in advance are
+            inserted one at a time.
 
         Args:
+            session (object): sqlalchemy session object
             data_model (object): SQLAlchemy ORM model.
             data_resource_name (str): Name of the data resource.
-            offset (int): Pagination offset.
-            limit (int): Result limit.
+            batch (list): Tuples of the request index, the column values and the
+                many to many relationships of each object.
 
         Return:
-            function: The wrapped method.
+            dict: The new primary key of each object keyed by request index.
         """
-        return self.get_all(
-            data_model, data_resource_name, restricted_fields, offset, limit
-        )
+        table = data_model.__table__
+        pk_columns = list(table.primary_key.columns)
+        self.allocate_primary_keys(session, table, [values for _, values, _ in batch])
+
+        # A multi-row INSERT needs the same columns in every row
+        groups = OrderedDict()
+        ids = {}
+        for index, values, _ in batch:
+            if all(column.key in values for column in pk_columns):
+                groups.setdefault(tuple(sorted(values.keys())), []).append(values)
+                pk = [values[column.key] for column in pk_columns]
+            else:
+                insert = table.insert().values(values).returning(*pk_columns)
+                pk = list(session.execute(insert).first())
+
+            ids[index] = pk[0] if len(pk_columns) == 1 else pk
+
+        for items in groups.values():
+            session.execute(table.insert().values(items))
+
+        # Write the many to many relationships of the whole batch at once
+        junction_rows = OrderedDict()
+        for index, _, many_query in batch:
+            for field, values, junc_table in many_query:
+                parent_column = f"{data_resource_name}_id"
+                relationship_column = f"{field}_id"
+                rows = junction_rows.setdefault(junc_table, OrderedDict())
+                for value in values:
+                    rows[(ids[index], value)] = {
+                        parent_column: ids[index],
+                        relationship_column: value,
+                    }
+
+        for junc_table, rows in junction_rows.items():
+            insert = (
+                postgresql.insert(junc_table)
+                .values(list(rows.values()))
+                .on_conflict_do_nothing()
+            )
+            session.execute(insert)
 
-    def get_all(
-        self, data_model, data_resource_name, restricted_fields, offset=0, limit=1
-    ):
-        """Retrieve a paginated list of items.
+        return ids
 
-        Args:
-            data_model (object): SQLAlchemy ORM model.
-            data_resource_name (str): Name of the data resource.
-            offset (int): Pagination offset.
-            limit (int): Result limit.
+    def allocate_primary_keys(self, session: object, table, items: list):
+        """Draw a primary key from the sequence of the table for each object
+        that does not have one yet.
 
-        Return:
-            dict, int: The response object and associated HTTP status code.
-        """
-        session = Session()
-        response = OrderedDict()
-        response[data_resource_name] = []
-        response["links"] = []
-        links = []
+        Note:
+            Only single column primary keys backed by a sequence are drawn,
+            other objects are left as they are.
 
-        try:
-            results = session.query(data_model).limit(limit).offset(offset).all()
-            for row in results:
-                response[data_resource_name].append(
-                    self.build_json_from_object(row, restricted_fields)
-                )
-            row_count = session.query(data_model).count()
-            if row_count > 0:
-                links = self.build_links(data_resource_name, offset, limit, row_count)
-            response["links"] = links
-        except Exception:
-            raise InternalServerError()
+        Args:
+            session (object): sqlalchemy session object
+            table (object): The SQLAlchemy table the objects are inserted into.
+            items (list): The column values of each object, updated in place.
+        """
+        pk_columns = list(table.primary_key.columns)
+        if len(pk_columns) != 1:
+            return
+
+        column = pk_columns[0]
+        missing = [values for values in items if column.key not in values]
+        if len(missing) == 0:
+            return
+
+        table_name = session.get_bind().dialect.identifier_preparer.quote(table.name)
+        sequence = func.pg_get_serial_sequence(table_name, column.name)
+        query = select([func.nextval(sequence)]).select_from(
+            func.generate_series(1, len(missing))
+        )
+        keys = [row[0] for row in session.execute(query)]
+        if None in keys:
+            return
 
-        session.close()
-        return response, 200
+        for values, key in zip(missing, keys):
+            values[column.key] = key
 
     @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
-    def query_secure(
+    def upsert_many_secure(
         self,
         data_model,
         data_resource_name,
-        restricted_fields,
         table_schema,
+        upsert_schema,
         request_obj,
+        validator=None,
     ):
-        """Wrapper method for query."""
-        return self.query(
-            data_model, data_resource_name, restricted_fields, table_schema, request_obj
+        """Wrapper method for upsert many method.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            data_resource_name (str): Name of the data resource.
+            table_schema (dict): The Table Schema object to use for validation.
+            upsert_schema (dict): The upsert method of the API schema.
+            request_obj (dict): HTTP request object.
+            validator (ResourceValidator): The precompiled validator, if any.
+
+        Return:
+            function: The wrapped method.
+        """
+        return self.upsert_many(
+            data_model,
+            data_resource_name,
+            table_schema,
+            upsert_schema,
+            request_obj,
+            validator,
         )
 
-    def query(
+    def upsert_many(
         self,
         data_model,
         data_resource_name,
-        restricted_fields,
         table_schema,
+        upsert_schema,
         request_obj,
+        validator=None,
     ):
-        """Query the data resource."""
-
-        try:
-            request_obj = request_obj.json
-        except Exception:
-            raise ApiError("No request body found.", 400)
-
-        errors = []
-        _ = Schema(table_schema)
-        accepted_fields = []
-        response = OrderedDict()
-        response["results"] = []
-        if validate(table_schema):
-            for field in table_schema["fields"]:
-                if field["name"] not in restricted_fields:
-                    accepted_fields.append(field["name"])
-            for field in request_obj.keys():
-                if field not in accepted_fields:
-                    errors.append(
-                        "Unknown or restricted field '{}' found.".format(field)
-                    )
-            if len(errors) > 0:
-                raise ApiUnhandledError("Invalid request body.", 400, errors)
-            else:
-                try:
-                    session = Session()
-                    results = session.query(data_model).filter_by(**request_obj)
-                    for row in results:
-                        response["results"].append(
-                            self.build_json_from_object(row, restricted_fields)
-                        )
-
-                    if len(response["results"]) == 0:
-                        return {"message": "No matches found"}, 404
-                    else:
-                        return response, 200
-                except Exception:
-                    raise ApiUnhandledError("Failed to create new resource.", 400)
-                finally:
-                    session.close()
-        else:
-            raise SchemaValidationFailure()
-
-        return {"message": "querying data resource"}, 200
+        """Insert new objects or update the existing objects with the same key.
 
-    @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
-    def insert_one_secure(
-        self, data_model, data_resource_name, table_schema, request_obj
-    ):
-        """Wrapper method for insert one method.
+        Note:
+            Objects are matched on the `key` of the upsert method, which defaults
+            to the `primaryKey` of the table schema. Each batch is written with
+            one `INSERT ... ON CONFLICT DO UPDATE` statement.
 
         Args:
             data_model (object): SQLAlchemy ORM model.
             data_resource_name (str): Name of the data resource.
             table_schema (dict): The Table Schema object to use for validation.
+            upsert_schema (dict): The upsert method of the API schema.
             request_obj (dict): HTTP request object.
+            validator (ResourceValidator): The precompiled validator, if any.
 
         Return:
-            function: The wrapped method.
+            dict, int: The response object and associated HTTP status code.
         """
-        return self.insert_one(
-            data_model, data_resource_name, table_schema, request_obj
+        items = self.get_bulk_items(request_obj)
+
+        validator = self.get_validator(table_schema, validator=validator)
+        validator.check_schema()
+
+        key = self.get_upsert_key(data_model, table_schema, upsert_schema)
+        errors = []
+        pending = []
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "errors": ["Item must be an object."]})
+                continue
+
+            values, many_query, item_errors = self.check_insert_fields(
+                data_resource_name, validator, item
+            )
+            for field, _, _ in many_query:
+                item_errors.append(f"Relationship '{field}' cannot be upserted.")
+
+            if len(item_errors) > 0:
+                errors.append({"index": index, "errors": item_errors})
+                continue
+
+            pending.append((index, values))
+
+        def write_batch(session, batch):
+            return self.upsert_batch(session, data_model, key, batch)
+
+        results = self.write_batches(
+            [data_resource_name],
+            pending,
+            write_batch,
+            errors,
+            "Failed to upsert resource.",
         )
 
-    def insert_one(self, data_model, data_resource_name, table_schema, request_obj):
-        """Insert a new object.
+        ids = []
+        inserted = 0
+        updated = 0
+        for index in range(len(items)):
+            id_value, was_inserted = results.get(index, (None, None))
+            ids.append(id_value)
+            if was_inserted is True:
+                inserted += 1
+            elif was_inserted is False:
+                updated += 1
+
+        response = OrderedDict()
+        response["message"] = f"Inserted {inserted} and updated {updated} resources."
+        response["inserted"] = inserted
+        response["updated"] = updated
+        response["ids"] = ids
+        if len(errors) > 0:
+            response["errors"] = sorted(errors, key=lambda error: error["index"])
+
+        if len(results) == 0 and len(items) > 0:
+            response["message"] = "Failed to upsert resources."
+            return response, 400
+
+        return response, 200
+
+    def get_upsert_key(self, data_model, table_schema: dict, upsert_schema: dict):
+        """Find the columns that upserted objects are matched on.
 
         Args:
             data_model (object): SQLAlchemy ORM model.
-            data_resource_name (str): Name of the data resource.
-            table_schema (dict): The Table Schema object to use for validation.
-            request_obj (dict): HTTP request object.
+            table_schema (dict): The Table Schema object of the data resource.
+            upsert_schema (dict): The upsert method of the API schema.
 
         Return:
-            dict, int: The response object and associated HTTP status code.
+            list: The names of the key columns.
         """
-        try:
-            request_obj = request_obj.json
-        except Exception:
-            raise ApiError("No request body found.", 400)
+        key = upsert_schema.get("key", table_schema["primaryKey"])
+        if isinstance(key, str):
+            key = [key]
+
+        table = data_model.__table__
+        primary_key = [column.key for column in table.primary_key.columns]
+        if sorted(key) == sorted(primary_key):
+            return key
+
+        if len(key) == 1 and key[0] in table.columns and table.columns[key[0]].unique:
+            return key
+
+        # ON CONFLICT can only infer full, not partial, unique indexes
+        for index in table.indexes:
+            if (
+                index.unique
+                and index.dialect_options["postgresql"]["where"] is None
+                and sorted(column.key for column in index.columns) == sorted(key)
+            ):
+                return key
+
+        raise ApiUnhandledError(
+            f"Upsert key '{', '.join(key)}' is not a primary or unique key.", 500
+        )
 
-        _ = Schema(table_schema)
-        errors = []
-        accepted_fields = []
+    def upsert_batch(self, session: object, data_model, key: list, batch: list) -> dict:
+        """Upsert a batch of validated objects.
 
-        if not validate(table_schema):
-            raise SchemaValidationFailure()
+        Note:
+            PostgreSQL does not guarantee the order of the rows returned by a
+            multi-row INSERT, so the returned rows are matched to the objects
+            on their key. Objects repeating a key in the same batch are merged
+            in order first, as one statement cannot update a row twice.
 
-        # Check for required fields
-        for field in table_schema["fields"]:
-            accepted_fields.append(field["name"])
+        Args:
+            session (object): sqlalchemy session object
+            data_model (object): SQLAlchemy ORM model.
+            key (list): The names of the columns to match objects on.
+            batch (list): Tuples of the request index and the column values of
+                each object.
 
-            if field["required"] and not field["name"] in request_obj.keys():
-                errors.append(f"Required field '{field['name']}' is missing.")
+        Return:
+            dict: The primary key of each object and whether it was inserted,
+                keyed by request index.
+        """
+        table = data_model.__table__
+        pk_columns = list(table.primary_key.columns)
+        if sorted(key) == sorted(column.key for column in pk_columns):
+            self.allocate_primary_keys(session, table, [values for _, values in batch])
+
+        merged = OrderedDict()
+        groups = OrderedDict()
+        for index, values in batch:
+            # Objects without a full key never conflict, so each gets a statement
+            if any(values.get(column) is None for column in key):
+                groups[(index,)] = [(None, [index], values)]
+                continue
+
+            indexes, merged_values = merged.setdefault(
+                tuple(values[column] for column in key), ([], {})
+            )
+            indexes.append(index)
+            merged_values.update(values)
 
-        valid_fields = []
-        many_query = []
+        for item_key, (indexes, values) in merged.items():
+            groups.setdefault(tuple(sorted(values.keys())), []).append(
+                (item_key, indexes, values)
+            )
 
-        for field in request_obj.keys():
-            if field in accepted_fields:
-                valid_fields.append(field)
-            else:
-                junc_table = JuncHolder.lookup_table(field, data_resource_name)
+        results = {}
+        for items in groups.values():
+            columns = sorted(items[0][2].keys())
+            insert = postgresql.insert(table).values([values for _, _, values in items])
+
+            # Setting the key to itself keeps RETURNING rows when nothing else is set
+            update_columns = [column for column in columns if column not in key]
+            update_columns = update_columns or key
+            insert = insert.on_conflict_do_update(
+                index_elements=key,
+                set_={column: insert.excluded[column] for column in update_columns},
+            )
 
-                if junc_table is not None:
-                    values = request_obj[field]
-                    if not isinstance(values, list):
-                        values = [values]
-                    many_query.append([field, values, junc_table])
-                else:
-                    errors.append(f"Unknown field '{field}' found.")
+            # xmax is only zero for row versions created by an INSERT
+            insert = insert.returning(
+                *pk_columns,
+                *[table.columns[column] for column in key],
+                literal_column("xmax = 0").label("inserted"),
+            )
 
-        if len(errors) > 0:
-            raise ApiError("Invalid request body.", 400, errors)
+            rows = session.execute(insert).fetchall()
+            if len(rows) != len(items):
+                raise ValueError("Upsert returned a different number of rows.")
 
-        try:
-            session = Session()
-            new_object = data_model()
-            for field in valid_fields:
-                value = request_obj[field]
-                setattr(new_object, field, value)
-            session.add(new_object)
-            session.commit()
-            id_value = getattr(new_object, table_schema["primaryKey"])
+            by_key = {item_key: indexes for item_key, indexes, _ in items}
+            for row in rows:
+                if len(items) == 1:
+                    indexes = items[0][1]
+                else:
+                    # Raising retries the batch one object at a time
+                    indexes = by_key[tuple(row[len(pk_columns) : -1])]
 
-            # process the many_query
-            for field, values, table in many_query:
-                self.process_many_query(
-                    session, table, id_value, field, data_resource_name, values
-                )
+                pk = list(row[: len(pk_columns)])
+                id_value = pk[0] if len(pk_columns) == 1 else pk
+                # Later objects with the same key update the row the first one wrote
+                results[indexes[0]] = (id_value, row[-1])
+                for index in indexes[1:]:
+                    results[index] = (id_value, False)
 
-            return {"message": "Successfully added new resource.", "id": id_value}, 201
-        except Exception:
-            raise ApiUnhandledError("Failed to create new resource.", 400)
-        finally:
-            session.close()
+        return results
 
     def process_many_query(
         self,
@@ -353,7 +1897,11 @@ class ResourceHandler:
         data_resource_name: str,
         values: list,
     ):
-        """Iterates over values and adds the items to the junction table.
+        """Adds the items to the junction table in a single statement.
+
+        Note:
+            Relationships that already exist are skipped. The insert runs in the
+            caller's transaction, so the caller has to commit it.
 
         Args:
             session (object): sqlalchemy session object
@@ -365,23 +1913,94 @@ class ResourceHandler:
         parent_column = f"{data_resource_name}_id"
         relationship_column = f"{field}_id"
 
-        for value in values:
-            try:
-                cols = {f"{parent_column}": id_value, f"{relationship_column}": value}
+        rows = [
+            {parent_column: id_value, relationship_column: value}
+            for value in OrderedDict.fromkeys(values)
+        ]
+        if len(rows) == 0:
+            return
 
-                insert = table.insert().values(**cols)
-                session.execute(insert)
-                session.commit()
+        insert = postgresql.insert(table).values(rows).on_conflict_do_nothing()
+        session.execute(insert)
 
-            except Exception as e:
-                # psycopg2.errors.UniqueViolation
-                if e.code == "gkpj":
-                    session.rollback()
-                else:
-                    raise InternalServerError()
+    def get_many_children(
+        self,
+        session: object,
+        table,
+        id_value: int,
+        parent: str,
+        child: str,
+        for_update: bool = False,
+    ) -> list:
+        """Reads the ids of the children related to a parent.
+
+        Args:
+            session (object): sqlalchemy session object
+            table (object): The junction table of the parent and child.
+            id_value (int): Given ID of type parent
+            parent (str): Type of parent
+            child (str): Type of child
+            for_update (bool): Lock the junction rows until the transaction ends.
+
+        Returns:
+            list: The ids of the children.
+        """
+        parent_col = getattr(table.c, f"{parent}_id")
+        child_col = getattr(table.c, f"{child}_id")
+
+        query = select([child_col]).where(parent_col == id_value)
+        if for_update:
+            query = query.with_for_update()
+
+        return [row[0] for row in session.execute(query)]
+
+    def delete_many_children(
+        self,
+        session: object,
+        table,
+        id_value: int,
+        parent: str,
+        child: str,
+        values: list,
+    ):
+        """Removes the items from the junction table in a single statement.
+
+        Note:
+            The delete runs in the caller's transaction, so the caller has to
+            commit it.
+
+        Args:
+            session (object): sqlalchemy session object
+            table (object): The junction table of the parent and child.
+            id_value (int): Given ID of type parent
+            parent (str): Type of parent
+            child (str): Type of child
+            values (list): The ids of the children to remove.
+        """
+        if len(values) == 0:
+            return
+
+        parent_col = getattr(table.c, f"{parent}_id")
+        child_col = getattr(table.c, f"{child}_id")
+        child_ids = literal(list(values), postgresql.ARRAY(child_col.type))
+        session.execute(
+            table.delete().where(
+                and_(parent_col == id_value, child_col == any_(child_ids))
+            )
+        )
 
     @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
-    def get_one_secure(self, id, data_model, data_resource_name, table_schema):
+    def get_one_secure(
+        self,
+        id,
+        data_model,
+        data_resource_name,
+        table_schema,
+        row_serializer=None,
+        if_none_match=None,
+        cache_settings=None,
+        expander=None,
+    ):
         """Wrapper method for get one method.
 
         Args:
@@ -389,13 +2008,36 @@ class ResourceHandler:
             data_model (object): SQLAlchemy ORM model.
             data_resource_name (str): Name of the data resource.
             table_schema (dict): The Table Schema object to use for validation.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+            if_none_match (ETags): Entity tags from the If-None-Match header.
+            cache_settings (dict): How long to cache the response, or None.
+            expander (RelationshipExpander): Relationships to add to each item.
 
         Return:
             function: The wrapped method.
         """
-        return self.get_one(id, data_model, data_resource_name, table_schema)
+        return self.get_one(
+            id,
+            data_model,
+            data_resource_name,
+            table_schema,
+            row_serializer,
+            if_none_match,
+            cache_settings,
+            expander,
+        )
 
-    def get_one(self, id, data_model, data_resource_name, table_schema):
+    def get_one(
+        self,
+        id,
+        data_model,
+        data_resource_name,
+        table_schema,
+        row_serializer=None,
+        if_none_match=None,
+        cache_settings=None,
+        expander=None,
+    ):
         """Retrieve a single object from the data model based on it's primary
         key.
 
@@ -404,25 +2046,61 @@ class ResourceHandler:
             data_model (object): SQLAlchemy ORM model.
             data_resource_name (str): Name of the data resource.
             table_schema (dict): The Table Schema object to use for validation.
+            row_serializer (RowSerializer): The serializer compiled for the resource.
+            if_none_match (ETags): Entity tags from the If-None-Match header.
+            cache_settings (dict): How long to cache the response, or None.
+            expander (RelationshipExpander): Relationships to add to each item.
 
         Return:
-            dict, int: The response object and the HTTP status code.
+            dict, int, dict: The response object, the HTTP status code and the
+                ETag header.
         """
+        # Expanded items can change without the row changing, so skip the cache
+        if cache_settings is not None and expander is None:
+            return self.cached_read(
+                data_resource_name,
+                cache_settings,
+                ("get_one", id),
+                if_none_match,
+                lambda: self.get_one(
+                    id, data_model, data_resource_name, table_schema, row_serializer
+                ),
+                row_serializer,
+            )
+
+        row_serializer = self.get_row_serializer(data_model, [], row_serializer)
+        session = Session()
         try:
             primary_key = table_schema["primaryKey"]
-            session = Session()
-            result = (
-                session.query(data_model)
-                .filter(getattr(data_model, primary_key) == id)
-                .first()
-            )
-            response = self.build_json_from_object(result)
-            return response, 200
+            result = session.execute(
+                row_serializer.select().where(getattr(data_model, primary_key) == id)
+            ).first()
+            if result is None:
+                raise ApiUnhandledError(f"Resource with id '{id}' not found.", 404)
         except Exception:
+            session.close()
             raise ApiUnhandledError(f"Resource with id '{id}' not found.", 404)
+
+        try:
+            if expander is not None:
+                expanded = expander.load(session, [result])
+        except Exception:
+            raise InternalServerError()
         finally:
             session.close()
 
+        if expander is None:
+            etag = row_serializer.etag([result])
+        else:
+            etag = row_serializer.etag([result], expanded)
+        if self.is_not_modified(if_none_match, etag):
+            return self.not_modified(etag)
+
+        item = row_serializer.serialize(result)
+        if expander is not None:
+            expander.attach(item, result, expanded)
+        return item, 200, {"ETag": quote_etag(etag)}
+
     @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
     def get_many_one_secure(self, id: int, parent: str, child: str):
         """Wrapper method for get many method.
@@ -452,17 +2130,7 @@ class ResourceHandler:
         # return {'error': f"relationship '{child}' of '{parent}' not found."}
         try:
             session = Session()
-            parent_col_str = f"{parent}_id"
-            child_col_str = f"{child}_id"
-
-            cols = {parent_col_str: id}
-            query = session.query(join_table).filter_by(**cols).all()
-
-            children = []
-            for row in query:
-                # example - {'programs_id': 2, 'credentials_id': 3}
-                row_dict = row._asdict()
-                children.append(row_dict[child_col_str])
+            children = self.get_many_children(session, join_table, id, parent, child)
 
         except Exception:
             raise InternalServerError()
@@ -484,44 +2152,55 @@ class ResourceHandler:
         Return:
             function: The wrapped method.
         """
-        return self.put_many_one(self, id, parent, child, values)
+        return self.put_many_one(id, parent, child, values)
 
     def put_many_one(self, id: int, parent: str, child: str, values):
         """put data for a many to many relationship of a parent and child.
 
+        Note:
+            Only the relationships that are added or removed are written, and
+            the final set is read back in the same transaction.
+
         Args:
             id (int): Given ID of type parent
             parent (str): Type of parent
             child (str): Type of child
+            values (list or int): list of values to put
         """
         try:
             session = Session()
             junc_table = JuncHolder.lookup_table(parent, child)
 
-            # delete all relations
-            parent_col = getattr(junc_table.c, f"{parent}_id")
-            del_st = junc_table.delete().where(parent_col == id)
-
-            _ = session.execute(del_st)
-
-            # put the items
-            many_query = []
+            if not isinstance(values, list):
+                values = [values]
 
-            if junc_table is not None:
-                if not isinstance(values, list):
-                    values = [values]
-                many_query.append([child, values, junc_table])
+            existing = self.get_many_children(
+                session, junc_table, id, parent, child, for_update=True
+            )
+            wanted = OrderedDict.fromkeys(values)
+            existing_set = set(existing)
+            removed = [value for value in existing if value not in wanted]
+            added = [value for value in wanted if value not in existing_set]
 
-            for field, values, table in many_query:
-                self.process_many_query(session, table, id, field, parent, values)
+            self.delete_many_children(session, junc_table, id, parent, child, removed)
+            self.process_many_query(session, junc_table, id, child, parent, added)
 
+            if len(removed) > 0 or len(added) > 0:
+                children = self.get_many_children(
+                    session, junc_table, id, parent, child
+                )
+                self.commit_changes(session, parent, child)
+            else:
+                children = existing
+                session.rollback()
         except Exception:
+            session.rollback()
             raise InternalServerError()
 
         finally:
             session.close()
 
-        return self.get_many_one(id, parent, child)
+        return {f"{child}": children}, 200
 
     @token_required(ConfigurationFactory.get_config().get_oauth2_provider())
     def patch_many_one_secure(self, id: int, parent: str, child: str, values):
@@ -559,9 +2238,9 @@ class ResourceHandler:
                 many_query.append([child, values, junc_table])
 
             for field, values, table in many_query:
-                # TODO this should only insert when it doesnt already exist
                 self.process_many_query(session, table, id, field, parent, values)
 
+            self.commit_changes(session, parent, child)
         except Exception:
             raise InternalServerError()
 
@@ -580,6 +2259,7 @@ class ResourceHandler:
         restricted_fields,
         request_obj,
         mode="PATCH",
+        validator=None,
     ):
         """Wrapper method for update one method.
 
@@ -588,6 +2268,7 @@ class ResourceHandler:
             data_model (object): SQLAlchemy ORM model.
             data_resource_name (str): Name of the data resource.
             table_schema (dict): The Table Schema object to use for validation.
+            validator (ResourceValidator): The precompiled validator, if any.
 
         Return:
             function: The wrapped method.
@@ -600,6 +2281,7 @@ class ResourceHandler:
             restricted_fields,
             request_obj,
             mode,
+            validator,
         )
 
     def update_one(
@@ -611,6 +2293,7 @@ class ResourceHandler:
         restricted_fields,
         request_obj,
         mode="PATCH",
+        validator=None,
     ):
         """Update a single object from the data model based on it's primary
         key.
@@ -620,6 +2303,7 @@ class ResourceHandler:
             data_model (object): SQLAlchemy ORM model.
             data_resource_name (str): Name of the data resource.
             table_schema (dict): The Table Schema object to use for validation.
+            validator (ResourceValidator): The precompiled validator, if any.
 
         Return:
             dict, int: The response object and the HTTP status code.
@@ -643,17 +2327,19 @@ class ResourceHandler:
         except Exception:
             raise ApiUnhandledError(f"Resource with id '{id}' not found.", 404)
 
-        _ = Schema(table_schema)
+        validator = self.get_validator(table_schema, restricted_fields, validator)
         errors = []
-        accepted_fields = []
-        if validate(table_schema):
-            for field in table_schema["fields"]:
-                accepted_fields.append(field["name"])
-            for field in request_obj.keys():
-                if field not in accepted_fields:
+        values = {}
+        if validator.schema_valid:
+            for field, value in request_obj.items():
+                if field not in validator.accepted_fields:
                     errors.append(f"Unknown field '{field}' found.")
-                elif field in restricted_fields:
+                elif field in validator.restricted_fields:
                     errors.append(f"Cannot update restricted field '{field}'.")
+                else:
+                    values[field], error = validator.cast(field, value)
+                    if error is not None:
+                        errors.append(error)
         else:
             session.close()
             raise ApiError("Data schema validation error.", 400)
@@ -663,21 +2349,21 @@ class ResourceHandler:
             raise ApiError("Invalid request body.", 400, errors)
 
         if mode == "PATCH":
-            for key, value in request_obj.items():
+            for key, value in values.items():
                 setattr(data_obj, key, value)
-            session.commit()
+            self.commit_changes(session, data_resource_name)
         elif mode == "PUT":
-            for field in table_schema["fields"]:
-                if field["required"] and field["name"] not in request_obj.keys():
-                    errors.append(f"Required field '{field['name']}' is missing.")
+            for field in validator.required_fields:
+                if field not in request_obj:
+                    errors.append(f"Required field '{field}' is missing.")
 
             if len(errors) > 0:
                 session.close()
                 raise ApiError("Invalid request body.", 400, errors)
 
-            for key, value in request_obj.items():
+            for key, value in values.items():
                 setattr(data_obj, key, value)
-            session.commit()
+            self.commit_changes(session, data_resource_name)
 
         session.close()
         return {"message": f"Successfully updated resource '{id}'."}, 201
@@ -724,16 +2410,8 @@ class ResourceHandler:
             if not isinstance(values, list):
                 values = [values]
 
-            for value in values:
-                parent_col = getattr(junc_table.c, f"{parent}_id")
-                child_col = getattr(junc_table.c, f"{child}_id")
-                del_st = junc_table.delete().where(
-                    and_(parent_col == id, child_col == value)
-                )
-
-                res = session.execute(del_st)
-                print(res)
-                session.commit()
+            self.delete_many_children(session, junc_table, id, parent, child, values)
+            self.commit_changes(session, parent, child)
 
         except Exception:
             session.rollback()
@@ -1,13 +1,80 @@
 from data_resource_api.app.utils.config import ConfigFunctions
 from data_resource_api.app.utils.db_handler import DBHandler
-from data_resource_api.app.utils.descriptor import Descriptor, DescriptorsLoader
+from data_resource_api.app.utils.descriptor import (
+    ChangedDescriptorsFromDirectory,
+    Descriptor,
+)
 from data_resource_api.config import ConfigurationFactory
 from data_resource_api.db import Base
 from data_resource_api.factories import ORMFactory
 from data_resource_api.logging import LogFactory
+from data_resource_api.monitor.descriptor_watcher import DescriptorWatcher
+
+
+class DataStore:
+    """The data objects of a data manager, by name.
+
+    Note:
+        Names are compared case insensitively, so they are stored lower cased
+        and looked up in constant time.
+
+    Args:
+        name_attr (str): Attribute of the data objects holding their name.
+    """
+
+    def __init__(self, name_attr: str):
+        self.name_attr = name_attr
+        self.data_objects = []
+        self.indexes = {}
+
+    @staticmethod
+    def normalize(data_name: str) -> str:
+        return data_name.lower()
+
+    def append(self, data_object):
+        """Store a data object, replacing the one with the same name."""
+        data_name = self.normalize(getattr(data_object, self.name_attr))
+        index = self.indexes.get(data_name)
+        if index is None:
+            self.indexes[data_name] = len(self.data_objects)
+            self.data_objects.append(data_object)
+        else:
+            self.data_objects[index] = data_object
+
+    def get(self, data_name: str):
+        """Find a data object by name.
+
+        Args:
+            data_name (str): Name of the data object.
+
+        Returns:
+            object: The data object, or None if it is not stored.
+        """
+        index = self.indexes.get(self.normalize(data_name))
+        if index is None:
+            return None
+        return self.data_objects[index]
+
+    def index(self, data_name: str) -> int:
+        return self.indexes.get(self.normalize(data_name), -1)
+
+    def __contains__(self, data_name: str) -> bool:
+        return self.normalize(data_name) in self.indexes
+
+    def __getitem__(self, index: int):
+        return self.data_objects[index]
+
+    def __iter__(self):
+        return iter(self.data_objects)
+
+    def __len__(self) -> int:
+        return len(self.data_objects)
 
 
 class DataManager:
+    # Attribute of the data objects they are stored by
+    data_store_key = None
+
     def __init__(self, logger_name: str = "data-manager", **kwargs):
         base = kwargs.get("base", Base)
         use_local_dirs = kwargs.get("use_local_dirs", True)
@@ -28,8 +95,14 @@ class DataManager:
             )
 
         self.custom_descriptors = descriptors
+        self.descriptor_files = ChangedDescriptorsFromDirectory(
+            self.descriptor_directories
+        )
+        self.descriptor_watcher = DescriptorWatcher(self.descriptor_directories)
+        # Descriptors given as dicts are loaded until they load successfully
+        self.pending_descriptors = [Descriptor(d) for d in descriptors]
 
-        self.data_store = []
+        self.data_store = DataStore(self.data_store_key)
 
     def monitor_data_models(self):
         """Wraps monitor data models for changes.
@@ -37,22 +110,49 @@ class DataManager:
         Note:
             This method wraps the core worker for this class. This method has the
             responsbility of iterating through a directory to find schema files to load.
+            Only the files that changed since the last check are loaded, and the
+            descriptors that failed to load are loaded again.
         """
         self.logger.info("Checking data models")
 
-        # TODO this should wrap in a try except and tell us if any of the
-        # properties will raise errors
-        descriptors = DescriptorsLoader(
-            self.descriptor_directories, self.custom_descriptors
-        )
-        for descriptor in descriptors.iter_descriptors():
+        changed_descriptors = list(self.descriptor_files.iter_files())
+        pending_descriptors = self.pending_descriptors
+        self.pending_descriptors = []
+
+        for descriptor in changed_descriptors + pending_descriptors:
             self.process_descriptor(descriptor)
+        self.apply_changes()
+
+        for descriptor in changed_descriptors:
+            if not self.descriptor_is_current(descriptor):
+                self.descriptor_files.forget(descriptor.file_name)
+        for descriptor in pending_descriptors:
+            if not self.descriptor_is_current(descriptor):
+                self.pending_descriptors.append(descriptor)
 
         self.logger.info("Completed check of data models")
 
+    def wait_for_changes(self, sleep_time: float):
+        """Sleep until the next check, or until a descriptor file changes.
+
+        Args:
+            sleep_time (float): Seconds between checks.
+        """
+        self.descriptor_watcher.start()
+        if self.descriptor_watcher.wait(sleep_time):
+            self.logger.info("Descriptor files changed.")
+
     def process_descriptor(self, descriptor: Descriptor):
         raise NotImplementedError("Please implement this method")
 
+    def apply_changes(self):
+        """Apply the changes of all the descriptors processed in a check."""
+        pass
+
+    def descriptor_is_current(self, descriptor: Descriptor) -> bool:
+        """Whether the data store holds the current version of a descriptor."""
+        raise NotImplementedError("Please implement this method")
+
     def _process_descriptor(self, descriptor: Descriptor, descriptor_exists: bool):
         """Operate on a schema dict for data model changes.
 
@@ -84,25 +184,17 @@ class DataManager:
         raise NotImplementedError("Please implement this method")
 
     # Data store functions
-    def data_exists(self, data_name: str, attribute_name: str):
-        for data_object in self.data_store:
-            if getattr(data_object, attribute_name).lower() == data_name.lower():
-                return True
-        return False
-
-    def data_changed(
-        self, data_name: str, checksum: str, name_attr: str, checksum_attr: str
-    ):
-        for data_object in self.data_store:
-            same_name = getattr(data_object, name_attr).lower() == data_name.lower()
-            same_checksum = getattr(data_object, checksum_attr) == checksum
-            if same_name and not same_checksum:
-                return True
-        return False
-
-    def get_data_index(self, data_name: str, name_attr: str):
-        index = -1
-        for idx, data_object in enumerate(self.data_store):
-            if getattr(data_object, name_attr) == data_name.lower():
-                return idx
-        return index
+    def data_exists(self, data_name: str) -> bool:
+        return data_name in self.data_store
+
+    def data_changed(self, data_name: str, checksum: str, checksum_attr: str) -> bool:
+        data_object = self.data_store.get(data_name)
+        if data_object is None:
+            return False
+        return getattr(data_object, checksum_attr) != checksum
+
+    def get_data(self, data_name: str):
+        return self.data_store.get(data_name)
+
+    def get_data_index(self, data_name: str) -> int:
+        return self.data_store.index(data_name)
@@ -5,11 +5,11 @@ models for the data resource under management. It is designed to run in
 it's own thread, monitoring data resources on a regular interval.
 """
 from threading import Thread
-from time import sleep
+from time import perf_counter, sleep
 
 from data_resource_api.app.data_managers.data_manager import DataManager
 from data_resource_api.app.utils.descriptor import Descriptor
-from data_resource_api.db import Checksum, Session
+from data_resource_api.db import Checksum, ModelSnapshot, Session, engine
 from data_resource_api.utils import exponential_backoff
 
 
@@ -37,9 +37,16 @@ class DataModelManagerSync(DataManager):
     changes and update the tables as needed.
     """
 
+    data_store_key = "descriptor_file_name"
+
     def __init__(self, **kwargs):
         super().__init__("data-model-manager", **kwargs)
-        self.data_store: DataModelDescriptor = []
+        # The descriptors to migrate for at the end of a check, and whether
+        # their tables are created
+        self.pending_migrations = []
+        # The first revision compares every table, so that the database
+        # matches all the models once before only changes are compared
+        self.all_tables_compared = False
 
     # Core functions
 
@@ -59,6 +66,8 @@ class DataModelManagerSync(DataManager):
         self.db.get_migrations_from_db_and_save_locally()
         self.load_models_from_db()
         self.db.upgrade()
+        # Compile the models the API workers start with
+        self.db.save_model_snapshot()
 
         while True:
             run_fn()
@@ -67,7 +76,7 @@ class DataModelManagerSync(DataManager):
                     self.config.get_sleep_interval()
                 )
             )
-            sleep(self.config.get_sleep_interval())
+            self.wait_for_changes(self.config.get_sleep_interval())
 
     def initalize_base_models(self):
         self.logger.info("Initalizing base models...")
@@ -121,8 +130,19 @@ class DataModelManagerSync(DataManager):
             finally:
                 session.close()
 
+        if db_active:
+            self.initialize_model_snapshots()
+
         self.logger.info("Base models initalized.")
 
+    def initialize_model_snapshots(self):
+        # The initial migration predates the model snapshots, so their table
+        # is created separately
+        try:
+            ModelSnapshot.__table__.create(engine, checkfirst=True)
+        except Exception:
+            self.logger.exception("Error creating the model snapshots table.")
+
     def load_models_from_db(self) -> None:
         # Getting all remote json
         remote_descriptors = self.db.get_stored_descriptors()
@@ -140,6 +160,116 @@ class DataModelManagerSync(DataManager):
         model_exists = self.data_model_exists(descriptor.file_name)
         self._process_descriptor(descriptor, model_exists)
 
+    def apply_changes(self):
+        """Migrate the database for all the changed descriptors at once.
+
+        Note:
+            Generating a revision compares tables with the database, so the
+            changes of a check are generated as one revision and applied with
+            one upgrade. After the first revision, only the changed tables and
+            the tables related to them are compared. If that fails, each
+            descriptor is migrated on its own, so one that cannot be migrated
+            does not hold back the others.
+        """
+        pending_migrations = self.pending_migrations
+        self.pending_migrations = []
+        if len(pending_migrations) == 0:
+            return
+
+        table_names = None
+        if self.all_tables_compared:
+            table_names = [d.table_name for d, _ in pending_migrations]
+        migrated = self.migrate(pending_migrations, table_names)
+        if migrated or len(pending_migrations) == 1:
+            return
+
+        self.logger.info("Migrating the data models one at a time.")
+        for descriptor, create_table in pending_migrations:
+            self.migrate([(descriptor, create_table)], [descriptor.table_name])
+
+    def migrate(self, pending_migrations: list, table_names: list = None) -> bool:
+        """Generate and apply one revision for some changed descriptors.
+
+        Note:
+            The checksums are saved together, and the models are only marked
+            current if all of this succeeded. A revision that failed to apply
+            is discarded, as another cannot be generated until the database
+            is at the head revision.
+
+        Args:
+            pending_migrations (list): The descriptors to migrate for, and
+                whether their tables are created.
+            table_names (list): Names of the tables to compare with the
+                database, or None to compare every table.
+
+        Returns:
+            bool: False if the revision could not be generated or applied.
+        """
+        created = []
+        updated = []
+        for descriptor, create_table in pending_migrations:
+            if create_table:
+                created.append(descriptor.table_name)
+            else:
+                updated.append(descriptor.table_name)
+
+        message = "; ".join(
+            f"{action} table {', '.join(names)}"
+            for action, names in (("Create", created), ("Update", updated))
+            if len(names) > 0
+        )
+
+        revision = None
+        upgraded = False
+        try:
+            start_time = perf_counter()
+            revision = self.db.revision(None, message=message, table_names=table_names)
+            revision_time = perf_counter()
+            self.db.upgrade()
+            upgraded = True
+            upgrade_time = perf_counter()
+            saved = self.db.save_model_checksums(
+                [
+                    (d.table_name, d.get_checksum(), d.descriptor)
+                    for d, _ in pending_migrations
+                ]
+            )
+            end_time = perf_counter()
+        except Exception:
+            self.logger.exception("Error migrating data models")
+            if not upgraded:
+                self.db.discard_revision(revision)
+            return upgraded
+
+        self.logger.info(
+            "Migrated {} data model(s) in {:.2f}s (revision {:.2f}s, "
+            "upgrade {:.2f}s, checksums {:.2f}s).".format(
+                len(pending_migrations),
+                end_time - start_time,
+                revision_time - start_time,
+                upgrade_time - revision_time,
+                end_time - upgrade_time,
+            )
+        )
+        self.all_tables_compared = True
+        if not saved:
+            return True
+
+        # store metadata for descriptors locally
+        for descriptor, create_table in pending_migrations:
+            if create_table:
+                self.store_data_model(descriptor)
+            else:
+                data_model = self.get_data_model(descriptor.file_name)
+                data_model.model_checksum = descriptor.get_checksum()
+        return True
+
+    def descriptor_is_current(self, descriptor: Descriptor) -> bool:
+        # A model is only stored once its migration succeeded
+        return self.data_model_exists(descriptor.file_name) and not (
+            self.data_model_changed(descriptor.file_name, descriptor.get_checksum())
+        )
+
     def data_model_does_exist(self, descriptor: Descriptor):
         try:
             descriptor_file_name = descriptor.file_name
@@ -160,28 +290,14 @@ class DataModelManagerSync(DataManager):
     def update_data_model(self, descriptor: Descriptor):
         try:
             descriptor_file_name = descriptor.file_name
-            table_name = descriptor.table_name
-            table_schema = descriptor.table_schema
-            api_schema = descriptor.api_schema
-            model_checksum = descriptor.get_checksum()
 
             self.logger.info(f"{descriptor_file_name}: Found changed.")
 
-            # Get the index for this descriptor within our local metadata
-            data_model_index = self.get_data_model_index(descriptor_file_name)
-
             # Create the sql alchemy orm
-            self.orm_factory.create_orm_from_dict(table_schema, table_name, api_schema)
-
-            # Something needs to be modified
-            self.db.revision(table_name, create_table=False)
-            self.db.upgrade()
-            self.db.update_model_checksum(
-                table_name, model_checksum, descriptor.descriptor
-            )
+            self.create_orm(descriptor)
 
-            # store metadata for descriptor locally
-            self.data_store[data_model_index].model_checksum = model_checksum
+            # Something needs to be modified, along with the other changes
+            self.pending_migrations.append((descriptor, False))
         except Exception:
             self.logger.exception("Error checking data model")
 
@@ -193,8 +309,6 @@ class DataModelManagerSync(DataManager):
 
             self.logger.info(f"{descriptor_file_name}: Unseen before now.")
 
-            self.load_model_to_data_store(descriptor)
-
             # get the databases checksum value
             stored_checksum = self.db.get_model_checksum(table_name)
 
@@ -204,18 +318,24 @@ class DataModelManagerSync(DataManager):
                 stored_checksum is None
                 or stored_checksum.model_checksum != model_checksum
             ):
-                # perform a revision
-                self.db.revision(table_name)
-                self.db.upgrade()
-                self.db.add_model_checksum(
-                    table_name, model_checksum, descriptor.descriptor
-                )
+                # The model is stored once its table is migrated, so a failed
+                # migration is tried again on the next check
+                self.create_orm(descriptor)
+                # perform a revision along with the other changes
+                self.pending_migrations.append((descriptor, True))
+            else:
+                self.load_model_to_data_store(descriptor)
         except Exception:
             self.logger.exception("Error checking data resource")
 
     # Data store functions
     def load_model_to_data_store(self, descriptor):
         """Adds descriptor to data store AND loads SQL Alchemy model."""
+        self.store_data_model(descriptor)
+        self.create_orm(descriptor)
+
+    def store_data_model(self, descriptor):
+        """Adds descriptor to data store."""
         # Create the metadata store for descriptor
         data_model_descriptor = DataModelDescriptor(
             descriptor.file_name, descriptor.table_name, descriptor.get_checksum()
@@ -224,9 +344,14 @@ class DataModelManagerSync(DataManager):
         # Store the metadata for descriptor locally
         self.data_store.append(data_model_descriptor)
 
-        # create SqlAlchemy ORM models
-        _ = self.orm_factory.create_orm_from_dict(
-            descriptor.table_schema, descriptor.table_name, descriptor.api_schema
+    def create_orm(self, descriptor):
+        """Loads the SQL Alchemy model of a descriptor."""
+        return self.orm_factory.create_orm_from_dict(
+            descriptor.table_schema,
+            descriptor.table_name,
+            descriptor.api_schema,
+            descriptor.indexes,
+            enforce_unique=descriptor.enforce_unique,
         )
 
     def data_model_exists(self, descriptor_file_name):
@@ -239,7 +364,7 @@ class DataModelManagerSync(DataManager):
         Returns:
             bool: True if the data model exists. False if not.
         """
-        return self.data_exists(descriptor_file_name, "descriptor_file_name")
+        return self.data_exists(descriptor_file_name)
 
     def data_model_changed(self, descriptor_file_name, checksum):
         """Checks if the medata for a data model has been changed.
@@ -251,9 +376,18 @@ class DataModelManagerSync(DataManager):
         Returns:
             bool: True if the data model has been changed. False if not.
         """
-        return self.data_changed(
-            descriptor_file_name, checksum, "descriptor_file_name", "model_checksum"
-        )
+        return self.data_changed(descriptor_file_name, checksum, "model_checksum")
+
+    def get_data_model(self, descriptor_file_name):
+        """Retrieves the metadata stored for a data model.
+
+        Args:
+            descriptor_file_name (str): Name of the schema file on disk.
+
+        Returns:
+            DataModelDescriptor: The metadata, or None if not found.
+        """
+        return self.get_data(descriptor_file_name)
 
     def get_data_model_index(self, descriptor_file_name):
         """Checks if the medata for a data model has been changed.
@@ -264,7 +398,7 @@ class DataModelManagerSync(DataManager):
         Returns:
             int: Index of the schema stored in memory, or -1 if not found.
         """
-        return self.get_data_index(descriptor_file_name, "descriptor_file_name")
+        return self.get_data_index(descriptor_file_name)
 
 
 class DataModelManager(Thread, DataModelManagerSync):
@@ -5,12 +5,19 @@ It is responsible for creating the Flask application that sits at the
 front of the data resource.
 """
 from threading import Thread
-from time import sleep
+from time import perf_counter, sleep
 
+from data_resource_api.api import CompiledResource
 from data_resource_api.app.data_managers.data_manager import DataManager
 from data_resource_api.app.utils.descriptor import Descriptor
 from data_resource_api.app.utils.exception_handler import handle_errors
 from data_resource_api.app.utils.json_converter import safe_json_dumps
+from data_resource_api.app.utils.model_changes import ModelChangeListener
+from data_resource_api.app.utils.resource_validator import (
+    ResourceValidator,
+    validate_table_schema,
+)
+from data_resource_api.app.utils.row_serializer import RowSerializer
 from data_resource_api.db import Base, Checksum, Session
 from data_resource_api.factories import DataResourceFactory
 from data_resource_api.utils import exponential_backoff
@@ -27,18 +34,25 @@ class DataResource:
         table_name (str): The name of the datastore.
         table_schema (dict): The schema of the table for validation and generation.
         api_object (object): The API object generated by the data resource manager.
+        relationships_object (object): The API object serving the relationships
+            of the data resource.
         datastore_object (object): The database ORM model generated by the data resource manager.
+        row_serializer (object): The row serializer compiled for the ORM model.
+        validator (object): The request validator compiled for the table schema.
     """
 
     def __init__(self):
         self.data_resource_name = None
         self.data_resource_methods = None
         self.data_resource_object = None
+        self.relationships_object = None
         self.data_model_name = None
         self.data_model_schema = None
         self.data_model_object = None
         self.checksum = None
         self.model_checksum = None
+        self.row_serializer = None
+        self.validator = None
 
 
 class AvailableServicesResource(Resource):
@@ -62,19 +76,23 @@ class DataResourceManagerSync(DataManager):
     """Data Resource Manager.
 
     Attributes:
-        data_resource (list): A collection of all data resources managed by the data resouce manager.
+        data_store (DataStore): The data resources under management, by name.
         app_config (object): The application configuration object.
     """
 
+    data_store_key = "data_resource_name"
+
     def __init__(self, **kwargs):
         super().__init__("data-resource-manager", **kwargs)
 
-        self.data_store: DataResource = []
-
         self.app = None
         self.api = None
         self.available_services = AvailableServicesResource()
         self.data_resource_factory = DataResourceFactory()
+        self.model_listener = ModelChangeListener(self.descriptor_watcher.changed)
+        # The data models compiled by the Data Model Manager, by table name,
+        # while the data resources are first loaded
+        self.compiled_models = {}
 
     # Core functions
     def run(self, test_mode: bool = False):
@@ -85,17 +103,122 @@ class DataResourceManagerSync(DataManager):
             self.logger.debug(f"Base metadata: {list(Base.metadata.tables.keys())}")
             self.monitor_data_models()
 
+        self.load_model_snapshot()
+        run_fn()
+        self.compiled_models = {}
+
         if test_mode:
-            run_fn()
             return
 
+        self.model_listener.start()
         while True:
-            run_fn()
+            if self.model_listener.listening:
+                # The Data Model Manager reports the models it migrated, so the
+                # descriptor files only need to be checked without it
+                self.reload_changed_models()
+                self.logger.info("Data Resource Manager Waiting for changes...")
+                # Bounded, so the loop never outlives the listener it relies on
+                self.descriptor_watcher.wait(self.config.get_sleep_interval())
+                continue
+
             sleep_time = self.config.get_sleep_interval()
             self.logger.info(
                 f"Data Resource Manager Sleeping for {sleep_time} seconds..."
             )
-            sleep(sleep_time)
+            self.wait_for_changes(sleep_time)
+            if not self.model_listener.listening:
+                run_fn()
+
+    def load_model_snapshot(self):
+        """Load the data models compiled by the Data Model Manager.
+
+        Note:
+            A compiled data model is only used for the descriptor with the
+            same checksum, so the descriptors loaded by this worker still
+            decide which data resources it serves.
+        """
+        start_time = perf_counter()
+        self.compiled_models = self.db.get_model_snapshot() or {}
+        self.logger.info(
+            "Loaded {} compiled data model(s) in {:.2f}s.".format(
+                len(self.compiled_models), perf_counter() - start_time
+            )
+        )
+
+    def get_model_state(self, descriptor: Descriptor, checksum: str):
+        """Find whether the table schema of a descriptor is valid, the metadata
+        of its fields and the checksum stored for its data model.
+
+        Args:
+            descriptor (Descriptor): The descriptor of the data resource.
+            checksum (str): Computed MD5 checksum of the descriptor.
+
+        Returns:
+            bool, dict, str: Whether the table schema is valid, the metadata
+                of its fields if it was compiled, and the checksum stored for
+                the data model if it exists.
+        """
+        table_name = descriptor.table_name
+        compiled_model = self.compiled_models.get(table_name)
+        if compiled_model is not None and compiled_model["checksum"] == checksum:
+            return (
+                compiled_model["schema_valid"],
+                compiled_model["fields"],
+                compiled_model["model_checksum"],
+            )
+
+        schema_valid = validate_table_schema(descriptor.table_schema)
+        stored_checksum = self.db.get_model_checksum(table_name)
+        if stored_checksum is None:
+            return schema_valid, None, None
+
+        return schema_valid, None, stored_checksum.model_checksum
+
+    def reload_changed_models(self):
+        """Reload the data resources of the data models changed elsewhere.
+
+        Note:
+            The descriptors are read from the checksums table, where the Data
+            Model Manager stores them once their tables are migrated. If some
+            changes may have been missed, the stored checksums are compared
+            with the data models this worker serves, so models migrated while
+            it was not listening are loaded too.
+        """
+        table_names = self.model_listener.take_changes()
+        if table_names is None:
+            table_names = self.get_missed_changes()
+
+        descriptors = []
+        for table_name in sorted(table_names):
+            checksum = self.db.get_model_checksum(table_name)
+            if checksum is not None and checksum.descriptor_json:
+                descriptors.append(checksum.descriptor_json)
+
+        for descriptor_json in descriptors:
+            descriptor = Descriptor(descriptor_json)
+            self.logger.info(f"Reloading data model '{descriptor.table_name}'.")
+            self.process_descriptor(descriptor)
+
+    def get_missed_changes(self) -> set:
+        """Find the data models stored at a checksum this worker does not serve.
+
+        Returns:
+            set: Names of the tables of the data models, including the ones
+                this worker does not serve yet.
+        """
+        served = {
+            data_resource.data_model_name: data_resource.checksum
+            for data_resource in self.data_store
+        }
+        checksums = self.db.get_model_checksums()
+        if checksums is None:
+            return set(served)
+
+        return {
+            table_name
+            for table_name, checksum in checksums.items()
+            if served.get(table_name) != checksum
+        }
 
     def wait_for_db(self):
         db_active = False
@@ -157,7 +280,11 @@ class DataResourceManagerSync(DataManager):
 
         @self.api.representation("application/json")
         def output_json(data, code, headers=None):
-            resp = make_response(safe_json_dumps(data), code)
+            # A 304 must not have a body, so skip serializing it entirely
+            if code == 304:
+                resp = make_response("", code)
+            else:
+                resp = make_response(safe_json_dumps(data), code)
             resp.headers.extend(headers or {})
             return resp
 
@@ -167,6 +294,12 @@ class DataResourceManagerSync(DataManager):
         model_exists = self.data_resource_exists(descriptor.data_resource_name)
         self._process_descriptor(descriptor, model_exists)
 
+    def descriptor_is_current(self, descriptor: Descriptor) -> bool:
+        data_resource_name = descriptor.data_resource_name
+        return self.data_resource_exists(data_resource_name) and not (
+            self.data_resource_changed(data_resource_name, descriptor.get_checksum())
+        )
+
     def data_model_does_exist(self, descriptor: Descriptor):
         try:
             descriptor_file_name = descriptor.file_name
@@ -184,24 +317,33 @@ class DataResourceManagerSync(DataManager):
             # determine if api changed
             # model = self.db.get_model_checksum(table_name) # TODO what
             # did this used to call?
-            data_resource_index = self.get_data_resource_index(data_resource_name)
             if self.data_resource_changed(data_resource_name, data_resource_checksum):
-                data_resource = self.data_store[data_resource_index]
+                data_resource = self.get_data_resource(data_resource_name)
                 data_resource.checksum = data_resource_checksum
                 data_resource.data_resource_methods = api_schema
                 data_resource.data_model_name = table_name
                 data_resource.data_model_schema = table_schema
+                schema_valid, fields, model_checksum = self.get_model_state(
+                    descriptor, data_resource_checksum
+                )
                 data_resource.data_model_object = self.orm_factory.create_orm_from_dict(
-                    table_schema, table_name, api_schema
+                    table_schema,
+                    table_name,
+                    api_schema,
+                    descriptor.indexes,
+                    schema_valid,
+                    descriptor.enforce_unique,
                 )
-                data_resource.model_checksum = self.db.get_model_checksum(table_name)
-                data_resource.data_resource_object.data_model = (
-                    data_resource.data_model_object
+                data_resource.model_checksum = model_checksum
+                data_resource.row_serializer = self.compile_row_serializer(
+                    data_resource.data_model_object, restricted_fields
                 )
-                data_resource.data_resource_object.table_schema = table_schema
-                data_resource.data_resource_object.api_schema = api_schema
-                data_resource.data_resource_object.restricted_fields = restricted_fields
-                self.data_store[data_resource_index] = data_resource
+                data_resource.validator = ResourceValidator(
+                    table_schema, restricted_fields, schema_valid, fields
+                )
+                compiled = self.compile_resource(data_resource, descriptor)
+                data_resource.data_resource_object.load(compiled)
+                data_resource.relationships_object.load(compiled)
         except Exception:
             self.logger.exception("Error checking data resource")
 
@@ -226,23 +368,73 @@ class DataResourceManagerSync(DataManager):
             data_resource.data_resource_methods = api_schema
             data_resource.data_model_name = table_name
             data_resource.data_model_schema = table_schema
-            data_resource.data_model_object = self.orm_factory.create_orm_from_dict(
-                table_schema, table_name, api_schema
+            schema_valid, fields, model_checksum = self.get_model_state(
+                descriptor, data_resource_checksum
             )
-            data_resource.model_checksum = self.db.get_model_checksum(table_name)
-            data_resource.data_resource_object = self.data_resource_factory.create_api_from_dict(
+            data_resource.data_model_object = self.orm_factory.create_orm_from_dict(
+                table_schema,
+                table_name,
                 api_schema,
+                descriptor.indexes,
+                schema_valid,
+                descriptor.enforce_unique,
+            )
+            data_resource.model_checksum = model_checksum
+            data_resource.row_serializer = self.compile_row_serializer(
+                data_resource.data_model_object, restricted_fields
+            )
+            data_resource.validator = ResourceValidator(
+                table_schema, restricted_fields, schema_valid, fields
+            )
+            (
+                data_resource.data_resource_object,
+                data_resource.relationships_object,
+            ) = self.data_resource_factory.create_api_from_dict(
+                self.compile_resource(data_resource, descriptor),
                 data_resource_name,
                 table_name,
                 self.api,
-                data_resource.data_model_object,
-                table_schema,
-                restricted_fields,
             )
             self.data_store.append(data_resource)
         except Exception:
             self.logger.exception("Error checking data resource")
 
+    def compile_resource(
+        self, data_resource: DataResource, descriptor: Descriptor
+    ) -> CompiledResource:
+        """Collect the state compiled for a data resource into one object.
+
+        Args:
+            data_resource (DataResource): The data resource compiled from the
+                descriptor.
+            descriptor (Descriptor): The descriptor of the data resource.
+
+        Returns:
+            CompiledResource: The state its API resource serves requests with.
+        """
+        return CompiledResource(
+            data_resource.data_model_object,
+            descriptor.table_schema,
+            descriptor.api_schema,
+            descriptor.restricted_fields,
+            data_resource.row_serializer,
+            data_resource.validator,
+        )
+
+    def compile_row_serializer(self, data_model, restricted_fields):
+        """Compile the serializer used to read rows of a data model.
+
+        Args:
+            data_model (object): SQLAlchemy ORM model.
+            restricted_fields (list): Fields that must not be returned.
+
+        Returns:
+            RowSerializer: The serializer, or None if the data model failed to load.
+        """
+        if data_model is None:
+            return None
+        return RowSerializer(data_model, restricted_fields)
+
     # Data store functions
     def data_resource_exists(self, data_resource_name):
         """Checks if a data resource is already registered with the data
@@ -254,7 +446,7 @@ class DataResourceManagerSync(DataManager):
         Returns:
             bool: True if the data resource exists. False if not.
         """
-        return self.data_exists(data_resource_name, "data_resource_name")
+        return self.data_exists(data_resource_name)
 
     def data_resource_changed(self, data_resource_name, checksum):
         """Checks if the medata for a data model has been changed.
@@ -266,9 +458,18 @@ class DataResourceManagerSync(DataManager):
         Returns:
             bool: True if the data resource has been changed. False if not.
         """
-        return self.data_changed(
-            data_resource_name, checksum, "data_resource_name", "checksum"
-        )
+        return self.data_changed(data_resource_name, checksum, "checksum")
+
+    def get_data_resource(self, data_resource_name):
+        """Retrieves a specific data resource.
+
+        Args:
+           data_resource_name (str): Name of the data resource.
+
+        Returns:
+            DataResource: The data resource, or None if not found.
+        """
+        return self.get_data(data_resource_name)
 
     def get_data_resource_index(self, data_resource_name):
         """Retrieves the index of a specific data resource in the data
@@ -280,7 +481,7 @@ class DataResourceManagerSync(DataManager):
         Returns:
             int: Index of the data resource stored in memory, or -1 if not found.
         """
-        return self.get_data_index(data_resource_name, "data_resource_name")
+        return self.get_data_index(data_resource_name)
 
 
 class DataResourceManager(Thread, DataResourceManagerSync):
@@ -1,7 +1,12 @@
 import os
 
 from alembic import command
-from data_resource_api.db import Checksum, Migrations, Session
+from data_resource_api.app.utils.model_changes import notify_model_change
+from data_resource_api.app.utils.model_snapshot import (
+    SNAPSHOT_VERSION,
+    compile_snapshot,
+)
+from data_resource_api.db import Checksum, Migrations, ModelSnapshot, Session
 from data_resource_api.logging import LogFactory
 
 
@@ -17,6 +22,9 @@ class DBHandler:
     ):
         """Adds a new checksum for a data model.
 
+        Note:
+            The API workers are notified of the new model when it commits.
+
         Args:
             table_name (str): Name of the table to add the checksum.
             checksum (str): Checksum value.
@@ -28,6 +36,7 @@ class DBHandler:
             checksum.model_checksum = model_checksum
             checksum.descriptor_json = descriptor_json
             session.add(checksum)
+            notify_model_change(session, table_name)
             session.commit()
         except Exception:
             logger.exception("Error adding checksum")
@@ -39,6 +48,9 @@ class DBHandler:
     ):
         """Updates a checksum for a data model.
 
+        Note:
+            The API workers are notified of the changed model when it commits.
+
         Args:
             table_name (str): Name of the table to add the checksum.
             checksum (str): Checksum value.
@@ -56,6 +68,7 @@ class DBHandler:
             )
             checksum.model_checksum = model_checksum
             checksum.descriptor_json = descriptor_json
+            notify_model_change(session, table_name)
             session.commit()
             updated = True
         except Exception:
@@ -64,6 +77,125 @@ class DBHandler:
             session.close()
         return updated
 
+    def save_model_checksums(self, checksums: list) -> bool:
+        """Adds or updates the checksums of several data models at once.
+
+        Note:
+            The checksums are saved in one transaction, with the snapshot of
+            the data models, and the API workers are notified of every model
+            when it commits.
+
+        Args:
+            checksums (list): The table name, checksum value and descriptor of
+                each data model.
+
+        Returns:
+            bool: True if the checksums were saved. False otherwise.
+        """
+        session = Session()
+        saved = False
+        try:
+            for table_name, model_checksum, descriptor_json in checksums:
+                checksum = (
+                    session.query(Checksum)
+                    .filter(Checksum.data_resource == table_name)
+                    .first()
+                )
+                if checksum is None:
+                    checksum = Checksum()
+                    checksum.data_resource = table_name
+                    session.add(checksum)
+                checksum.model_checksum = model_checksum
+                checksum.descriptor_json = descriptor_json
+                notify_model_change(session, table_name)
+            self._save_model_snapshot(session)
+            session.commit()
+            saved = True
+        except Exception:
+            logger.exception("Error saving checksums")
+        finally:
+            session.close()
+        return saved
+
+    def save_model_snapshot(self) -> bool:
+        """Compiles the stored data models into a new snapshot.
+
+        Returns:
+            bool: True if the snapshot was saved. False otherwise.
+        """
+        session = Session()
+        saved = False
+        try:
+            self._save_model_snapshot(session)
+            session.commit()
+            saved = True
+        except Exception:
+            logger.exception("Error saving model snapshot")
+        finally:
+            session.close()
+        return saved
+
+    def _save_model_snapshot(self, session):
+        """Compiles the data models stored in a session into a new snapshot.
+
+        Note:
+            The snapshot is only an optimization for the API workers, so it is
+            saved in a savepoint, and failing to save it does not roll back
+            the rest of the session.
+
+        Args:
+            session (object): SQLAlchemy session.
+        """
+        try:
+            with session.begin_nested():
+                previous = (
+                    session.query(ModelSnapshot)
+                    .filter(ModelSnapshot.version == SNAPSHOT_VERSION)
+                    .first()
+                )
+                snapshot_checksum, models = compile_snapshot(
+                    [
+                        (row.data_resource, row.model_checksum, row.descriptor_json)
+                        for row in session.query(Checksum).all()
+                        if row.descriptor_json
+                    ],
+                    previous.models if previous is not None else None,
+                )
+                if previous is not None and previous.checksum == snapshot_checksum:
+                    return
+
+                session.query(ModelSnapshot).delete()
+                snapshot = ModelSnapshot()
+                snapshot.checksum = snapshot_checksum
+                snapshot.version = SNAPSHOT_VERSION
+                snapshot.models = models
+                session.add(snapshot)
+        except Exception:
+            logger.exception("Error compiling model snapshot")
+
+    def get_model_snapshot(self) -> dict:
+        """Retrieves the data models compiled in the latest snapshot.
+
+        Returns:
+            dict: The compiled data models by table name, or None if there is
+                no snapshot of this version.
+        """
+        session = Session()
+        models = None
+        try:
+            snapshot = (
+                session.query(ModelSnapshot)
+                .filter(ModelSnapshot.version == SNAPSHOT_VERSION)
+                .first()
+            )
+            if snapshot is not None:
+                models = {model["table_name"]: model for model in snapshot.models}
+        except Exception:
+            logger.exception("Error retrieving model snapshot")
+        finally:
+            session.close()
+        return models
+
     def get_model_checksum(self, table_name: str):
         """Retrieves a checksum by table name.
 
@@ -87,6 +219,23 @@ class DBHandler:
             session.close()
         return checksum
 
+    def get_model_checksums(self) -> dict:
+        """Retrieves the checksums of every data model.
+
+        Returns:
+            dict: The checksum value by table name, or None on an error.
+        """
+        session = Session()
+        checksums = None
+        try:
+            query = session.query(Checksum.data_resource, Checksum.model_checksum)
+            checksums = {table_name: checksum for table_name, checksum in query}
+        except Exception:
+            logger.exception("Error retrieving checksums")
+        finally:
+            session.close()
+        return checksums
+
     def get_stored_descriptors(self) -> list:
         """Gets stored json models from database.
 
@@ -140,20 +289,70 @@ class DBHandler:
         else:
             logger.info("No migrations to run...")
 
-    def revision(self, table_name: str, create_table: bool = True):
+    def revision(
+        self,
+        table_name: str,
+        create_table: bool = True,
+        message: str = None,
+        table_names: list = None,
+    ):
         """Create a new migration.
 
         This method runs the Alembic revision command programmatically.
+
+        Args:
+            table_name (str): Name of the table the migration is for.
+            create_table (bool): Whether the migration creates the table.
+            message (str): Message of the migration, instead of one made from
+                the table name.
+            table_names (list): Names of the changed tables. Only these and
+                the tables related to them are compared with the database.
+                Every table is compared if this is None.
+
+        Returns:
+            Script: The migration created, or None if there is none.
         """
         alembic_config, migrations_dir = self.config.get_alembic_config()
         if migrations_dir is not None:
-            if create_table:
+            if table_names is not None:
+                alembic_config.attributes["revision_tables"] = set(table_names)
+            if message is None and create_table:
                 message = "Create table {}".format(table_name)
-            else:
+            elif message is None:
                 message = "Update table {}".format(table_name)
-            command.revision(config=alembic_config, message=message, autogenerate=True)
+            return command.revision(
+                config=alembic_config, message=message, autogenerate=True
+            )
         else:
             logger.info("No migrations to run...")
+            return None
+
+    def discard_revision(self, script) -> None:
+        """Delete a migration that failed to upgrade.
+
+        Note:
+            A migration that is not applied stays the head revision, and no
+            other revision can be generated until the database is at the head.
+
+        Args:
+            script (Script): The migration returned by `revision()`, or None.
+        """
+        if script is None:
+            return
+
+        file_name = os.path.basename(script.path)
+        logger.info(f"Discarding migration '{file_name}'...")
+        if os.path.exists(script.path):
+            os.remove(script.path)
+
+        session = Session()
+        try:
+            session.query(Migrations).filter(Migrations.file_name == file_name).delete()
+            session.commit()
+        except Exception:
+            logger.exception("Failed to delete migration file from DB.")
+        finally:
+            session.close()
 
     @staticmethod
     def save_migration(file_name: str, file_blob) -> None:
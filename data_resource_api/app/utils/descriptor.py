@@ -57,6 +57,62 @@ class DescriptorsFromDirectory:
         yield from sorted([f for f in os.listdir(directory) if f.endswith(".json")])
 
 
+class ChangedDescriptorsFromDirectory(DescriptorsFromDirectory):
+    """Yields the descriptors of a directory that changed since the last time.
+
+    Note:
+        A file is only read again when its modification time or size changed,
+        and only parsed again when its content changed.
+
+    Use iter_files() to yield Descriptor objects.
+    """
+
+    def __init__(self, directories: list):
+        super().__init__(directories)
+        self.file_states = {}
+
+    def _get_from_dir(self):
+        found = set()
+        for directory in self.directories:
+            self._check_if_path_exists(directory)
+            for file_name in self._get_files_from_dir(directory):
+                file_path = os.path.join(directory, file_name)
+                found.add(file_path)
+                try:
+                    if not self._file_changed(file_path):
+                        continue
+                    yield DescriptorFromFile(directory, file_name).get_descriptor_obj()
+                except (Exception, ValueError, RuntimeError) as e:
+                    logger.error(e)
+                    continue
+
+        # A file that is removed and added again is loaded again
+        for file_path in set(self.file_states) - found:
+            del self.file_states[file_path]
+
+    def _file_changed(self, file_path: str) -> bool:
+        stat = os.stat(file_path)
+        state = self.file_states.get(file_path)
+        if state is not None and state[:2] == (stat.st_mtime_ns, stat.st_size):
+            return False
+
+        with open(file_path, "rb") as fh:
+            content_hash = md5(fh.read()).hexdigest()  # nosec
+
+        self.file_states[file_path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+        return state is None or state[2] != content_hash
+
+    def forget(self, file_name: str):
+        """Yield a file again the next time, even if it does not change.
+
+        Args:
+            file_name (str): Name of the file in its directory.
+        """
+        for file_path in list(self.file_states):
+            if os.path.basename(file_path) == file_name:
+                del self.file_states[file_path]
+
+
 class DescriptorFromFile:
     """Helper class that handles creating a descriptor when given a file
     path."""
@@ -140,6 +196,14 @@ class Descriptor:
         except KeyError:
             return []
 
+    @property
+    def indexes(self):
+        return self._descriptor["datastore"].get("indexes", [])
+
+    @property
+    def enforce_unique(self):
+        return bool(self._descriptor["datastore"].get("enforce_unique", False))
+
     @property
     def descriptor(self):
         return self._descriptor
@@ -149,8 +213,16 @@ class Descriptor:
         return self._file_name
 
     def get_checksum(self) -> str:
+        model = self.table_schema
+        # Only descriptors that declare indexes or enforce unique fields hash
+        # them, so the checksums stored for existing models stay the same
+        if len(self.indexes) > 0 or self.enforce_unique:
+            model = {"schema": self.table_schema, "indexes": self.indexes}
+        if self.enforce_unique:
+            model["enforce_unique"] = True
+
         model_checksum = md5(  # nosec
-            json.dumps(self.table_schema, sort_keys=True).encode("utf-8")
+            json.dumps(model, sort_keys=True).encode("utf-8")
         ).hexdigest()
 
         return model_checksum
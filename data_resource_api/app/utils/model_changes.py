@@ -0,0 +1,94 @@
+"""Model Changes.
+
+Tells the API workers which data models the Data Model Manager migrated, with
+PostgreSQL LISTEN/NOTIFY, so they reload them as soon as the tables match.
+"""
+
+from threading import Event, Lock
+
+from data_resource_api.app.utils.notify_listener import NotifyListener
+from sqlalchemy import text
+
+
+CHANNEL = "data_model_changes"
+
+
+def notify_model_change(session, table_name: str):
+    """Queue a model change notification in the session's transaction.
+
+    Note:
+        PostgreSQL delivers the notification to every listening worker when
+        the transaction commits, and drops it if it rolls back.
+
+    Args:
+        session (object): SQLAlchemy session.
+        table_name (str): Name of the table of the data model.
+    """
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": CHANNEL, "payload": table_name},
+    )
+
+
+class ModelChangeListener:
+    """Collects the names of the data models changed by other processes.
+
+    Note:
+        Notifications sent while the listener is not connected are lost, so
+        after connecting it reports that every model may have changed.
+
+    Args:
+        changed (Event): Set whenever a model or the connection changes.
+    """
+
+    def __init__(self, changed: Event = None):
+        self.lock = Lock()
+        self.changed = changed if changed is not None else Event()
+        self.listening = False
+        self.missed = True
+        self.table_names = set()
+        self.listener = NotifyListener(
+            CHANNEL, self.add_change, self.set_listening, "model-change-listener"
+        )
+
+    def start(self):
+        """Start listening for changes in the background."""
+        self.listener.start()
+
+    def add_change(self, table_name: str):
+        with self.lock:
+            self.table_names.add(table_name)
+        self.changed.set()
+
+    def set_listening(self, listening: bool):
+        with self.lock:
+            self.listening = listening
+            if listening:
+                self.missed = True
+        self.changed.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Sleep until a model changes or the connection changes.
+
+        Args:
+            timeout (float): Longest time to sleep, in seconds, or None.
+
+        Returns:
+            bool: True if woken before the timeout.
+        """
+        changed = self.changed.wait(timeout)
+        self.changed.clear()
+        return changed
+
+    def take_changes(self):
+        """Return the models changed since the last call.
+
+        Returns:
+            set: Names of the tables of the changed models, or None if any
+                model may have changed.
+        """
+        with self.lock:
+            table_names = None if self.missed else self.table_names
+            self.table_names = set()
+            self.missed = False
+        return table_names
@@ -0,0 +1,82 @@
+"""Model Snapshot.
+
+Compiles the data models the Data Model Manager stored into one snapshot,
+so the API workers starting up can skip validating each table schema,
+compiling the metadata of its fields and looking up each checksum.
+"""
+
+import json
+from hashlib import md5
+
+from data_resource_api.app.utils.descriptor import Descriptor
+from data_resource_api.app.utils.resource_validator import (
+    compile_fields,
+    validate_table_schema,
+)
+
+
+# Workers only use snapshots of their own version
+SNAPSHOT_VERSION = 2
+
+
+def compile_model(
+    table_name: str, model_checksum: str, descriptor_json: dict, previous=None
+) -> dict:
+    """Compile a stored data model.
+
+    Args:
+        table_name (str): Name of the table of the data model.
+        model_checksum (str): Checksum stored for the data model.
+        descriptor_json (dict): Descriptor stored for the data model.
+        previous (dict): The data model compiled in the last snapshot, if any.
+
+    Returns:
+        dict: The compiled data model.
+    """
+    descriptor = Descriptor(descriptor_json)
+    checksum = descriptor.get_checksum()
+
+    # The checksum covers the table schema, so its validation is reused
+    if previous is not None and previous["checksum"] == checksum:
+        schema_valid = previous["schema_valid"]
+    else:
+        schema_valid = validate_table_schema(descriptor.table_schema)
+
+    return {
+        "table_name": table_name,
+        "checksum": checksum,
+        "model_checksum": model_checksum,
+        "schema_valid": schema_valid,
+        "fields": compile_fields(descriptor.table_schema),
+    }
+
+
+def compile_snapshot(checksums: list, previous_models: list = None):
+    """Compile the stored data models.
+
+    Args:
+        checksums (list): The table name, checksum value and descriptor of
+            each data model.
+        previous_models (list): The data models compiled in the last snapshot
+            of this version, if any.
+
+    Returns:
+        str, list: Checksum of the compiled data models, and the data models
+            sorted by table name.
+    """
+    previous = {model["table_name"]: model for model in previous_models or []}
+
+    models = [
+        compile_model(
+            table_name, model_checksum, descriptor_json, previous.get(table_name)
+        )
+        for table_name, model_checksum, descriptor_json in sorted(
+            checksums, key=lambda checksum: checksum[0]
+        )
+    ]
+
+    snapshot_checksum = md5(  # nosec
+        json.dumps(models, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    return snapshot_checksum, models
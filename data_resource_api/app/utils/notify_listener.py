@@ -0,0 +1,97 @@
+"""Notify Listener.
+
+Listens on a PostgreSQL LISTEN/NOTIFY channel in a background thread and
+hands the payload of each notification to a callback.
+"""
+
+import select
+from threading import Thread
+from time import sleep
+
+from data_resource_api.db import engine
+from data_resource_api.logging import LogFactory
+from data_resource_api.utils import exponential_backoff
+
+
+logger = LogFactory.get_console_logger("notify-listener")
+
+LISTEN_TIMEOUT = 5
+MAX_RETRY_TIME = 60
+
+# A listener only reads, so a connection dropped without being closed (by a
+# NAT, a load balancer or a failover) is only noticed by TCP keepalives
+KEEPALIVES = {
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 3,
+}
+
+
+def connect():
+    """Open a connection of its own to listen on, with TCP keepalives.
+
+    Returns:
+        object: The DBAPI connection.
+    """
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    cparams.update(KEEPALIVES)
+    return engine.dialect.dbapi.connect(*cargs, **cparams)
+
+
+class NotifyListener(Thread):
+    """Calls back with the notifications sent on a channel by other processes.
+
+    Note:
+        Notifications sent while the listener is not connected are lost, so
+        `on_listening` is called with False whenever the connection drops and
+        with True once the listener is connected again.
+
+    Args:
+        channel (str): The channel to listen on.
+        on_notify (function): Called with the payload of each notification.
+        on_listening (function): Called with whether the listener is connected.
+        name (str): Name of the thread.
+    """
+
+    def __init__(self, channel: str, on_notify, on_listening, name: str = None):
+        Thread.__init__(self, name=name, daemon=True)
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_listening = on_listening
+        self.retry_time = exponential_backoff(1, 1.5)
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception(f"Lost the connection listening on '{self.channel}'.")
+
+            self.on_listening(False)
+            sleep(min(self.retry_time(), MAX_RETRY_TIME))
+
+    def listen(self):
+        connection = connect()
+        try:
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {self.channel}")
+
+            # Connected, so the next connection lost is retried quickly again
+            self.retry_time = exponential_backoff(1, 1.5)
+            self.on_listening(True)
+            logger.info(f"Listening on '{self.channel}'.")
+
+            while True:
+                ready, _, _ = select.select([connection], [], [], LISTEN_TIMEOUT)
+                if not ready:
+                    continue
+
+                # Raises once keepalives find the connection dead
+                connection.poll()
+                while connection.notifies:
+                    notification = connection.notifies.pop(0)
+                    self.on_notify(notification.payload)
+        finally:
+            connection.close()
@@ -0,0 +1,350 @@
+"""Query Compiler.
+
+Compiles the body of a `/query` request into SQLAlchemy Core clauses.
+
+A condition maps field names to values. A value is either matched for
+equality or is an object of operators, e.g. `{"program_fees": {"lt": 100}}`.
+The conditions of the same object must all match. `and` and `or` take lists
+of conditions.
+
+The bodies of `/aggregate` requests take the same conditions, and group the
+matching rows by `group_by` fields to compute `aggregates` over each group.
+"""
+
+from data_resource_api.app.utils.exception_handler import ApiError
+from sqlalchemy import Float, and_, cast, false, func, or_
+
+
+QUERY_DEFAULT_LIMIT = 20
+QUERY_MAX_LIMIT = 1000
+
+# Fields of these types hold JSON, so an object value is matched as a whole
+JSON_TYPES = ("object", "array")
+
+COMPARISONS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+}
+OPERATORS = tuple(COMPARISONS) + ("in", "startswith", "null")
+OPTIONS = ("sort", "limit", "after")
+JUNCTIONS = {"and": and_, "or": or_}
+
+AGGREGATE_OPTIONS = ("group_by", "aggregates")
+AGGREGATE_MAX_GROUPS = 1000
+NUMERIC_TYPES = ("integer", "number", "year", "yearmonth", "duration")
+ORDERED_TYPES = NUMERIC_TYPES + ("string", "date", "time", "datetime")
+# The averages of integers are numeric, which JSON has no type for
+AGGREGATES = {
+    "count": (None, func.count),
+    "sum": (NUMERIC_TYPES, func.sum),
+    "avg": (NUMERIC_TYPES, lambda column: cast(func.avg(column), Float)),
+    "min": (ORDERED_TYPES, func.min),
+    "max": (ORDERED_TYPES, func.max),
+}
+
+
+class QueryCompiler:
+    """Compiles `/query` bodies for a data resource.
+
+    Note:
+        Values are cast to the type of their field in the table schema, so the
+        clauses bind typed parameters that PostgreSQL can match to indexes.
+
+        `sort`, `limit`, `after`, `and` and `or` are only treated as keywords
+        when the resource has no field with the same name.
+
+    Args:
+        data_model (object): SQLAlchemy ORM model.
+        validator (ResourceValidator): The validator of the resource.
+
+    Attributes:
+        errors (list): Problems found in the body so far.
+    """
+
+    def __init__(self, data_model, validator):
+        self.columns = data_model.__table__.columns
+        self.validator = validator
+        self.errors = []
+
+    def split(self, body: dict, option_names: tuple = OPTIONS):
+        """Separate the condition of a body from its options.
+
+        Args:
+            body (dict): The request body.
+            option_names (tuple): The keys that are options rather than fields.
+
+        Returns:
+            dict, dict: The condition and the options.
+        """
+        condition = {}
+        options = {}
+        for key, value in body.items():
+            if key in option_names and key not in self.validator.accepted_fields:
+                options[key] = value
+            else:
+                condition[key] = value
+        return condition, options
+
+    def check_errors(self):
+        """Raise if the body had any problems."""
+        if len(self.errors) > 0:
+            raise ApiError("Invalid request body.", 400, self.errors)
+
+    def where(self, condition: dict):
+        """Compile a condition.
+
+        Args:
+            condition (dict): Field names and junctions mapped to their values.
+
+        Returns:
+            object: A SQLAlchemy clause.
+        """
+        if not isinstance(condition, dict):
+            self.errors.append("Conditions must be objects.")
+            return false()
+
+        clauses = []
+        for key, value in condition.items():
+            if key in JUNCTIONS and key not in self.validator.accepted_fields:
+                clauses.append(self.junction(key, value))
+            elif self.is_field(key):
+                clauses.append(self.field_condition(key, value))
+        return and_(*clauses)
+
+    def junction(self, junction: str, conditions: list):
+        if not isinstance(conditions, list) or len(conditions) == 0:
+            self.errors.append(f"'{junction}' must be a non-empty list of conditions.")
+            return false()
+        return JUNCTIONS[junction](*[self.where(condition) for condition in conditions])
+
+    def is_field(self, field: str) -> bool:
+        if (
+            field not in self.validator.accepted_fields
+            or field in self.validator.restricted_fields
+        ):
+            self.errors.append(f"Unknown or restricted field '{field}' found.")
+            return False
+        return True
+
+    def field_condition(self, field: str, value):
+        column = self.columns[field]
+        if not isinstance(value, dict) or self.validator.types[field] in JSON_TYPES:
+            return column == self.cast(field, value)
+
+        clauses = []
+        for operator, operand in value.items():
+            if operator in COMPARISONS:
+                clauses.append(COMPARISONS[operator](column, self.cast(field, operand)))
+            elif operator == "in":
+                clauses.append(self.is_in(field, column, operand))
+            elif operator == "startswith":
+                clauses.append(self.starts_with(field, column, operand))
+            elif operator == "null":
+                clauses.append(self.is_null(field, column, operand))
+            else:
+                self.errors.append(
+                    f"Unknown operator '{operator}' on field '{field}'. "
+                    f"Use one of: {', '.join(OPERATORS)}."
+                )
+        return and_(*clauses)
+
+    def is_in(self, field: str, column, values):
+        if not isinstance(values, list):
+            self.errors.append(f"Operator 'in' on field '{field}' needs a list.")
+            return false()
+        if len(values) == 0:
+            return false()
+        return column.in_([self.cast(field, value) for value in values])
+
+    def starts_with(self, field: str, column, prefix):
+        if self.validator.types[field] != "string" or not isinstance(prefix, str):
+            self.errors.append(
+                f"Operator 'startswith' on field '{field}' needs a string field "
+                "and value."
+            )
+            return false()
+        return column.startswith(prefix, autoescape=True)
+
+    def is_null(self, field: str, column, is_null):
+        if not isinstance(is_null, bool):
+            self.errors.append(f"Operator 'null' on field '{field}' needs a boolean.")
+            return false()
+        return column.is_(None) if is_null else column.isnot(None)
+
+    def cast(self, field: str, value):
+        value, error = self.validator.cast(field, value)
+        if error is not None:
+            self.errors.append(error)
+        return value
+
+    def sort(self, keys: list, primary_key_columns: list) -> list:
+        """Compile sort keys.
+
+        Note:
+            The primary key is appended so that the order is total, which
+            cursors need to resume after the last row of a page.
+
+        Args:
+            keys (list): Field names, each prefixed with `-` to sort descending.
+            primary_key_columns (list): The primary key columns of the resource.
+
+        Returns:
+            list: The columns to sort by, each paired with whether it descends.
+        """
+        if not isinstance(keys, list):
+            keys = [keys]
+
+        sort_keys = []
+        for key in keys:
+            if not isinstance(key, str):
+                self.errors.append("Sort keys must be field names.")
+                continue
+            descending = key.startswith("-")
+            field = key[1:] if descending else key
+            if self.is_field(field):
+                sort_keys.append((self.columns[field], descending))
+
+        sorted_fields = set(column.key for column, _ in sort_keys)
+        for column in primary_key_columns:
+            if column.key not in sorted_fields:
+                sort_keys.append((column, False))
+        return sort_keys
+
+    def order_by(self, sort_keys: list) -> list:
+        """Build the ORDER BY clauses of some sort keys.
+
+        Note:
+            NULLs sort last in both directions, which `after()` relies on.
+        """
+        return [
+            (column.desc() if descending else column.asc()).nullslast()
+            for column, descending in sort_keys
+        ]
+
+    def after(self, sort_keys: list, values: list):
+        """Build a condition matching the rows that sort after some values.
+
+        Args:
+            sort_keys (list): The sort keys returned by `sort()`.
+            values (list): The values of the sort keys in the last row read.
+
+        Returns:
+            object: A SQLAlchemy clause.
+        """
+        clauses = []
+        for idx, ((column, descending), value) in enumerate(zip(sort_keys, values)):
+            if value is None:
+                # NULLs sort last, so nothing sorts after them in this column
+                continue
+            greater = column < value if descending else column > value
+            equal = [
+                self.equals(previous, previous_value)
+                for (previous, _), previous_value in zip(sort_keys[:idx], values[:idx])
+            ]
+            clauses.append(and_(*equal, or_(greater, column.is_(None))))
+
+        if len(clauses) == 0:
+            return false()
+        return or_(*clauses)
+
+    def equals(self, column, value):
+        return column.is_(None) if value is None else column == value
+
+    def limit(self, limit) -> int:
+        """Validate the page size of a query.
+
+        Args:
+            limit (int): The requested page size, or None for the default.
+
+        Returns:
+            int: The page size, at most `QUERY_MAX_LIMIT`.
+        """
+        if limit is None:
+            return min(QUERY_DEFAULT_LIMIT, QUERY_MAX_LIMIT)
+        if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+            self.errors.append("'limit' must be a positive integer.")
+            return QUERY_DEFAULT_LIMIT
+        return min(limit, QUERY_MAX_LIMIT)
+
+    def group_by(self, fields: list) -> list:
+        """Compile the fields an aggregation groups rows by.
+
+        Args:
+            fields (list): Field names.
+
+        Returns:
+            list: The columns to group by.
+        """
+        if not isinstance(fields, list):
+            fields = [fields]
+
+        columns = []
+        for field in fields:
+            if not isinstance(field, str):
+                self.errors.append("'group_by' must list field names.")
+            elif self.is_field(field) and field not in [c.key for c in columns]:
+                columns.append(self.columns[field])
+        return columns
+
+    def aggregates(self, aggregates: dict, group_fields: list) -> list:
+        """Compile the aggregates computed over each group of rows.
+
+        Args:
+            aggregates (dict): Names to return the aggregates under, mapped to
+                one function and the field it is computed over, e.g.
+                `{"total_fees": {"sum": "program_fees"}}`. `count` also takes
+                `*` to count rows. Defaults to counting rows as `count`.
+            group_fields (list): Names of the fields rows are grouped by.
+
+        Returns:
+            list: The aggregate expressions, each labeled with its name.
+        """
+        if aggregates is None:
+            aggregates = {"count": {"count": "*"}}
+        if not isinstance(aggregates, dict) or len(aggregates) == 0:
+            self.errors.append("'aggregates' must be a non-empty object.")
+            return []
+
+        expressions = []
+        for name, aggregate in aggregates.items():
+            if name in group_fields:
+                self.errors.append(
+                    f"Aggregate '{name}' has the name of a grouped field."
+                )
+                continue
+            if not isinstance(aggregate, dict) or len(aggregate) != 1:
+                self.errors.append(
+                    f"Aggregate '{name}' must map one function to a field."
+                )
+                continue
+
+            function, field = next(iter(aggregate.items()))
+            expression = self.aggregate(name, function, field)
+            if expression is not None:
+                expressions.append(expression.label(name))
+        return expressions
+
+    def aggregate(self, name: str, function: str, field):
+        if function not in AGGREGATES:
+            self.errors.append(
+                f"Unknown function '{function}' in aggregate '{name}'. "
+                f"Use one of: {', '.join(AGGREGATES)}."
+            )
+            return None
+
+        types, aggregate = AGGREGATES[function]
+        if function == "count" and field == "*":
+            return func.count()
+        if not isinstance(field, str) or not self.is_field(field):
+            return None
+        if types is not None and self.validator.types[field] not in types:
+            self.errors.append(
+                f"Function '{function}' in aggregate '{name}' cannot be computed "
+                f"over field '{field}'."
+            )
+            return None
+        return aggregate(self.columns[field])
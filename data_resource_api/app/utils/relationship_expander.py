@@ -0,0 +1,197 @@
+"""Relationship Expander.
+
+Loads the related items of a whole page of rows with one query per
+relationship, so clients can read them with `?expand=` instead of making
+one request per row.
+"""
+
+from collections import OrderedDict
+
+from data_resource_api.app.utils.exception_handler import ApiError
+from data_resource_api.app.utils.junc_holder import JuncHolder
+from data_resource_api.app.utils.resource_holder import ResourceHolder
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+
+class Expansion:
+    """A single relationship to expand.
+
+    Attributes:
+        name (str): The name the related items are returned under.
+        key_index (int): Position in a row of the value the items are found by.
+        default (any): Returned for rows with no related items.
+        query (function): Builds the query for a list of keys. Every row it
+            returns holds the key followed by the related item.
+        value (function): Converts a row of the query to the returned item.
+    """
+
+    __slots__ = ["name", "key_index", "default", "query", "value"]
+
+    def __init__(self, name, key_index, default, query, value):
+        self.name = name
+        self.key_index = key_index
+        self.default = default
+        self.query = query
+        self.value = value
+
+
+class RelationshipExpander:
+    """The relationships requested with `?expand=` on a data resource.
+
+    Note:
+        A name is expanded as a many to many relationship when the resource has
+        an enabled custom `get` route for it, and returns the child ids like
+        `GET /<parent>/<id>/<child>` does. A foreign key field is replaced by
+        the item it references, serialized by that item's own data resource.
+
+    Attributes:
+        names (tuple): Names of the relationships to expand.
+        secured (bool): Whether one of them can only be read with a token.
+    """
+
+    def __init__(
+        self, data_model, data_resource_name, api_schema, row_serializer, names
+    ):
+        self.names = tuple(OrderedDict.fromkeys(names))
+        self.secured = False
+        self.expansions = []
+
+        column_keys = [column.key for column in row_serializer.columns]
+        for name in self.names:
+            junction_table = JuncHolder.lookup_table(data_resource_name, name)
+            custom_get = self.get_custom_method(api_schema, data_resource_name, name)
+
+            if junction_table is not None and custom_get is not None:
+                expansion = self.many_to_many(
+                    junction_table, data_resource_name, name, column_keys
+                )
+                self.secured = self.secured or custom_get.get("secured", True)
+            elif name in row_serializer.column_names:
+                expansion, secured = self.foreign_key(data_model, name, column_keys)
+                self.secured = self.secured or secured
+            else:
+                expansion = None
+
+            if expansion is None:
+                raise ApiError(f"Cannot expand '{name}'.", 400)
+
+            self.expansions.append(expansion)
+
+    def get_custom_method(self, api_schema: dict, parent: str, child: str):
+        """Find the enabled custom `get` route of a relationship.
+
+        Args:
+            api_schema (dict): The API schema of the parent resource.
+            parent (str): Name of the parent resource.
+            child (str): Name of the child resource.
+
+        Returns:
+            dict: The settings of the route, or None if it is not enabled.
+        """
+        routes = (f"/{parent}/{child}", f"/{child}/{parent}")
+        for custom_resource in api_schema.get("custom", []):
+            if custom_resource["resource"] not in routes:
+                continue
+            for method in custom_resource["methods"]:
+                get = method.get("get", {})
+                if get.get("enabled", False):
+                    return get
+        return None
+
+    def many_to_many(self, table, parent: str, child: str, column_keys: list):
+        parent_column = getattr(table.c, f"{parent}_id")
+        child_column = getattr(table.c, f"{child}_id")
+        referenced_key = next(iter(parent_column.foreign_keys)).column.key
+        if referenced_key not in column_keys:
+            return None
+
+        def query(keys):
+            return (
+                select(
+                    [
+                        parent_column,
+                        func.array_agg(aggregate_order_by(child_column, child_column)),
+                    ]
+                )
+                .where(parent_column.in_(keys))
+                .group_by(parent_column)
+            )
+
+        return Expansion(
+            child, column_keys.index(referenced_key), [], query, lambda row: row[1]
+        )
+
+    def foreign_key(self, data_model, name: str, column_keys: list):
+        column = data_model.__table__.columns[name]
+        if len(column.foreign_keys) == 0:
+            return None, False
+
+        referenced_column = next(iter(column.foreign_keys)).column
+        resource = ResourceHolder.lookup_resource(referenced_column.table.name)
+        if resource is None:
+            return None, False
+
+        compiled = resource.compiled
+        if compiled.row_serializer is None or not compiled.api_schema["get"]["enabled"]:
+            return None, False
+
+        child_serializer = compiled.row_serializer
+
+        def query(keys):
+            columns = child_serializer.columns + [child_serializer.version_column]
+            # Labeled so it is not merged with the same column in the item
+            key = referenced_column.label("expand_key")
+            return select([key] + columns).where(referenced_column.in_(keys))
+
+        expansion = Expansion(
+            name,
+            column_keys.index(name),
+            None,
+            query,
+            lambda row: child_serializer.serialize(row[1:]),
+        )
+        return expansion, compiled.api_schema["get"]["secured"]
+
+    def load(self, session, rows: list) -> dict:
+        """Read the related items of some rows.
+
+        Args:
+            session (object): SQLAlchemy session.
+            rows (list): Rows selected with the resource's `RowSerializer`.
+
+        Returns:
+            dict: The related items of each relationship, by key.
+        """
+        loaded = {}
+        for expansion in self.expansions:
+            keys = list(
+                OrderedDict.fromkeys(
+                    row[expansion.key_index]
+                    for row in rows
+                    if row[expansion.key_index] is not None
+                )
+            )
+            items = {}
+            if len(keys) > 0:
+                for row in session.execute(expansion.query(keys)):
+                    items[row[0]] = expansion.value(row)
+            loaded[expansion.name] = items
+        return loaded
+
+    def attach(self, item: dict, row, loaded: dict) -> dict:
+        """Add the related items of a row to its response dict.
+
+        Args:
+            item (dict): The serialized row.
+            row (tuple): The row the item was serialized from.
+            loaded (dict): The related items returned by `load()`.
+
+        Returns:
+            dict: The same item.
+        """
+        for expansion in self.expansions:
+            item[expansion.name] = loaded[expansion.name].get(
+                row[expansion.key_index], expansion.default
+            )
+        return item
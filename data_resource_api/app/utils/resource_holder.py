@@ -0,0 +1,17 @@
+class ResourceHolder:
+    static_lookup = {}
+
+    @staticmethod
+    def add_resource(table_name, resource):
+        ResourceHolder.static_lookup[table_name] = resource
+
+    @staticmethod
+    def lookup_resource(table_name):
+        try:
+            return ResourceHolder.static_lookup[table_name]
+        except KeyError:
+            return None
+
+    @staticmethod
+    def reset():
+        ResourceHolder.static_lookup = {}
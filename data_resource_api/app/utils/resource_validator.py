@@ -0,0 +1,161 @@
+"""Resource Validator.
+
+Compiles the table schema of a data resource once so requests can be
+validated without running tableschema on every call.
+"""
+
+from data_resource_api.app.utils.exception_handler import SchemaValidationFailure
+from tableschema import validate
+from tableschema.exceptions import ValidationError
+
+
+TRUE_VALUES = ("true", "True", "TRUE", "1")
+FALSE_VALUES = ("false", "False", "FALSE", "0")
+
+
+def cast_integer(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value)
+    raise ValueError(value)
+
+
+def cast_number(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, (int, float, str)):
+        return float(value)
+    raise ValueError(value)
+
+
+def cast_boolean(value):
+    if isinstance(value, bool):
+        return value
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(value)
+
+
+# Types missing here are passed through and left for the database to check
+CASTS = {
+    "integer": cast_integer,
+    "year": cast_integer,
+    "duration": cast_integer,
+    "number": cast_number,
+    "boolean": cast_boolean,
+}
+
+
+def validate_table_schema(table_schema: dict) -> bool:
+    """Validate a table schema with tableschema.
+
+    Args:
+        table_schema (dict): The Frictionless Table Schema as a dict.
+
+    Returns:
+        bool: True if the table schema is valid.
+    """
+    try:
+        return validate(table_schema)
+    except ValidationError:
+        return False
+
+
+def compile_fields(table_schema: dict) -> dict:
+    """Collect the metadata of the fields in a table schema.
+
+    Args:
+        table_schema (dict): The Frictionless Table Schema as a dict.
+
+    Returns:
+        dict: The names of the fields, the names of the required fields and
+            the type of each field.
+    """
+    fields = table_schema["fields"]
+    return {
+        "field_names": [field["name"] for field in fields],
+        "required_fields": [
+            field["name"] for field in fields if field.get("required", False)
+        ],
+        "types": {field["name"]: field.get("type", "string") for field in fields},
+    }
+
+
+class ResourceValidator:
+    """A validator compiled once per table schema.
+
+    Attributes:
+        field_names (tuple): Names of the fields in the table schema.
+        accepted_fields (frozenset): The same names for fast lookups.
+        required_fields (tuple): Names of the fields that must be provided.
+        restricted_fields (frozenset): Names of the fields hidden from clients.
+        casts (dict): The cast function of each field that has one.
+
+    Args:
+        table_schema (dict): The Frictionless Table Schema as a dict.
+        restricted_fields (list): Fields that must not be returned.
+        schema_valid (bool): Whether the table schema is valid, if it was
+            already validated.
+        fields (dict): The metadata of the fields, if it was already compiled
+            with `compile_fields()`.
+    """
+
+    def __init__(
+        self,
+        table_schema: dict,
+        restricted_fields: list = [],
+        schema_valid: bool = None,
+        fields: dict = None,
+    ):
+        if schema_valid is None:
+            schema_valid = validate_table_schema(table_schema)
+        self.schema_valid = schema_valid
+
+        if fields is None:
+            fields = compile_fields(table_schema)
+
+        self.table_schema = table_schema
+        self.field_names = tuple(fields["field_names"])
+        self.accepted_fields = frozenset(self.field_names)
+        self.required_fields = tuple(fields["required_fields"])
+        self.restricted_fields = frozenset(restricted_fields)
+        self.types = dict(fields["types"])
+        self.casts = {
+            name: CASTS[field_type]
+            for name, field_type in self.types.items()
+            if field_type in CASTS
+        }
+
+    def check_schema(self):
+        """Raise if the table schema failed tableschema validation."""
+        if not self.schema_valid:
+            raise SchemaValidationFailure()
+
+    def cast(self, field: str, value):
+        """Cast a value for a field.
+
+        Args:
+            field (str): Name of the field.
+            value (any): The value from the request.
+
+        Returns:
+            any, str: The cast value and an error message, or None if it succeeded.
+        """
+        cast = self.casts.get(field)
+        if cast is None or value is None:
+            return value, None
+
+        try:
+            return cast(value), None
+        except (TypeError, ValueError):
+            return (
+                value,
+                f"Field '{field}' must be of type '{self.types[field]}'.",
+            )
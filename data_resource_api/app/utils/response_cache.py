@@ -0,0 +1,199 @@
+"""Response Cache.
+
+Caches the responses of read requests in each worker process and keeps
+the workers in sync by broadcasting writes with PostgreSQL LISTEN/NOTIFY.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from data_resource_api.app.utils.notify_listener import NotifyListener
+from data_resource_api.app.utils.row_counter import RowCounter
+from data_resource_api.config import ConfigurationFactory
+from sqlalchemy import text
+
+
+CHANNEL = "data_resource_changes"
+DEFAULT_TTL = 60
+
+
+class ResponseCache:
+    """Holds the cached responses for every data resource in this process.
+
+    Note:
+        Caching is enabled per resource with the `cache` entry of the `get`
+        method in the descriptor, e.g. `"cache": {"ttl": 30}`.
+
+        Entries are only served while this process is listening for changes.
+        If the listener loses its connection the cache is cleared and bypassed
+        until it reconnects, so a missed notification never serves stale data.
+    """
+
+    static_cache = OrderedDict()
+    static_generations = {}
+    epoch = 0
+    max_entries = ConfigurationFactory.from_env().RESPONSE_CACHE_SIZE
+    lock = Lock()
+    listener = None
+    listening = False
+
+    @staticmethod
+    def get_cache_settings(api_schema: dict) -> dict:
+        """Extract the cache settings from the API schema.
+
+        Args:
+            api_schema (dict): The API schema of the resource.
+
+        Returns:
+            dict: The ttl to cache responses for, or None if caching is disabled.
+        """
+        try:
+            settings = api_schema["get"]["cache"]
+        except KeyError:
+            return None
+
+        if settings is False or settings is None:
+            return None
+        if settings is True:
+            settings = {}
+
+        return {"ttl": settings.get("ttl", DEFAULT_TTL)}
+
+    @staticmethod
+    def get(data_resource_name: str, key: tuple):
+        """Look up a cached response.
+
+        Args:
+            data_resource_name (str): Name of the data resource.
+            key (tuple): Everything the response depends on.
+
+        Returns:
+            tuple: The cached response, or None.
+        """
+        ResponseCache.start_listener()
+
+        with ResponseCache.lock:
+            if not ResponseCache.listening:
+                return None
+
+            cached = ResponseCache.static_cache.get((data_resource_name, key))
+            if cached is None:
+                return None
+
+            response, expiry = cached
+            if expiry <= monotonic():
+                del ResponseCache.static_cache[(data_resource_name, key)]
+                return None
+
+            ResponseCache.static_cache.move_to_end((data_resource_name, key))
+            return response
+
+    @staticmethod
+    def get_generation(data_resource_name: str) -> tuple:
+        """Return a token that changes whenever the resource is invalidated.
+
+        Note:
+            Take the token before reading from the database and pass it to
+            `set()`, so a response read before a write is never cached after it.
+        """
+        with ResponseCache.lock:
+            return (
+                ResponseCache.epoch,
+                ResponseCache.static_generations.get(data_resource_name, 0),
+            )
+
+    @staticmethod
+    def set(
+        data_resource_name: str,
+        key: tuple,
+        response: tuple,
+        ttl: int,
+        generation: tuple,
+    ):
+        with ResponseCache.lock:
+            if not ResponseCache.listening:
+                return
+            current_generation = (
+                ResponseCache.epoch,
+                ResponseCache.static_generations.get(data_resource_name, 0),
+            )
+            if generation != current_generation:
+                return
+
+            cache = ResponseCache.static_cache
+            cache[(data_resource_name, key)] = (response, monotonic() + float(ttl))
+            cache.move_to_end((data_resource_name, key))
+            while len(cache) > ResponseCache.max_entries:
+                cache.popitem(last=False)
+
+    @staticmethod
+    def notify(session, data_resource_names: list):
+        """Queue a change notification in the session's transaction.
+
+        Note:
+            PostgreSQL delivers the notification to every listening worker when
+            the transaction commits, and drops it if it rolls back.
+
+        Args:
+            session (object): SQLAlchemy session.
+            data_resource_names (list): Names of the data resources that changed.
+        """
+        for data_resource_name in data_resource_names:
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CHANNEL, "payload": data_resource_name},
+            )
+
+    @staticmethod
+    def invalidate(data_resource_name: str):
+        with ResponseCache.lock:
+            generations = ResponseCache.static_generations
+            generations[data_resource_name] = generations.get(data_resource_name, 0) + 1
+            for cache_key in list(ResponseCache.static_cache.keys()):
+                if cache_key[0] == data_resource_name:
+                    del ResponseCache.static_cache[cache_key]
+
+    @staticmethod
+    def on_change(data_resource_name: str):
+        """Drop what is cached for a data resource another process wrote to.
+
+        Args:
+            data_resource_name (str): Name of the data resource that changed.
+        """
+        ResponseCache.invalidate(data_resource_name)
+        RowCounter.invalidate(data_resource_name)
+
+    @staticmethod
+    def set_listening(listening: bool):
+        with ResponseCache.lock:
+            ResponseCache.listening = listening
+            ResponseCache.epoch += 1
+            ResponseCache.static_cache = OrderedDict()
+
+    @staticmethod
+    def start_listener():
+        """Start the change listener of this process if it is not running.
+
+        Note:
+            The listener is started on first use rather than at import so that
+            it runs in each forked worker, not only in the parent process.
+        """
+        if ResponseCache.listener is not None:
+            return
+
+        with ResponseCache.lock:
+            if ResponseCache.listener is None:
+                ResponseCache.listener = NotifyListener(
+                    CHANNEL,
+                    ResponseCache.on_change,
+                    ResponseCache.set_listening,
+                    "response-cache-listener",
+                )
+                ResponseCache.listener.start()
+
+    @staticmethod
+    def reset():
+        with ResponseCache.lock:
+            ResponseCache.epoch += 1
+            ResponseCache.static_cache = OrderedDict()
@@ -0,0 +1,147 @@
+"""Row Counter.
+
+Counts the rows of a data model for pagination links using the strategy
+configured for the resource in its descriptor.
+"""
+
+from threading import Lock
+from time import monotonic
+
+from data_resource_api.logging import LogFactory
+from sqlalchemy import text
+
+
+logger = LogFactory.get_console_logger("row-counter")
+
+EXACT = "exact"
+CACHED = "cached"
+ESTIMATE = "estimate"
+STRATEGIES = (EXACT, CACHED, ESTIMATE)
+DEFAULT_TTL = 60
+
+
+class RowCounter:
+    """Holds the cached row counts for every data model in this process.
+
+    Note:
+        The strategy is read from the `count` entry of the `get` method in the
+        descriptor, e.g. `"count": {"strategy": "cached", "ttl": 30}`.
+
+        - `exact` runs a `COUNT(*)` on every request.
+        - `cached` runs a `COUNT(*)` and keeps the result for `ttl` seconds or
+          until a write to the table invalidates it.
+        - `estimate` reads the planner estimate from `pg_class.reltuples`.
+    """
+
+    static_cache = {}
+    static_generations = {}
+    epoch = 0
+    lock = Lock()
+
+    @staticmethod
+    def get_count_settings(api_schema: dict) -> dict:
+        """Extract the count settings from the API schema.
+
+        Args:
+            api_schema (dict): The API schema of the resource.
+
+        Returns:
+            dict: The strategy and ttl to count with.
+        """
+        try:
+            settings = api_schema["get"]["count"]
+        except KeyError:
+            return {"strategy": EXACT, "ttl": DEFAULT_TTL}
+
+        if isinstance(settings, str):
+            settings = {"strategy": settings}
+
+        strategy = settings.get("strategy", EXACT)
+        if strategy not in STRATEGIES:
+            logger.warning(f"Unknown count strategy '{strategy}'; using '{EXACT}'.")
+            strategy = EXACT
+
+        return {"strategy": strategy, "ttl": settings.get("ttl", DEFAULT_TTL)}
+
+    @staticmethod
+    def count(session, data_model, strategy: str = EXACT, ttl: int = DEFAULT_TTL):
+        """Count the rows of a data model.
+
+        Args:
+            session (object): SQLAlchemy session.
+            data_model (object): SQLAlchemy ORM model.
+            strategy (str): One of `exact`, `cached` or `estimate`.
+            ttl (int): Seconds a cached count stays valid.
+
+        Returns:
+            int: The number of rows.
+        """
+        if strategy == CACHED:
+            return RowCounter.cached_count(session, data_model, ttl)
+        if strategy == ESTIMATE:
+            return RowCounter.estimated_count(session, data_model)
+        return RowCounter.exact_count(session, data_model)
+
+    @staticmethod
+    def exact_count(session, data_model) -> int:
+        return session.query(data_model).count()
+
+    @staticmethod
+    def cached_count(session, data_model, ttl: int) -> int:
+        """Count the rows of a table, reusing a recent count.
+
+        Note:
+            A count is only kept if the table was not invalidated while it ran,
+            so a count taken before a write is never cached after it.
+        """
+        table_name = data_model.__tablename__
+        now = monotonic()
+
+        with RowCounter.lock:
+            cached = RowCounter.static_cache.get(table_name)
+            generation = RowCounter.get_generation(table_name)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        row_count = RowCounter.exact_count(session, data_model)
+        with RowCounter.lock:
+            if generation == RowCounter.get_generation(table_name):
+                RowCounter.static_cache[table_name] = (row_count, now + float(ttl))
+
+        return row_count
+
+    @staticmethod
+    def estimated_count(session, data_model) -> int:
+        """Read the planner estimate for a table.
+
+        Note:
+            Tables that have never been analyzed report no estimate; those fall
+            back to an exact count, which is cheap while the table is small.
+        """
+        estimate = session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {"table_name": f'"{data_model.__tablename__}"'},
+        ).scalar()
+
+        if estimate is None or estimate <= 0:
+            return RowCounter.exact_count(session, data_model)
+
+        return int(estimate)
+
+    @staticmethod
+    def get_generation(table_name: str) -> tuple:
+        # Callers hold the lock
+        return (RowCounter.epoch, RowCounter.static_generations.get(table_name, 0))
+
+    @staticmethod
+    def invalidate(table_name: str):
+        with RowCounter.lock:
+            generations = RowCounter.static_generations
+            generations[table_name] = generations.get(table_name, 0) + 1
+            RowCounter.static_cache.pop(table_name, None)
+
+    @staticmethod
+    def reset():
+        with RowCounter.lock:
+            RowCounter.epoch += 1
+            RowCounter.static_cache = {}
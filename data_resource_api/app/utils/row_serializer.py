@@ -0,0 +1,147 @@
+"""Row Serializer.
+
+Turns rows selected through SQLAlchemy Core into response dicts without
+loading ORM objects.
+"""
+
+import json
+from hashlib import sha1
+
+from data_resource_api.app.utils.exception_handler import ApiError
+from data_resource_api.app.utils.json_converter import unknown_field_json_converter
+from sqlalchemy import Date, DateTime, literal_column, select
+
+
+class RowSerializer:
+    """A serializer compiled once per data resource.
+
+    Attributes:
+        restricted_fields (frozenset): Names of the fields hidden from clients.
+        column_names (tuple): Names of the fields returned to clients.
+        columns (list): Columns to select. These are the returned columns followed
+            by any other primary key columns needed for pagination.
+        primary_key_indexes (tuple): Positions of the primary key columns in a row.
+        version_column (object): The PostgreSQL `xmin` system column, which
+            changes whenever a row is inserted or updated. It is selected last.
+    """
+
+    def __init__(self, data_model, restricted_fields: list = [], fields: list = None):
+        restricted_fields = frozenset(restricted_fields)
+        table = data_model.__table__
+
+        # Generated columns, like the search vector, are not part of the schema
+        output_columns = [
+            column
+            for column in table.columns
+            if column.key not in restricted_fields
+            and column.computed is None
+            and (fields is None or column.key in fields)
+        ]
+        output_keys = set(column.key for column in output_columns)
+        hidden_columns = [
+            column
+            for column in table.primary_key.columns
+            if column.key not in output_keys
+        ]
+
+        self.data_model = data_model
+        self.restricted_fields = restricted_fields
+        self.columns = output_columns + hidden_columns
+        self.column_names = tuple(column.key for column in output_columns)
+        self.primary_key_columns = list(table.primary_key.columns)
+        self.primary_key_indexes = tuple(
+            self.columns.index(column) for column in self.primary_key_columns
+        )
+        self.version_column = literal_column(f'"{table.name}".xmin').label(
+            "row_version"
+        )
+        self._converters = tuple(
+            self._get_converter(column) for column in output_columns
+        )
+
+    def narrow(self, fields: list):
+        """Build a serializer that only selects some of the returned fields.
+
+        Note:
+            The primary key columns are still selected for pagination and
+            entity tags, but are only returned if they are requested.
+
+        Args:
+            fields (list): Names of the fields to return.
+
+        Returns:
+            RowSerializer: The narrowed serializer.
+
+        Raises:
+            ApiError: If a field is unknown or restricted.
+        """
+        errors = [
+            f"Unknown or restricted field '{field}' found."
+            for field in fields
+            if field not in self.column_names
+        ]
+        if len(errors) > 0:
+            raise ApiError("Invalid fields.", 400, errors)
+
+        return RowSerializer(self.data_model, self.restricted_fields, set(fields))
+
+    def _get_converter(self, column):
+        if isinstance(column.type, (Date, DateTime)):
+            return unknown_field_json_converter
+        return None
+
+    def select(self):
+        """Build a SELECT of the permitted columns.
+
+        Returns:
+            object: A SQLAlchemy Core select statement.
+        """
+        return select(self.columns + [self.version_column])
+
+    def serialize(self, row) -> dict:
+        """Build the response dict for a row.
+
+        Args:
+            row (tuple): A row selected with `select()`.
+
+        Returns:
+            dict: The field names mapped to their values.
+        """
+        resp = {}
+        for name, converter, value in zip(self.column_names, self._converters, row):
+            if value is None:
+                value = ""
+            elif converter is not None:
+                value = converter(value)
+            resp[name] = value
+        return resp
+
+    def values(self, row) -> tuple:
+        """Return only the values that are returned to clients."""
+        return tuple(row[: len(self.column_names)])
+
+    def primary_key_values(self, row) -> list:
+        """Return the primary key values of a row."""
+        return [row[idx] for idx in self.primary_key_indexes]
+
+    def etag(self, rows: list, extra=None) -> str:
+        """Build a strong entity tag for the response made from some rows.
+
+        Note:
+            The tag is a digest of the returned field names and the primary key
+            and row version of every row, so it changes whenever one of the rows
+            does, without serializing them.
+
+        Args:
+            rows (list): Rows selected with `select()`.
+            extra (any): Anything else the response is built from, e.g. its links.
+
+        Returns:
+            str: The unquoted entity tag.
+        """
+        digest = sha1(repr(self.column_names).encode())
+        for row in rows:
+            digest.update(repr((self.primary_key_values(row), row[-1])).encode())
+        if extra is not None:
+            digest.update(json.dumps(extra, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
@@ -0,0 +1,280 @@
+"""Token Cache.
+
+Verifies each access token once and caches the JSON Web Key Set tokens are
+verified with, so secured requests do not check a signature or fetch the
+keys every time.
+"""
+
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock, Thread
+from time import monotonic, sleep, time
+
+import requests
+from brighthive_authlib import AuthZeroProvider, OAuth2ProviderError
+from data_resource_api.config import ConfigurationFactory
+from data_resource_api.logging import LogFactory
+from data_resource_api.utils import exponential_backoff
+from jose import jwt
+
+
+logger = LogFactory.get_console_logger("token-cache")
+
+JWKS_TIMEOUT = 5
+# A key set is refetched for an unknown key id at most this often
+JWKS_MIN_REFRESH_INTERVAL = 10
+# Keys are not trusted if the refresher has failed for this many intervals
+JWKS_MAX_STALE_INTERVALS = 2
+
+
+class TokenCache:
+    """Holds the claims of the tokens verified by this process.
+
+    Note:
+        Entries are keyed by a digest of the token, so the tokens themselves
+        are not kept in memory, and expire at the token's `exp` claim.
+    """
+
+    static_cache = OrderedDict()
+    max_entries = ConfigurationFactory.from_env().TOKEN_CACHE_SIZE
+    lock = Lock()
+
+    @staticmethod
+    def get(token_hash: str):
+        """Look up a verified token.
+
+        Args:
+            token_hash (str): Digest of the token.
+
+        Returns:
+            dict, str: The claims of the token and the id of the key it was
+                signed with, or None if it is not cached.
+        """
+        with TokenCache.lock:
+            cached = TokenCache.static_cache.get(token_hash)
+            if cached is None:
+                return None
+
+            claims, key_id = cached
+            if claims["exp"] <= time():
+                del TokenCache.static_cache[token_hash]
+                return None
+
+            TokenCache.static_cache.move_to_end(token_hash)
+            return claims, key_id
+
+    @staticmethod
+    def set(token_hash: str, claims: dict, key_id: str):
+        # Tokens that never expire are verified every time
+        if not isinstance(claims.get("exp"), (int, float)):
+            return
+
+        with TokenCache.lock:
+            cache = TokenCache.static_cache
+            cache[token_hash] = (claims, key_id)
+            cache.move_to_end(token_hash)
+            while len(cache) > TokenCache.max_entries:
+                cache.popitem(last=False)
+
+    @staticmethod
+    def evict_keys(key_ids: set):
+        """Forget the tokens signed with some keys."""
+        with TokenCache.lock:
+            for token_hash, (_, key_id) in list(TokenCache.static_cache.items()):
+                if key_id in key_ids:
+                    del TokenCache.static_cache[token_hash]
+
+    @staticmethod
+    def reset():
+        with TokenCache.lock:
+            TokenCache.static_cache = OrderedDict()
+
+
+class JwksCache:
+    """The JSON Web Key Set published at a URL.
+
+    Note:
+        The keys are refreshed in the background every `refresh_interval`
+        seconds. A key that is no longer published is revoked, and the tokens
+        signed with it are evicted from the `TokenCache`.
+
+    Args:
+        jwks_url (str): URL of the key set.
+        refresh_interval (int): Seconds between refreshes.
+    """
+
+    static_instances = {}
+    static_lock = Lock()
+
+    def __init__(self, jwks_url: str, refresh_interval: int):
+        self.jwks_url = jwks_url
+        self.refresh_interval = refresh_interval
+        self.keys = None
+        self.fetched_at = None
+        self.refresh_lock = Lock()
+        self.refresher = None
+
+    @staticmethod
+    def for_url(jwks_url: str, refresh_interval: int):
+        with JwksCache.static_lock:
+            if jwks_url not in JwksCache.static_instances:
+                JwksCache.static_instances[jwks_url] = JwksCache(
+                    jwks_url, refresh_interval
+                )
+            return JwksCache.static_instances[jwks_url]
+
+    @staticmethod
+    def reset():
+        with JwksCache.static_lock:
+            JwksCache.static_instances = {}
+
+    def is_fresh(self) -> bool:
+        if self.fetched_at is None:
+            return False
+        max_age = self.refresh_interval * JWKS_MAX_STALE_INTERVALS
+        return monotonic() - self.fetched_at < max_age
+
+    def has_key(self, key_id: str) -> bool:
+        """Whether a key is still published, without fetching the key set."""
+        keys = self.keys
+        return self.is_fresh() and keys is not None and key_id in keys
+
+    def get_key(self, key_id: str) -> dict:
+        """Find a key, fetching the key set if it may have changed.
+
+        Args:
+            key_id (str): The `kid` of the key.
+
+        Returns:
+            dict: The JSON Web Key, or None if it is not published.
+        """
+        self.start_refresher()
+
+        keys = self.keys
+        if not self.is_fresh() or (key_id not in keys and self.can_refresh()):
+            keys = self.refresh(force=not self.is_fresh())
+        return keys.get(key_id)
+
+    def can_refresh(self) -> bool:
+        return monotonic() - self.fetched_at >= JWKS_MIN_REFRESH_INTERVAL
+
+    def refresh(self, force: bool = True) -> dict:
+        """Fetch the key set.
+
+        Args:
+            force (bool): Fetch even if another thread just did.
+
+        Returns:
+            dict: The keys by key id.
+        """
+        with self.refresh_lock:
+            if not force and not self.can_refresh():
+                return self.keys
+
+            response = requests.get(
+                self.jwks_url,
+                headers={"content-type": "application/json"},
+                timeout=JWKS_TIMEOUT,
+            )
+            response.raise_for_status()
+            keys = {key["kid"]: key for key in response.json()["keys"] if "kid" in key}
+
+            revoked = set(self.keys or {}) - set(keys)
+            self.keys = keys
+            self.fetched_at = monotonic()
+
+        if len(revoked) > 0:
+            logger.info(f"Signing keys revoked: {sorted(revoked)}")
+            TokenCache.evict_keys(revoked)
+        return keys
+
+    def start_refresher(self):
+        if self.refresher is not None:
+            return
+
+        with self.refresh_lock:
+            if self.refresher is None:
+                self.refresher = JwksRefresher(self)
+                self.refresher.start()
+
+
+class JwksRefresher(Thread):
+    """Refreshes a key set in the background, so requests rarely wait for it."""
+
+    def __init__(self, jwks_cache: JwksCache):
+        Thread.__init__(self, name="jwks-refresher", daemon=True)
+        self.jwks_cache = jwks_cache
+
+    def run(self):
+        retry_time = exponential_backoff(1, 1.5)
+        wait = self.jwks_cache.refresh_interval
+
+        while True:
+            sleep(wait)
+            try:
+                self.jwks_cache.refresh()
+                retry_time = exponential_backoff(1, 1.5)
+                wait = self.jwks_cache.refresh_interval
+            except Exception:
+                logger.exception("Failed to refresh the JSON Web Key Set.")
+                wait = min(retry_time(), self.jwks_cache.refresh_interval)
+
+
+class CachedAuthZeroProvider(AuthZeroProvider):
+    """An Auth0 provider that verifies each token once.
+
+    Args:
+        refresh_interval (int): Seconds between refreshes of the key set.
+    """
+
+    def __init__(self, refresh_interval: int = 300):
+        super().__init__()
+        self.refresh_interval = refresh_interval
+
+    def validate_token(self, token=None, scopes=[]):
+        if not token:
+            token = self.get_token()
+
+        try:
+            claims = self.verify(token)
+            if len(scopes) > 0 and claims.get("scope"):
+                token_scopes = claims["scope"].split()
+                for scope in scopes:
+                    if scope not in token_scopes:
+                        raise OAuth2ProviderError(
+                            f"Required scope ({scope}) is not present for this client"
+                        )
+            return True
+        except Exception:
+            raise OAuth2ProviderError("Access Denied")
+
+    def verify(self, token: str) -> dict:
+        """Verify the signature and claims of a token, or find it verified.
+
+        Args:
+            token (str): The bearer token.
+
+        Returns:
+            dict: The claims of the token.
+        """
+        token_hash = sha256(token.encode("utf-8")).hexdigest()
+        jwks = JwksCache.for_url(self.jwks_url, self.refresh_interval)
+
+        cached = TokenCache.get(token_hash)
+        if cached is not None and jwks.has_key(cached[1]):
+            return cached[0]
+
+        key_id = jwt.get_unverified_header(token).get("kid")
+        key = jwks.get_key(key_id)
+        if key is None:
+            raise OAuth2ProviderError(f"Unknown signing key '{key_id}'")
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=self.algorithms,
+            audience=self.audience,
+            issuer="{}/".format(self.base_url),
+        )
+        TokenCache.set(token_hash, claims, key_id)
+        return claims
@@ -29,6 +29,7 @@ class Config:
     MIGRATION_HOME = os.getenv("MIGRATION_HOME", os.path.join(ROOT_PATH, "migrations"))
     DATA_RESOURCE_SLEEP_INTERVAL = os.getenv("DATA_RESOURCE_SLEEP_INTERVAL", 60)
     DATA_MODEL_SLEEP_INTERVAL = os.getenv("DATA_MODEL_SLEEP_INTERVAL", 30)
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
 
     # Database Settings
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -52,6 +53,8 @@ class Config:
     OAUTH2_JWKS_URL = "{}/.well-known/jwks.json".format(OAUTH2_URL)
     OAUTH2_AUDIENCE = os.getenv("OAUTH2_AUDIENCE", "http://localhost:8000")
     OAUTH2_ALGORITHMS = ["RS256"]
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 1024))
+    JWKS_REFRESH_INTERVAL = int(os.getenv("JWKS_REFRESH_INTERVAL", 300))
 
     # Secret Manager
     SECRET_MANAGER = None
@@ -70,6 +73,14 @@ class Config:
             algorithms=Config.OAUTH2_ALGORITHMS,
             audience=Config.OAUTH2_AUDIENCE,
         )
+        if str(Config.OAUTH2_PROVIDER).upper() == "AUTH0":
+            # Imported here as the token cache needs this module to be loaded
+            from data_resource_api.app.utils.token_cache import CachedAuthZeroProvider
+
+            oauth2_provider = CachedAuthZeroProvider(Config.JWKS_REFRESH_INTERVAL)
+            oauth2_provider.from_object(auth_config)
+            return oauth2_provider
+
         oauth2_provider = OAuth2ProviderFactory.get_provider(
             Config.OAUTH2_PROVIDER, auth_config
         )
@@ -2,3 +2,4 @@ from data_resource_api.db.base import Base, Session, engine
 from data_resource_api.db.checksum import Checksum
 from data_resource_api.db.log import Log
 from data_resource_api.db.migrations import Migrations
+from data_resource_api.db.model_snapshot import ModelSnapshot
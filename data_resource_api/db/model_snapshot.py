@@ -0,0 +1,27 @@
+"""Compiled data models for the API workers."""
+
+from data_resource_api.db import Base
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+
+class ModelSnapshot(Base):
+    """Model Snapshot.
+
+    This class keeps what the API workers derive from each stored data model,
+    compiled by the Data Model Manager whenever it saves their checksums, so a
+    worker starting up loads it with one query.
+
+    Class Attributes:
+        checksum (object): Checksum of the compiled data models.
+        version (object): Version of the format of the compiled data models.
+        models (object): The compiled data models.
+        date_created (object): Date and time the snapshot was compiled.
+    """
+
+    __tablename__ = "model_snapshots"
+    checksum = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False)
+    models = Column(JSONB, nullable=False)
+    date_created = Column(DateTime, default=func.now())
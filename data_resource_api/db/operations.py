@@ -0,0 +1,208 @@
+"""Custom Alembic operations.
+
+Adds `op.create_index_concurrently()` so that indexes added to existing tables
+are built with `CREATE INDEX CONCURRENTLY`, which does not block writes to the
+table while the index builds.
+"""
+
+from alembic.autogenerate.render import renderers
+from alembic.operations import Operations, ops
+
+
+@Operations.register_operation("create_index_concurrently")
+class CreateIndexConcurrentlyOp(ops.CreateIndexOp):
+    """Create an index without locking the table against writes."""
+
+    @classmethod
+    def create_index_concurrently(
+        cls,
+        operations,
+        index_name,
+        table_name,
+        columns,
+        schema=None,
+        unique=False,
+        **kw,
+    ):
+        op = cls(index_name, table_name, columns, schema=schema, unique=unique, **kw)
+        return operations.invoke(op)
+
+
+@Operations.implementation_for(CreateIndexConcurrentlyOp)
+def create_index_concurrently(operations, operation):
+    # PostgreSQL cannot build an index concurrently inside a transaction
+    with operations.get_context().autocommit_block():
+        operations.create_index(
+            operation.index_name,
+            operation.table_name,
+            operation.columns,
+            schema=operation.schema,
+            unique=operation.unique,
+            postgresql_concurrently=True,
+            **operation.kw,
+        )
+
+
+@renderers.dispatch_for(CreateIndexConcurrentlyOp)
+def render_create_index_concurrently(autogen_context, op):
+    text = renderers.dispatch(ops.CreateIndexOp)(autogen_context, op)
+    return text.replace("create_index(", "create_index_concurrently(", 1)
+
+
+def process_revision_directives(context, revision, directives):
+    """Build the indexes of existing tables concurrently.
+
+    Note:
+        This is passed to `context.configure()` in `migrations/env.py`. Indexes
+        of tables created in the same migration are still created normally, as
+        those tables are empty.
+
+    Args:
+        context (MigrationContext): The migration context.
+        revision (tuple): The revision being generated.
+        directives (list): The `MigrationScript` being generated.
+    """
+    metadata = context.opts["target_metadata"]
+    for script in directives:
+        for upgrade_ops in script.upgrade_ops_list:
+            created_tables = set(
+                op.table_name
+                for op in upgrade_ops.ops
+                if isinstance(op, ops.CreateTableOp)
+            )
+            upgrade_ops.ops = rebuild_computed_columns(upgrade_ops.ops, metadata)
+            upgrade_ops.ops = use_concurrent_indexes(upgrade_ops.ops, created_tables)
+
+
+def rebuild_computed_columns(operations: list, metadata) -> list:
+    """Drop and add again the generated columns whose comment changed.
+
+    Note:
+        Autogenerate cannot compare the expressions of generated columns, so
+        the ORM factory describes them in their comment instead. PostgreSQL
+        cannot change the expression of a generated column in place.
+
+    Args:
+        operations (list): Alembic operations.
+        metadata (MetaData): The metadata the migration was generated from.
+
+    Returns:
+        list: The operations.
+    """
+    for op in operations:
+        if not isinstance(op, ops.ModifyTableOps) or op.table_name not in metadata:
+            continue
+
+        table = metadata.tables[op.table_name]
+        table_ops = []
+        for table_op in op.ops:
+            if (
+                not isinstance(table_op, ops.AlterColumnOp)
+                or table_op.modify_comment is False
+                or table_op.column_name not in table.columns
+                or table.columns[table_op.column_name].computed is None
+            ):
+                table_ops.append(table_op)
+                continue
+
+            column = table.columns[table_op.column_name]
+
+            table_ops.append(ops.DropColumnOp(op.table_name, column.name))
+            table_ops.append(
+                ops.AddColumnOp.from_column_and_tablename(
+                    table.schema, op.table_name, column.copy()
+                )
+            )
+            # The indexes of the column were dropped with it
+            for index in table.indexes:
+                if index.columns.contains_column(column):
+                    table_ops.append(ops.CreateIndexOp.from_index(index))
+        op.ops = table_ops
+    return operations
+
+
+def use_concurrent_indexes(operations: list, created_tables: set) -> list:
+    """Replace the index creations on existing tables in a list of operations.
+
+    Args:
+        operations (list): Alembic operations.
+        created_tables (set): Names of the tables created by the migration.
+
+    Returns:
+        list: The operations.
+    """
+    result = []
+    for op in operations:
+        if isinstance(op, ops.ModifyTableOps) and op.table_name not in created_tables:
+            op.ops = use_concurrent_indexes(op.ops, created_tables)
+        elif type(op) is ops.CreateIndexOp and op.table_name not in created_tables:
+            op = CreateIndexConcurrentlyOp(
+                op.index_name,
+                op.table_name,
+                op.columns,
+                schema=op.schema,
+                unique=op.unique,
+                **op.kw,
+            )
+        result.append(op)
+    return result
+
+
+def get_revision_scope(metadata, table_names: set) -> set:
+    """Find the tables a revision has to compare for some changed tables.
+
+    Note:
+        The tables referenced by a changed table are compared so that they are
+        created first if they are new. The tables referencing a changed table,
+        like its junction tables, are compared so that their foreign keys
+        follow it.
+
+    Args:
+        metadata (MetaData): The metadata the migration is generated from.
+        table_names (set): Names of the changed tables.
+
+    Returns:
+        set: Names of the tables to compare.
+    """
+    scope = set(table_names)
+    for table in metadata.tables.values():
+        referenced = set(
+            foreign_key.target_fullname.rsplit(".", 1)[0]
+            for foreign_key in table.foreign_keys
+        )
+        if table.name in table_names:
+            scope |= referenced
+        elif len(referenced & set(table_names)) > 0:
+            scope.add(table.name)
+    return scope
+
+
+def get_scope_filters(metadata, table_names: set) -> dict:
+    """Build the options of `context.configure()` limiting a revision to some
+    tables.
+
+    Note:
+        `include_name` keeps the other tables from being reflected from the
+        database, and `include_object` keeps them from being compared with
+        the metadata, where they would look new.
+
+    Args:
+        metadata (MetaData): The metadata the migration is generated from.
+        table_names (set): Names of the changed tables, or None to compare
+            every table.
+
+    Returns:
+        dict: The filters.
+    """
+    if table_names is None:
+        return {}
+
+    scope = get_revision_scope(metadata, table_names)
+
+    def include_name(name, type_, parent_names):
+        return type_ != "table" or name in scope
+
+    def include_object(object_, name, type_, reflected, compare_to):
+        return type_ != "table" or name in scope
+
+    return {"include_name": include_name, "include_object": include_object}
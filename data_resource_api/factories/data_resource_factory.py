@@ -6,7 +6,21 @@ This module contains a factory object for creating API resources.
 import hashlib
 import json
 
-from data_resource_api.api import VersionedResource, VersionedResourceMany
+from data_resource_api.api import (
+    CompiledResource,
+    VersionedResource,
+    VersionedResourceMany,
+)
+from data_resource_api.api.core.versioned_resource import (
+    AGGREGATE,
+    COLLECTION,
+    EXPORT,
+    ITEM,
+    QUERY,
+    SEARCH,
+    UPSERT,
+)
+from data_resource_api.app.utils.resource_holder import ResourceHolder
 from data_resource_api.config import ConfigurationFactory
 
 
@@ -23,74 +37,86 @@ class DataResourceFactory:
 
     def create_api_from_dict(
         self,
-        api_schema: dict,
+        compiled: CompiledResource,
         endpoint_name: str,
         table_name: str,
         api: object,
-        table_obj: object,
-        table_schema: dict,
-        restricted_fields: list = [],
     ):
         """Create an API endpoint from a custom specification.
 
         Args:
-            api_schema (dict): API schema as a dict.
+            compiled (CompiledResource): State compiled from the descriptor.
             endpoint_name (str): Name of the endpoint.
             table_name (str): Name of the data model (i.e. table) associated with the endpoint.
+            api (object): The Flask-RESTful API to add the endpoint to.
+
+        Returns:
+            object, object: The Flask-RESTful resource classes serving the
+                endpoint and its relationships.
         """
         flask_restful_resource = None
         resources = [
-            f"/{endpoint_name}",
-            f"/{endpoint_name}/<int:id>",
-            f"/{endpoint_name}/query",
+            (f"/{endpoint_name}", COLLECTION),
+            (f"/{endpoint_name}/<int:id>", ITEM),
+            (f"/{endpoint_name}/query", QUERY),
+            (f"/{endpoint_name}/export", EXPORT),
+            (f"/{endpoint_name}/upsert", UPSERT),
+            (f"/{endpoint_name}/search", SEARCH),
+            (f"/{endpoint_name}/aggregate", AGGREGATE),
         ]
 
         flask_restful_resource = type(
             endpoint_name,
             (VersionedResource,),
-            {
-                "data_resource_name": table_name,
-                "data_model": table_obj,
-                "table_schema": table_schema,
-                "api_schema": api_schema,
-                "restricted_fields": restricted_fields,
-            },
+            {"data_resource_name": table_name},
         )
 
-        for idx, resource in enumerate(resources):
+        flask_restful_resource.load(compiled)
+
+        for idx, (resource, route) in enumerate(resources):
             api.add_resource(
-                flask_restful_resource, resource, endpoint=f"{endpoint_name}_ep_{idx}"
+                flask_restful_resource,
+                resource,
+                endpoint=f"{endpoint_name}_ep_{idx}",
+                resource_class_kwargs={"route": route},
             )
+        ResourceHolder.add_resource(table_name, flask_restful_resource)
 
         many_resources = []
 
-        if "custom" in api_schema:
-            for custom_resource in api_schema["custom"]:
+        if "custom" in compiled.api_schema:
+            for custom_resource in compiled.api_schema["custom"]:
                 custom_table = custom_resource["resource"].split("/")
                 # many_resources.append(
                 #     f'/{custom_table[1]}/<id>/{custom_table[2]}/<child_id>'
                 # ) # DELETE route
-                many_resources.append(f"/{custom_table[1]}/<int:id>/{custom_table[2]}")
-                many_resources.append(f"/{custom_table[2]}/<int:id>/{custom_table[1]}")
+                many_resources.append(
+                    (
+                        f"/{custom_table[1]}/<int:id>/{custom_table[2]}",
+                        f"/{custom_table[1]}/{custom_table[2]}",
+                    )
+                )
+                many_resources.append(
+                    (
+                        f"/{custom_table[2]}/<int:id>/{custom_table[1]}",
+                        f"/{custom_table[2]}/{custom_table[1]}",
+                    )
+                )
 
         flask_restful_many_resource = type(
             f"{endpoint_name}Many",
             (VersionedResourceMany,),
-            {
-                "data_resource_name": table_name,
-                "data_model": table_obj,
-                "table_schema": table_schema,
-                "api_schema": api_schema,
-                "restricted_fields": restricted_fields,
-            },
+            {"data_resource_name": table_name},
         )
 
-        for idx, resource in enumerate(many_resources):
-            print(resource)
+        flask_restful_many_resource.load(compiled)
+
+        for idx, (resource, route) in enumerate(many_resources):
             api.add_resource(
                 flask_restful_many_resource,
                 resource,
                 endpoint=f"many_{endpoint_name}_ep_{idx}",
+                resource_class_kwargs={"route": route},
             )
 
-        return None
+        return flask_restful_resource, flask_restful_many_resource
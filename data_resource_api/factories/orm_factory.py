@@ -5,18 +5,40 @@ TableSchema specification.
 """
 
 import warnings
+from hashlib import md5
 
 from data_resource_api.app.utils.junc_holder import JuncHolder
 from data_resource_api.factories.table_schema_types import (
     TABLESCHEMA_TO_SQLALCHEMY_TYPES,
 )
 from data_resource_api.logging import LogFactory
-from sqlalchemy import Column, ForeignKey, Integer, String, Table, exc
+from sqlalchemy import (
+    Column,
+    Computed,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    UniqueConstraint,
+    exc,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from tableschema import Schema
 
 
 logger = LogFactory.get_console_logger("orm-factory")
 
+INDEX_METHODS = ("btree", "hash", "gin", "gist", "brin")
+# PostgreSQL truncates longer identifiers
+MAX_IDENTIFIER_LENGTH = 63
+
+# Name of the generated column holding the text of the searchable fields
+SEARCH_COLUMN = "search_vector"
+SEARCH_LANGUAGE = "english"
+SEARCH_WEIGHTS = ("A", "B", "C", "D")
+
 
 class ORMFactory:
     """ORM Factory.
@@ -80,13 +102,17 @@ class ORMFactory:
                 return True, foreign_key_reference
         return False, None
 
-    def create_sqlalchemy_fields(self, fields: dict, primary_key, foreign_keys=[]):
+    def create_sqlalchemy_fields(
+        self, fields: dict, primary_key, foreign_keys=[], enforce_unique=False
+    ):
         """Build SQLAlchemy fields to be added to new table object.
 
         Args:
             fields (dict):
             primary_key (str): The primary key field.
             foreign_keys (list): Collection of foreign key fields.
+            enforce_unique (bool): Whether fields with a unique constraint get
+                a unique column.
 
         Return:
             dict: SQLAlchemy fields to append to the new dataself.base object.
@@ -103,6 +129,11 @@ class ORMFactory:
                 nullable = False
             else:
                 nullable = True
+            unique = (
+                enforce_unique
+                and "constraints" in field.keys()
+                and bool(field["constraints"].get("unique", False))
+            )
             if field["name"] in primary_key:
                 sqlalchemy_fields[field["name"]] = Column(
                     self.get_sqlalchemy_type(field["type"]), primary_key=True
@@ -113,7 +144,9 @@ class ORMFactory:
                 )
                 if not is_foreign_key:
                     sqlalchemy_fields[field["name"]] = Column(
-                        self.get_sqlalchemy_type(field["type"]), nullable=nullable
+                        self.get_sqlalchemy_type(field["type"]),
+                        nullable=nullable,
+                        unique=unique,
                     )
                 else:
                     try:
@@ -141,8 +174,180 @@ class ORMFactory:
         except Exception:
             return String
 
+    def get_index_name(self, table_name: str, index: dict) -> str:
+        """Name an index that the descriptor did not name.
+
+        Args:
+            table_name (str): Name of the table.
+            index (dict): The index declaration.
+
+        Returns:
+            str: The index name, shortened with a digest if it is too long.
+        """
+        prefix = "ux" if index.get("unique", False) else "ix"
+        name = "_".join([prefix, table_name] + index["fields"])
+        if len(name) > MAX_IDENTIFIER_LENGTH:
+            digest = md5(name.encode("utf-8")).hexdigest()[:8]  # nosec
+            name = f"{name[:MAX_IDENTIFIER_LENGTH - 9]}_{digest}"
+        return name
+
+    def create_indexes(self, table_name: str, table_schema: dict, indexes: list):
+        """Build the indexes declared in the `datastore.indexes` of a descriptor.
+
+        Args:
+            table_name (str): Name of the table.
+            table_schema (dict): The Frictionless Table Schema as a dict.
+            indexes (list): The index declarations. Each one has a list of
+                `fields` and optionally a `name`, a `method` (btree, hash, gin,
+                gist or brin), `unique`, a `where` clause for partial indexes
+                and an operator class in `opclass`, either for all fields or
+                by field name.
+
+        Returns:
+            list: The SQLAlchemy indexes. Invalid declarations are logged and
+                skipped.
+        """
+        field_names = [field["name"] for field in table_schema["fields"]]
+        sqlalchemy_indexes = []
+        for index in indexes:
+            index = dict(index)
+            if not isinstance(index.get("fields"), list):
+                index["fields"] = [index.get("fields")]
+
+            method = index.get("method", "btree")
+            unknown_fields = [
+                field for field in index["fields"] if field not in field_names
+            ]
+            if len(unknown_fields) > 0:
+                logger.error(
+                    f"Index on '{table_name}' has unknown fields: {unknown_fields}"
+                )
+                continue
+            if method not in INDEX_METHODS:
+                logger.error(f"Index on '{table_name}' has unknown method '{method}'")
+                continue
+
+            if method == "hash" and (
+                index.get("unique", False) or len(index["fields"]) > 1
+            ):
+                logger.error(
+                    f"Hash index on '{table_name}' must be on one field and "
+                    "not unique"
+                )
+                continue
+
+            kwargs = {"unique": bool(index.get("unique", False))}
+            if method != "btree":
+                kwargs["postgresql_using"] = method
+            if index.get("where") is not None:
+                kwargs["postgresql_where"] = text(index["where"])
+            opclass = index.get("opclass")
+            if isinstance(opclass, str):
+                kwargs["postgresql_ops"] = {field: opclass for field in index["fields"]}
+            elif isinstance(opclass, dict):
+                kwargs["postgresql_ops"] = opclass
+
+            sqlalchemy_indexes.append(
+                Index(
+                    index.get("name", self.get_index_name(table_name, index)),
+                    *index["fields"],
+                    **kwargs,
+                )
+            )
+        return sqlalchemy_indexes
+
+    def get_search_weights(self, table_name: str, table_schema: dict) -> list:
+        """Find the fields a descriptor marks as `searchable`.
+
+        Args:
+            table_name (str): Name of the table.
+            table_schema (dict): The Frictionless Table Schema as a dict.
+
+        Returns:
+            list: The names of the searchable fields, each paired with its weight.
+                Fields that are not strings are logged and skipped.
+        """
+        weights = []
+        for field in table_schema["fields"]:
+            searchable = field.get("searchable", False)
+            if searchable is False:
+                continue
+
+            if field["type"] != "string":
+                logger.error(
+                    f"Field '{field['name']}' on '{table_name}' is searchable but "
+                    "not a string"
+                )
+                continue
+
+            # PostgreSQL weighs lexemes D unless told otherwise
+            weight = "D" if searchable is True else searchable
+            if weight not in SEARCH_WEIGHTS:
+                logger.error(
+                    f"Field '{field['name']}' on '{table_name}' has unknown search "
+                    f"weight '{weight}'"
+                )
+                continue
+            weights.append((field["name"], weight))
+        return weights
+
+    def create_search_column(self, table_name: str, table_schema: dict):
+        """Build the generated `tsvector` column of the searchable fields.
+
+        Note:
+            The database keeps the column up to date on every write. The fields
+            and their weights are also written to the column comment, so that
+            autogenerate notices when they change and the column is rebuilt.
+
+        Args:
+            table_name (str): Name of the table.
+            table_schema (dict): The Frictionless Table Schema as a dict.
+
+        Returns:
+            Column, Index: The column and its GIN index, or None, None if no
+                field is searchable.
+        """
+        weights = self.get_search_weights(table_name, table_schema)
+        if len(weights) == 0:
+            return None, None
+
+        field_names = [field["name"] for field in table_schema["fields"]]
+        if SEARCH_COLUMN in field_names:
+            logger.error(
+                f"Cannot search '{table_name}' as it has a field named "
+                f"'{SEARCH_COLUMN}'"
+            )
+            return None, None
+
+        expression = " || ".join(
+            f"setweight(to_tsvector('{SEARCH_LANGUAGE}', "
+            f"coalesce(\"{name}\", '')), '{weight}')"
+            for name, weight in weights
+        )
+        comment = "Full-text search of " + ", ".join(
+            f"{name} ({weight})" for name, weight in weights
+        )
+        column = Column(
+            SEARCH_COLUMN,
+            TSVECTOR,
+            Computed(expression, persisted=True),
+            comment=comment,
+        )
+        index = Index(
+            self.get_index_name(table_name, {"fields": [SEARCH_COLUMN]}),
+            SEARCH_COLUMN,
+            postgresql_using="gin",
+        )
+        return column, index
+
     def create_orm_from_dict(
-        self, table_schema: dict, model_name: str, api_schema: dict
+        self,
+        table_schema: dict,
+        model_name: str,
+        api_schema: dict,
+        indexes: list = [],
+        schema_valid: bool = None,
+        enforce_unique: bool = False,
     ):
         """Create a SQLAlchemy model from a Frictionless Table Schema spec.
 
@@ -150,14 +355,20 @@ class ORMFactory:
             table_schema (dict): The Frictionless Table Schema as a dict.
             model_name (str): Name of the ORM model (i.e. table)
             api_schema (dict): The API schema to identify custom endpoints.
+            indexes (list): The secondary indexes declared in the descriptor.
+            schema_valid (bool): Whether the table schema is valid, if it was
+                already validated.
+            enforce_unique (bool): Whether fields with a unique constraint get
+                a unique column.
 
         Returns:
             object: The SQLAlchemy ORM class.
         """
 
         orm_class = None
-        schema = Schema(table_schema)
-        if schema.valid:
+        if schema_valid is None:
+            schema_valid = Schema(table_schema).valid
+        if schema_valid:
             if "foreignKeys" in table_schema:
                 foreign_keys = table_schema["foreignKeys"]
             else:
@@ -174,13 +385,37 @@ class ORMFactory:
             logger.debug(f"found join tables: '{join_tables}'")
 
             fields = self.create_sqlalchemy_fields(
-                table_schema["fields"], table_schema["primaryKey"], foreign_keys
+                table_schema["fields"],
+                table_schema["primaryKey"],
+                foreign_keys,
+                enforce_unique,
+            )
+
+            # Indexes, unique columns and the search column of an earlier version
+            # of the model are replaced, so that autogenerate drops the ones no
+            # longer declared
+            if model_name in self.base.metadata.tables:
+                table = self.base.metadata.tables[model_name]
+                table.indexes.clear()
+                for constraint in list(table.constraints):
+                    if isinstance(constraint, UniqueConstraint):
+                        table.constraints.discard(constraint)
+                if SEARCH_COLUMN in table.columns:
+                    table._columns.remove(table.columns[SEARCH_COLUMN])
+
+            table_args = self.create_indexes(model_name, table_schema, indexes)
+
+            search_column, search_index = self.create_search_column(
+                model_name, table_schema
             )
+            if search_column is not None:
+                fields[SEARCH_COLUMN] = search_column
+                table_args.append(search_index)
 
             fields.update(
                 {
                     "__tablename__": model_name,
-                    "__table_args__": {"extend_existing": True},
+                    "__table_args__": tuple(table_args) + ({"extend_existing": True},),
                 }
             )
 
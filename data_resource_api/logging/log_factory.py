@@ -12,6 +12,10 @@ class LogFactory:
 
         logger = logging.getLogger(logger_name)
         logger.setLevel(logging.INFO)
+        # Loggers are shared by name, so only the first call adds a handler
+        if logger.handlers:
+            return logger
+
         log_formatter = logging.Formatter(
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
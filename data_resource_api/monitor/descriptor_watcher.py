@@ -0,0 +1,74 @@
+"""Descriptor Watcher.
+
+Wakes a data manager as soon as a descriptor file changes, instead of letting
+it wait for its next check.
+"""
+
+from threading import Event
+from time import sleep
+
+from data_resource_api.logging import LogFactory
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+
+logger = LogFactory.get_console_logger("descriptor-watcher")
+
+# Saving a file can raise several events, so they are let settle first
+DESCRIPTOR_SETTLE_TIME = 0.5
+
+
+class DescriptorWatcher(FileSystemEventHandler):
+    """Watches directories of descriptors for changes.
+
+    Note:
+        The data managers still check the descriptors every sleep interval,
+        so changes the file system does not report are found eventually.
+
+    Args:
+        directories (list): The directories to watch.
+    """
+
+    def __init__(self, directories: list):
+        self.directories = directories
+        self.changed = Event()
+        self.observer = None
+
+    def start(self):
+        if self.observer is not None:
+            return
+
+        try:
+            observer = Observer()
+            for directory in self.directories:
+                observer.schedule(self, directory, recursive=False)
+            observer.daemon = True
+            observer.start()
+        except Exception:
+            logger.exception("Unable to watch descriptors, checking them on a timer.")
+            return
+
+        self.observer = observer
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(str(path).endswith(".json") for path in paths):
+            self.changed.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep until a descriptor changes or the timeout passes.
+
+        Args:
+            timeout (float): Longest time to sleep, in seconds.
+
+        Returns:
+            bool: True if a descriptor changed.
+        """
+        changed = self.changed.wait(timeout)
+        if changed:
+            sleep(DESCRIPTOR_SETTLE_TIME)
+        self.changed.clear()
+        return changed
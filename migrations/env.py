@@ -2,6 +2,10 @@ from logging.config import fileConfig
 
 from alembic import context
 from data_resource_api.db import Base, engine
+from data_resource_api.db.operations import (
+    get_scope_filters,
+    process_revision_directives,
+)
 
 # from sqlalchemy import pool
 
@@ -20,6 +24,11 @@ fileConfig(config.config_file_name, disable_existing_loggers=False)
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# DBHandler.revision() limits autogenerate to the tables that changed
+scope_filters = get_scope_filters(
+    target_metadata, config.attributes.get("revision_tables")
+)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +53,8 @@ def run_migrations_offline():
         literal_binds=True,
         compare_type=True,
         compare_server_default=True,
+        process_revision_directives=process_revision_directives,
+        **scope_filters,
     )
 
     with context.begin_transaction():
@@ -69,6 +80,8 @@ def run_migrations_online():
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            process_revision_directives=process_revision_directives,
+            **scope_filters,
         )
 
         with context.begin_transaction():
@@ -19,6 +19,8 @@ from data_resource_api.app.data_managers.data_resource_manager import (
     DataResourceManagerSync,
 )
 from data_resource_api.app.utils.junc_holder import JuncHolder
+from data_resource_api.app.utils.response_cache import ResponseCache
+from data_resource_api.app.utils.row_counter import RowCounter
 from data_resource_api.config import ConfigurationFactory
 from data_resource_api.logging import LogFactory
 from data_resource_api.utils import exponential_backoff
@@ -208,6 +210,10 @@ class Client:
                 con.execute(table.delete())
             trans.commit()
 
+        # The rows were removed behind the API's back
+        ResponseCache.reset()
+        RowCounter.reset()
+
     def stop_container(self):
         from data_resource_api.db.base import Base, engine
 
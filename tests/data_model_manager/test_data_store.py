@@ -0,0 +1,41 @@
+import pytest
+from data_resource_api.app.data_managers.data_manager import DataStore
+from data_resource_api.app.data_managers.data_model_manager import (
+    DataModelDescriptor,
+)
+from expects import be, be_none, equal, expect
+
+
+def setup_store():
+    data_store = DataStore("descriptor_file_name")
+    data_store.append(DataModelDescriptor("a.json", "a", "1"))
+    data_store.append(DataModelDescriptor("B.json", "b", "2"))
+    return data_store
+
+
+@pytest.mark.unit
+def test_finds_names_case_insensitively():
+    data_store = setup_store()
+
+    expect("b.json" in data_store).to(equal(True))
+    expect("A.JSON" in data_store).to(equal(True))
+    expect("c.json" in data_store).to(equal(False))
+
+    expect(data_store.get("b.JSON").schema_name).to(equal("b"))
+    expect(data_store.get("c.json")).to(be_none)
+
+    expect(data_store.index("B.JSON")).to(equal(1))
+    expect(data_store.index("c.json")).to(equal(-1))
+
+
+@pytest.mark.unit
+def test_replaces_objects_with_the_same_name():
+    data_store = setup_store()
+    replacement = DataModelDescriptor("A.json", "a", "3")
+
+    data_store.append(replacement)
+
+    expect(len(data_store)).to(equal(2))
+    expect(data_store.get("a.json")).to(be(replacement))
+    expect(data_store.index("a.json")).to(equal(0))
+    expect([d.schema_name for d in data_store]).to(equal(["a", "b"]))
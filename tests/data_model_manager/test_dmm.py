@@ -1,11 +1,17 @@
-from tests.schemas import frameworks_descriptor, skills_descriptor
+from tests.schemas import (
+    credentials_descriptor,
+    frameworks_descriptor,
+    skills_descriptor,
+)
 
 import pytest
 from data_resource_api.app.data_managers.data_model_manager import (
     DataModelDescriptor,
     DataModelManagerSync,
 )
+from data_resource_api.app.utils.descriptor import Descriptor
 from expects import equal, expect
+from sqlalchemy.ext.declarative import declarative_base
 
 
 def setup_dmm_store():
@@ -85,3 +91,74 @@ def test_get_data_index():
     expect(DMM.get_data_model_index("b")).to(equal(1))
 
     expect(DMM.get_data_model_index("d")).to(equal(-1))
+
+
+@pytest.mark.unit
+def test_migrates_changed_descriptors_at_once(mocker):
+    DMM = DataModelManagerSync(
+        base=declarative_base(),
+        use_local_dirs=False,
+        descriptors=[credentials_descriptor, skills_descriptor],
+    )
+    mocker.patch.object(DMM.db, "get_model_checksum", return_value=None)
+    revision = mocker.patch.object(DMM.db, "revision")
+    upgrade = mocker.patch.object(DMM.db, "upgrade")
+    save_model_checksums = mocker.patch.object(
+        DMM.db, "save_model_checksums", return_value=True
+    )
+
+    DMM.monitor_data_models()
+
+    revision.assert_called_once_with(
+        None,
+        message="Create table credentials, skills",
+        table_names=None,
+    )
+    upgrade.assert_called_once_with()
+    saved = save_model_checksums.call_args[0][0]
+    expect([table_name for table_name, _, _ in saved]).to(
+        equal(["credentials", "skills"])
+    )
+    expect(DMM.pending_descriptors).to(equal([]))
+
+    # Nothing changed, so nothing is migrated again
+    DMM.monitor_data_models()
+    revision.assert_called_once()
+
+    # Later revisions only compare the changed tables
+    DMM.pending_migrations.append((Descriptor(skills_descriptor), False))
+    DMM.apply_changes()
+    revision.assert_called_with(
+        None, message="Update table skills", table_names=["skills"]
+    )
+
+
+@pytest.mark.unit
+def test_migrates_one_at_a_time_when_changes_fail(mocker):
+    DMM = DataModelManagerSync(
+        base=declarative_base(),
+        use_local_dirs=False,
+        descriptors=[credentials_descriptor, skills_descriptor],
+    )
+    mocker.patch.object(DMM.db, "get_model_checksum", return_value=None)
+    revision = mocker.patch.object(DMM.db, "revision", side_effect=["1", "2", "3"])
+    # Both at once, then credentials alone, then skills alone
+    mocker.patch.object(DMM.db, "upgrade", side_effect=[Exception(), None, Exception()])
+    discard_revision = mocker.patch.object(DMM.db, "discard_revision")
+    save_model_checksums = mocker.patch.object(
+        DMM.db, "save_model_checksums", return_value=True
+    )
+
+    DMM.monitor_data_models()
+
+    expect([call.kwargs["table_names"] for call in revision.call_args_list]).to(
+        equal([None, ["credentials"], ["skills"]])
+    )
+    expect([call.args[0] for call in discard_revision.call_args_list]).to(
+        equal(["1", "3"])
+    )
+    save_model_checksums.assert_called_once()
+    expect(save_model_checksums.call_args[0][0][0][0]).to(equal("credentials"))
+    expect(DMM.data_model_exists("credentials.json")).to(equal(True))
+    # A model whose table was not created is migrated again on the next check
+    expect(DMM.data_model_exists("skills.json")).to(equal(False))
@@ -0,0 +1,133 @@
+import copy
+from time import sleep
+from tests.schemas import (
+    credentials_descriptor,
+    programs_descriptor,
+    skills_descriptor,
+)
+
+import pytest
+from data_resource_api.app.data_managers.data_resource_manager import (
+    DataResource,
+    DataResourceManagerSync,
+)
+from data_resource_api.app.utils.descriptor import Descriptor
+from data_resource_api.app.utils.model_changes import ModelChangeListener
+from data_resource_api.db import Checksum
+from expects import be_none, equal, expect
+from sqlalchemy.ext.declarative import declarative_base
+
+
+def changed_credentials_descriptor():
+    descriptor = copy.deepcopy(credentials_descriptor)
+    descriptor["api"]["methods"][0]["post"]["enabled"] = False
+    fields = descriptor["datastore"]["schema"]["fields"]
+    fields[1]["description"] = "The name of the credential"
+    return descriptor
+
+
+def changed_programs_descriptor():
+    descriptor = copy.deepcopy(programs_descriptor)
+    methods = descriptor["api"]["methods"][0]["custom"][0]["methods"][0]
+    methods["get"]["enabled"] = False
+    methods["patch"]["secured"] = True
+    fields = descriptor["datastore"]["schema"]["fields"]
+    fields[1]["description"] = "The name of the program"
+    return descriptor
+
+
+@pytest.mark.requiresdb
+def test_listener_collects_changed_models(_regular_client, regular_client):
+    db = _regular_client.data_model_manager.db
+    listener = ModelChangeListener()
+    listener.start()
+    for _ in range(50):
+        if listener.listening:
+            break
+        sleep(0.1)
+
+    # Notifications may have been missed before connecting
+    expect(listener.take_changes()).to(be_none)
+    expect(listener.take_changes()).to(equal(set()))
+
+    db.add_model_checksum("credentials", "1", credentials_descriptor)
+    db.update_model_checksum("credentials", "2", credentials_descriptor)
+    listener.wait(5)
+
+    expect(listener.take_changes()).to(equal({"credentials"}))
+
+
+@pytest.mark.requiresdb
+def test_reloads_changed_models_from_the_database(_regular_client, regular_client):
+    manager = _regular_client.data_resource_manager
+    descriptor = Descriptor(changed_credentials_descriptor())
+    manager.db.add_model_checksum(
+        "credentials", descriptor.get_checksum(), descriptor.descriptor
+    )
+
+    manager.model_listener.missed = False
+    manager.model_listener.table_names = {"credentials"}
+    try:
+        manager.reload_changed_models()
+
+        checksum = descriptor.get_checksum()
+        expect(manager.data_resource_changed("credentials", checksum)).to(equal(False))
+        response = regular_client.post("/credentials", json={"credential_name": "a"})
+        expect(response.status_code).to(equal(405))
+    finally:
+        manager.process_descriptor(Descriptor(credentials_descriptor))
+
+    response = regular_client.post("/credentials", json={"credential_name": "a"})
+    expect(response.status_code).to(equal(201))
+
+
+@pytest.mark.requiresdb
+def test_reloads_relationship_settings(_regular_client, regular_client):
+    manager = _regular_client.data_resource_manager
+    routes = ["/programs/1/credentials", "/credentials/1/programs"]
+
+    manager.process_descriptor(Descriptor(changed_programs_descriptor()))
+    try:
+        relationships = manager.get_data_resource("programs").relationships_object
+        for route in routes:
+            expect(regular_client.get(route).status_code).to(equal(405))
+        for route in ("/programs/credentials", "/credentials/programs"):
+            dispatch_table = relationships.compiled.dispatch_table
+            expect(dispatch_table[("patch", route, "1.0.0")].secured).to(equal(True))
+    finally:
+        manager.process_descriptor(Descriptor(programs_descriptor))
+
+    for route in routes:
+        expect(regular_client.get(route).status_code).to(equal(200))
+
+
+@pytest.mark.unit
+def test_loads_models_migrated_while_not_listening(mocker):
+    manager = DataResourceManagerSync(
+        base=declarative_base(), use_local_dirs=False, descriptors=[]
+    )
+    served = DataResource()
+    served.data_resource_name = "credentials"
+    served.data_model_name = "credentials"
+    served.checksum = "1"
+    manager.data_store.append(served)
+
+    # The skills table appeared while the listener was reconnecting
+    mocker.patch.object(manager.model_listener, "take_changes", return_value=None)
+    mocker.patch.object(
+        manager.db,
+        "get_model_checksums",
+        return_value={"credentials": "1", "skills": "2"},
+    )
+    get_model_checksum = mocker.patch.object(
+        manager.db,
+        "get_model_checksum",
+        return_value=Checksum(descriptor_json=skills_descriptor),
+    )
+    process_descriptor = mocker.patch.object(manager, "process_descriptor")
+
+    manager.reload_changed_models()
+
+    get_model_checksum.assert_called_once_with("skills")
+    descriptor = process_descriptor.call_args[0][0]
+    expect(descriptor.table_name).to(equal("skills"))
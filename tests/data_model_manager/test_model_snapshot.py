@@ -0,0 +1,109 @@
+import copy
+from tests.schemas import credentials_descriptor, skills_descriptor
+
+import pytest
+from data_resource_api.app.data_managers.data_resource_manager import (
+    DataResourceManagerSync,
+)
+from data_resource_api.app.utils.descriptor import Descriptor
+from data_resource_api.app.utils.model_snapshot import compile_snapshot
+from data_resource_api.app.utils.resource_validator import compile_fields
+from expects import equal, expect
+from sqlalchemy.ext.declarative import declarative_base
+
+
+def changed_skills_descriptor():
+    descriptor = copy.deepcopy(skills_descriptor)
+    fields = descriptor["datastore"]["schema"]["fields"]
+    fields.append({"name": "level", "type": "integer", "required": False})
+    return descriptor
+
+
+@pytest.mark.unit
+def test_compiles_changed_models_only(mocker):
+    validate = mocker.patch(
+        "data_resource_api.app.utils.model_snapshot.validate_table_schema",
+        return_value=True,
+    )
+    checksums = [
+        ("skills", "1", skills_descriptor),
+        ("credentials", "2", credentials_descriptor),
+    ]
+
+    snapshot_checksum, models = compile_snapshot(checksums)
+
+    expect(models).to(
+        equal(
+            [
+                {
+                    "table_name": "credentials",
+                    "checksum": Descriptor(credentials_descriptor).get_checksum(),
+                    "model_checksum": "2",
+                    "schema_valid": True,
+                    "fields": compile_fields(
+                        credentials_descriptor["datastore"]["schema"]
+                    ),
+                },
+                {
+                    "table_name": "skills",
+                    "checksum": Descriptor(skills_descriptor).get_checksum(),
+                    "model_checksum": "1",
+                    "schema_valid": True,
+                    "fields": compile_fields(skills_descriptor["datastore"]["schema"]),
+                },
+            ]
+        )
+    )
+    expect(validate.call_count).to(equal(2))
+
+    # Nothing changed, so nothing is validated again
+    expect(compile_snapshot(checksums, models)).to(equal((snapshot_checksum, models)))
+    expect(validate.call_count).to(equal(2))
+
+    changed_checksum, _ = compile_snapshot(
+        [("skills", "3", changed_skills_descriptor()), checksums[1]], models
+    )
+    expect(changed_checksum == snapshot_checksum).to(equal(False))
+    expect(validate.call_count).to(equal(3))
+
+
+@pytest.mark.requiresdb
+def test_loads_data_resources_from_the_snapshot(
+    _regular_client, regular_client, mocker
+):
+    descriptor = Descriptor(credentials_descriptor)
+    checksum = descriptor.get_checksum()
+    db = _regular_client.data_model_manager.db
+    db.save_model_checksums([("credentials", checksum, descriptor.descriptor)])
+
+    compiled_model = db.get_model_snapshot()["credentials"]
+    expect(compiled_model["checksum"]).to(equal(checksum))
+    expect(compiled_model["schema_valid"]).to(equal(True))
+
+    manager = DataResourceManagerSync(
+        base=declarative_base(),
+        use_local_dirs=False,
+        descriptors=[credentials_descriptor],
+    )
+    manager.create_app()
+    validate = mocker.patch(
+        "data_resource_api.app.data_managers.data_resource_manager."
+        "validate_table_schema"
+    )
+    compile_fields = mocker.patch(
+        "data_resource_api.app.utils.resource_validator.compile_fields"
+    )
+    get_model_checksum = mocker.spy(manager.db, "get_model_checksum")
+
+    manager.run(True)
+
+    expect(validate.called).to(equal(False))
+    expect(compile_fields.called).to(equal(False))
+    expect(get_model_checksum.called).to(equal(False))
+    data_resource = manager.get_data_resource("credentials")
+    expect(data_resource.validator.schema_valid).to(equal(True))
+    expect(data_resource.validator.field_names).to(
+        equal(tuple(compiled_model["fields"]["field_names"]))
+    )
+    expect(data_resource.model_checksum).to(equal(checksum))
+    expect(manager.compiled_models).to(equal({}))
@@ -0,0 +1,207 @@
+import pytest
+from alembic.autogenerate import produce_migrations, render_python_code
+from alembic.migration import MigrationContext
+from alembic.operations import Operations, ops
+from data_resource_api.db import engine
+from data_resource_api.db.operations import (
+    CreateIndexConcurrentlyOp,
+    get_revision_scope,
+    get_scope_filters,
+    rebuild_computed_columns,
+    use_concurrent_indexes,
+)
+from data_resource_api.factories.orm_factory import SEARCH_COLUMN, ORMFactory
+from expects import be_a, be_none, contain, equal, expect
+from sqlalchemy import (
+    Column,
+    Computed,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+)
+from sqlalchemy.ext.declarative import declarative_base
+
+
+def create_index_op(table_name):
+    return ops.CreateIndexOp(f"ix_{table_name}_name", table_name, ["name"])
+
+
+@pytest.mark.unit
+def test_indexes_existing_tables_concurrently():
+    migration = use_concurrent_indexes(
+        [
+            ops.CreateTableOp("new_things", []),
+            ops.ModifyTableOps("new_things", [create_index_op("new_things")]),
+            ops.ModifyTableOps("things", [create_index_op("things")]),
+        ],
+        {"new_things"},
+    )
+
+    expect(type(migration[1].ops[0])).to(equal(ops.CreateIndexOp))
+    expect(migration[2].ops[0]).to(be_a(CreateIndexConcurrentlyOp))
+    expect(migration[2].ops[0].reverse()).to(be_a(ops.DropIndexOp))
+    expect(render_python_code(ops.UpgradeOps(migration[2:]))).to(
+        contain("op.create_index_concurrently('ix_things_name', 'things', ['name']")
+    )
+
+
+@pytest.mark.requiresdb
+def test_create_index_concurrently():
+    metadata = MetaData()
+    table = Table(
+        "concurrent_things",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String),
+    )
+    metadata.create_all(engine)
+    try:
+        with engine.connect() as connection:
+            context = MigrationContext.configure(connection)
+            with context.begin_transaction():
+                Operations(context).create_index_concurrently(
+                    "ix_concurrent_things_name", "concurrent_things", ["name"]
+                )
+
+        indexes = inspect(engine).get_indexes("concurrent_things")
+        expect([index["name"] for index in indexes]).to(
+            equal(["ix_concurrent_things_name"])
+        )
+    finally:
+        table.drop(engine)
+
+
+@pytest.mark.unit
+def test_rebuilds_computed_columns_when_their_comment_changes():
+    metadata = MetaData()
+    table = Table(
+        "things",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String),
+        Column("name_length", Integer, Computed("length(name)"), comment="new"),
+    )
+    Index("ix_things_name_length", table.c.name_length)
+
+    migration = rebuild_computed_columns(
+        [
+            ops.ModifyTableOps(
+                "things",
+                [
+                    ops.AlterColumnOp(
+                        "things", "name", modify_comment="name", existing_comment=None
+                    ),
+                    ops.AlterColumnOp(
+                        "things",
+                        "name_length",
+                        modify_comment="new",
+                        existing_comment="old",
+                    ),
+                ],
+            )
+        ],
+        metadata,
+    )
+
+    expect([type(op) for op in migration[0].ops]).to(
+        equal([ops.AlterColumnOp, ops.DropColumnOp, ops.AddColumnOp, ops.CreateIndexOp])
+    )
+    expect(migration[0].ops[2].column.computed).not_to(be_none)
+
+
+def make_related_tables(metadata):
+    Table("owners", metadata, Column("id", Integer, primary_key=True))
+    Table(
+        "pets",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("owner", Integer, ForeignKey("owners.id")),
+    )
+    Table("toys", metadata, Column("id", Integer, primary_key=True))
+    Table(
+        "pets/toys",
+        metadata,
+        Column("pets_id", Integer, ForeignKey("pets.id"), primary_key=True),
+        Column("toys_id", Integer, ForeignKey("toys.id"), primary_key=True),
+    )
+
+
+@pytest.mark.unit
+def test_revision_scope_includes_related_tables():
+    metadata = MetaData()
+    make_related_tables(metadata)
+
+    expect(get_revision_scope(metadata, {"pets"})).to(
+        equal({"pets", "owners", "pets/toys"})
+    )
+    expect(get_revision_scope(metadata, {"toys"})).to(equal({"toys", "pets/toys"}))
+    expect(get_revision_scope(metadata, {"owners"})).to(equal({"owners", "pets"}))
+
+
+@pytest.mark.requiresdb
+def test_scope_filters_limit_autogenerate():
+    existing = MetaData()
+    Table("scoped_kept", existing, Column("id", Integer, primary_key=True))
+    existing.create_all(engine)
+
+    metadata = MetaData()
+    make_related_tables(metadata)
+    try:
+        with engine.connect() as connection:
+            context = MigrationContext.configure(
+                connection, opts=get_scope_filters(metadata, {"toys"})
+            )
+            migration = produce_migrations(context, metadata)
+    finally:
+        existing.drop_all(engine)
+
+    # Other tables are neither created nor dropped
+    created = [
+        op.table_name
+        for op in migration.upgrade_ops.ops
+        if isinstance(op, ops.CreateTableOp)
+    ]
+    expect(sorted(created)).to(equal(["pets/toys", "toys"]))
+    expect(
+        [op for op in migration.upgrade_ops.ops if isinstance(op, ops.DropTableOp)]
+    ).to(equal([]))
+
+
+@pytest.mark.requiresdb
+def test_drops_search_column_no_longer_declared():
+    table_schema = {
+        "fields": [
+            {"name": "id", "type": "integer", "required": False},
+            {"name": "name", "type": "string", "searchable": True},
+        ],
+        "primaryKey": "id",
+    }
+    base = declarative_base()
+    factory = ORMFactory(base)
+    factory.create_orm_from_dict(table_schema, "searched_things", {"custom": []})
+    base.metadata.create_all(engine)
+
+    try:
+        del table_schema["fields"][1]["searchable"]
+        factory.create_orm_from_dict(table_schema, "searched_things", {"custom": []})
+        with engine.connect() as connection:
+            context = MigrationContext.configure(connection)
+            migration = produce_migrations(context, base.metadata)
+    finally:
+        base.metadata.tables["searched_things"].drop(engine)
+
+    table_ops = [
+        op
+        for modify_ops in migration.upgrade_ops.ops
+        if isinstance(modify_ops, ops.ModifyTableOps)
+        and modify_ops.table_name == "searched_things"
+        for op in modify_ops.ops
+    ]
+    expect([type(op) for op in table_ops]).to(
+        equal([ops.DropIndexOp, ops.DropColumnOp])
+    )
+    expect(table_ops[1].column_name).to(equal(SEARCH_COLUMN))
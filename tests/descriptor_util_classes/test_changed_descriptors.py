@@ -0,0 +1,79 @@
+import json
+import os
+from tests.schemas import frameworks_descriptor, skills_descriptor
+
+import pytest
+from data_resource_api.app.utils.descriptor import ChangedDescriptorsFromDirectory
+from data_resource_api.monitor.descriptor_watcher import DescriptorWatcher
+from expects import be_false, be_true, equal, expect
+
+
+def write_descriptor(directory, file_name: str, descriptor: dict):
+    file_path = os.path.join(directory, file_name)
+    with open(file_path, "w") as fh:
+        json.dump(descriptor, fh)
+    return file_path
+
+
+def file_names(descriptors) -> list:
+    return [descriptor.file_name for descriptor in descriptors]
+
+
+@pytest.mark.unit
+def test_yields_only_changed_files(tmp_path):
+    write_descriptor(tmp_path, "frameworks.json", frameworks_descriptor)
+    write_descriptor(tmp_path, "skills.json", skills_descriptor)
+    files = ChangedDescriptorsFromDirectory([str(tmp_path)])
+
+    expect(file_names(files.iter_files())).to(
+        equal(["frameworks.json", "skills.json"])
+    )
+    expect(file_names(files.iter_files())).to(equal([]))
+
+    changed = dict(skills_descriptor, datastore={"tablename": "skill_list"})
+    write_descriptor(tmp_path, "skills.json", changed)
+
+    expect(file_names(files.iter_files())).to(equal(["skills.json"]))
+
+
+@pytest.mark.unit
+def test_does_not_yield_touched_files(tmp_path):
+    file_path = write_descriptor(tmp_path, "skills.json", skills_descriptor)
+    files = ChangedDescriptorsFromDirectory([str(tmp_path)])
+    list(files.iter_files())
+
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    expect(file_names(files.iter_files())).to(equal([]))
+
+
+@pytest.mark.unit
+def test_yields_forgotten_and_added_again_files(tmp_path):
+    file_path = write_descriptor(tmp_path, "skills.json", skills_descriptor)
+    files = ChangedDescriptorsFromDirectory([str(tmp_path)])
+    list(files.iter_files())
+
+    files.forget("skills.json")
+    expect(file_names(files.iter_files())).to(equal(["skills.json"]))
+
+    os.remove(file_path)
+    expect(file_names(files.iter_files())).to(equal([]))
+
+    write_descriptor(tmp_path, "skills.json", skills_descriptor)
+    expect(file_names(files.iter_files())).to(equal(["skills.json"]))
+
+
+@pytest.mark.unit
+def test_watcher_wakes_on_descriptor_changes(tmp_path):
+    watcher = DescriptorWatcher([str(tmp_path)])
+    watcher.start()
+    try:
+        (tmp_path / "notes.txt").write_text("not a descriptor")
+        expect(watcher.wait(0.5)).to(be_false)
+
+        write_descriptor(tmp_path, "skills.json", skills_descriptor)
+        expect(watcher.wait(10)).to(be_true)
+    finally:
+        watcher.observer.stop()
+        watcher.observer.join()
@@ -1,3 +1,5 @@
+from copy import deepcopy
+
 from tests.schemas import frameworks_descriptor
 
 import pytest
@@ -50,3 +52,30 @@ def test_descriptor_with_file_name():
     desc = Descriptor(frameworks_descriptor, "asdf.json")
     file_name = desc.file_name
     expect(file_name).to(equal("asdf.json"))
+
+
+@pytest.mark.unit
+def test_checksum_includes_declared_indexes():
+    descriptor = deepcopy(frameworks_descriptor)
+    checksum = Descriptor(descriptor).get_checksum()
+    expect(Descriptor(descriptor).indexes).to(equal([]))
+
+    descriptor["datastore"]["indexes"] = [{"fields": ["name"]}]
+
+    expect(Descriptor(descriptor).get_checksum()).not_to(equal(checksum))
+    descriptor["datastore"]["indexes"] = []
+    expect(Descriptor(descriptor).get_checksum()).to(equal(checksum))
+
+
+@pytest.mark.unit
+def test_checksum_includes_enforce_unique():
+    descriptor = deepcopy(frameworks_descriptor)
+    checksum = Descriptor(descriptor).get_checksum()
+    expect(Descriptor(descriptor).enforce_unique).to(equal(False))
+
+    descriptor["datastore"]["enforce_unique"] = True
+
+    expect(Descriptor(descriptor).enforce_unique).to(equal(True))
+    expect(Descriptor(descriptor).get_checksum()).not_to(equal(checksum))
+    descriptor["datastore"]["enforce_unique"] = False
+    expect(Descriptor(descriptor).get_checksum()).to(equal(checksum))
@@ -213,3 +213,12 @@ def test_any(everything_client):
     #     "required": False
     # }
     run_query(everything_client, "any", "asdf1234")
+
+
+@pytest.mark.requiresdb
+def test_invalid_value_for_type(everything_client):
+    response = everything_client.post(ROUTE, json={"integer": "not a number"})
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(400))
+    expect(body["errors"]).to(equal(["Field 'integer' must be of type 'integer'."]))
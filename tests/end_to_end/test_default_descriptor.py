@@ -1,9 +1,22 @@
+import csv
+import io
 import json
+from time import sleep
 
 from tests.service import ApiHelper
 
 import pytest
-from expects import be_an, be_empty, equal, expect, have_property, raise_error
+from data_resource_api.app.utils.response_cache import ResponseCache
+from expects import (
+    be_an,
+    be_empty,
+    contain,
+    equal,
+    expect,
+    have_key,
+    have_property,
+    raise_error,
+)
 
 
 @pytest.mark.requiresdb
@@ -77,3 +90,657 @@ def test_pagination(regular_client):
     body = ApiHelper.get_credential(regular_client, None, "?offset=20&limit=20")
     expect(len(body["credentials"])).to(equal(20))
     # TODO need a test asserting the correct items return on this page
+
+
+@pytest.mark.requiresdb
+def test_cursor_pagination(regular_client):
+    credential_ids = []
+    for _ in range(25):
+        post_body = {"credential_name": "testtesttest"}
+        credential_ids.append(ApiHelper.post_a_credential(regular_client, post_body))
+
+    # An empty cursor starts at the first page
+    body = ApiHelper.get_credential(regular_client, None, "?after=&limit=10")
+    expect([c["id"] for c in body["credentials"]]).to(equal(credential_ids[:10]))
+
+    links = {link["rel"]: link["href"] for link in body["links"]}
+    expect(links).not_to(have_property("prev"))
+
+    # Walk forward with the next link
+    next_page = links["next"].replace("/credentials", "")
+    body = ApiHelper.get_credential(regular_client, None, next_page)
+    expect([c["id"] for c in body["credentials"]]).to(equal(credential_ids[10:20]))
+
+    links = {link["rel"]: link["href"] for link in body["links"]}
+    next_page = links["next"].replace("/credentials", "")
+    body = ApiHelper.get_credential(regular_client, None, next_page)
+    expect([c["id"] for c in body["credentials"]]).to(equal(credential_ids[20:]))
+
+    links = {link["rel"]: link["href"] for link in body["links"]}
+    expect(links).not_to(have_property("next"))
+
+    # Walk back with the prev link
+    prev_page = links["prev"].replace("/credentials", "")
+    body = ApiHelper.get_credential(regular_client, None, prev_page)
+    expect([c["id"] for c in body["credentials"]]).to(equal(credential_ids[10:20]))
+
+
+@pytest.mark.requiresdb
+def test_cursor_pagination_invalid_cursor(regular_client):
+    response = regular_client.get("/credentials?after=notacursor")
+    expect(response.status_code).to(equal(400))
+
+    response = regular_client.get("/credentials?after=&before=")
+    expect(response.status_code).to(equal(400))
+
+
+@pytest.mark.requiresdb
+def test_pagination_without_count(regular_client):
+    for _ in range(25):
+        post_body = {"credential_name": "testtesttest"}
+        _ = ApiHelper.post_a_credential(regular_client, post_body)
+
+    body = ApiHelper.get_credential(
+        regular_client, None, "?offset=0&limit=20&count=false"
+    )
+    expect(len(body["credentials"])).to(equal(20))
+
+    rels = [link["rel"] for link in body["links"]]
+    expect(rels).to(equal(["self", "first", "next"]))
+
+    body = ApiHelper.get_credential(
+        regular_client, None, "?offset=20&limit=20&count=false"
+    )
+    expect(len(body["credentials"])).to(equal(5))
+
+    rels = [link["rel"] for link in body["links"]]
+    expect(rels).to(equal(["self", "first", "prev"]))
+
+
+@pytest.mark.requiresdb
+def test_export_ndjson(regular_client):
+    credential_ids = []
+    for idx in range(5):
+        post_body = {"credential_name": f"credential {idx}"}
+        credential_ids.append(ApiHelper.post_a_credential(regular_client, post_body))
+
+    response = regular_client.get(
+        "/credentials/export", headers={"Accept": "application/x-ndjson"}
+    )
+    expect(response.status_code).to(equal(200))
+    expect(response.mimetype).to(equal("application/x-ndjson"))
+
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    expect([row["id"] for row in rows]).to(equal(credential_ids))
+    expect(rows[0]["credential_name"]).to(equal("credential 0"))
+
+
+@pytest.mark.requiresdb
+def test_export_csv(regular_client):
+    for idx in range(3):
+        post_body = {"credential_name": f"credential, {idx}"}
+        _ = ApiHelper.post_a_credential(regular_client, post_body)
+
+    response = regular_client.get("/credentials/export", headers={"Accept": "text/csv"})
+    expect(response.status_code).to(equal(200))
+    expect(response.mimetype).to(equal("text/csv"))
+
+    rows = list(csv.reader(io.StringIO(response.data.decode())))
+    expect(rows[0]).to(equal(["id", "credential_name"]))
+    expect(len(rows)).to(equal(4))
+    expect(rows[1][1]).to(equal("credential, 0"))
+
+
+@pytest.mark.requiresdb
+def test_export_unsupported_format(regular_client):
+    response = regular_client.get(
+        "/credentials/export", headers={"Accept": "application/xml"}
+    )
+    expect(response.status_code).to(equal(406))
+
+
+@pytest.mark.requiresdb
+def test_bulk_insert(regular_client):
+    post_body = [{"credential_name": f"credential {idx}"} for idx in range(5)]
+    response = regular_client.post("/credentials", json=post_body)
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(201))
+    expect(len(body["ids"])).to(equal(5))
+    expect(body).not_to(have_property("errors"))
+
+    credential = ApiHelper.get_credential(regular_client, body["ids"][3])
+    expect(credential["credential_name"]).to(equal("credential 3"))
+
+
+@pytest.mark.requiresdb
+def test_bulk_insert_matches_ids_to_items(regular_client):
+    post_body = [{"credential_name": f"credential {idx}"} for idx in range(4)]
+    post_body.insert(2, {"credential_name": "with id", "id": 98765})
+    response = regular_client.post("/credentials", json=post_body)
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(201))
+    expect(body["ids"][2]).to(equal(98765))
+    for item, id_value in zip(post_body, body["ids"]):
+        credential = ApiHelper.get_credential(regular_client, id_value)
+        expect(credential["credential_name"]).to(equal(item["credential_name"]))
+
+
+@pytest.mark.requiresdb
+def test_bulk_insert_ndjson(regular_client):
+    lines = [json.dumps({"credential_name": f"credential {idx}"}) for idx in range(3)]
+    response = regular_client.post(
+        "/credentials",
+        data="\n".join(lines),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(201))
+    expect(len(body["ids"])).to(equal(3))
+
+
+@pytest.mark.requiresdb
+def test_bulk_insert_reports_invalid_items(regular_client):
+    post_body = [
+        {"credential_name": "valid"},
+        {"credential_name": "unknown", "not_a_field": 1},
+        {},
+    ]
+    response = regular_client.post("/credentials", json=post_body)
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(201))
+    expect(body["ids"][0]).to(be_an(int))
+    expect(body["ids"][1:]).to(equal([None, None]))
+    expect([error["index"] for error in body["errors"]]).to(equal([1, 2]))
+
+    response = regular_client.post("/credentials", json=[{}])
+    expect(response.status_code).to(equal(400))
+
+
+@pytest.mark.requiresdb
+def test_upsert(regular_client):
+    credential_id = ApiHelper.post_a_credential(
+        regular_client, {"credential_name": "old name"}
+    )
+
+    post_body = [
+        {"id": credential_id, "credential_name": "new name"},
+        {"credential_name": "another credential"},
+    ]
+    response = regular_client.post("/credentials/upsert", json=post_body)
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    expect(body["inserted"]).to(equal(1))
+    expect(body["updated"]).to(equal(1))
+    expect(body["ids"][0]).to(equal(credential_id))
+
+    credential = ApiHelper.get_credential(regular_client, credential_id)
+    expect(credential["credential_name"]).to(equal("new name"))
+
+    credential = ApiHelper.get_credential(regular_client, body["ids"][1])
+    expect(credential["credential_name"]).to(equal("another credential"))
+
+
+@pytest.mark.requiresdb
+def test_upsert_matches_results_to_items(regular_client):
+    credential_id = ApiHelper.post_a_credential(
+        regular_client, {"credential_name": "old name"}
+    )
+
+    post_body = [
+        {"credential_name": "first new"},
+        {"id": credential_id, "credential_name": "renamed"},
+        {"credential_name": "second new"},
+        {"id": credential_id, "credential_name": "renamed again"},
+    ]
+    response = regular_client.post("/credentials/upsert", json=post_body)
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    expect(body).not_to(have_property("errors"))
+    expect(body["inserted"]).to(equal(2))
+    expect(body["updated"]).to(equal(2))
+    expect(body["ids"][1]).to(equal(credential_id))
+    expect(body["ids"][3]).to(equal(credential_id))
+
+    names = ["first new", "renamed again", "second new", "renamed again"]
+    for name, id_value in zip(names, body["ids"]):
+        credential = ApiHelper.get_credential(regular_client, id_value)
+        expect(credential["credential_name"]).to(equal(name))
+
+
+@pytest.mark.requiresdb
+def test_conditional_get_one(regular_client):
+    credential_id = ApiHelper.post_a_credential(
+        regular_client, {"credential_name": "etag"}
+    )
+    route = f"/credentials/{credential_id}"
+
+    response = regular_client.get(route)
+    etag = response.headers["ETag"]
+    expect(response.status_code).to(equal(200))
+    expect(response.headers["Cache-Control"]).to(equal("private, max-age=60"))
+
+    response = regular_client.get(route, headers={"If-None-Match": etag})
+    expect(response.status_code).to(equal(304))
+    expect(response.data).to(equal(b""))
+    expect(response.headers["ETag"]).to(equal(etag))
+
+    put_body = {"credential_name": "new"}
+    ApiHelper.put_a_credential(regular_client, put_body, credential_id)
+
+    response = regular_client.get(route, headers={"If-None-Match": etag})
+    expect(response.status_code).to(equal(200))
+    expect(response.headers["ETag"]).not_to(equal(etag))
+
+
+@pytest.mark.requiresdb
+def test_conditional_get_all(regular_client):
+    _ = ApiHelper.post_a_credential(regular_client, {"credential_name": "first"})
+
+    response = regular_client.get("/credentials")
+    etag = response.headers["ETag"]
+
+    response = regular_client.get("/credentials", headers={"If-None-Match": etag})
+    expect(response.status_code).to(equal(304))
+
+    _ = ApiHelper.post_a_credential(regular_client, {"credential_name": "second"})
+
+    response = regular_client.get("/credentials", headers={"If-None-Match": etag})
+    expect(response.status_code).to(equal(200))
+    expect(len(json.loads(response.data)["credentials"])).to(equal(2))
+
+    response = regular_client.get("/credentials?after=")
+    etag = response.headers["ETag"]
+    response = regular_client.get(
+        "/credentials?after=", headers={"If-None-Match": etag}
+    )
+    expect(response.status_code).to(equal(304))
+
+
+@pytest.mark.requiresdb
+def test_cached_responses_follow_writes(regular_client):
+    credential_id = ApiHelper.post_a_credential(
+        regular_client, {"credential_name": "cached"}
+    )
+    body = ApiHelper.get_credential(regular_client, credential_id)
+    expect(body["credential_name"]).to(equal("cached"))
+
+    put_body = {"credential_name": "updated"}
+    ApiHelper.put_a_credential(regular_client, put_body, credential_id)
+    body = ApiHelper.get_credential(regular_client, credential_id)
+    expect(body["credential_name"]).to(equal("updated"))
+
+    response = regular_client.post("/credentials/query", json=put_body)
+    expect(response.status_code).to(equal(200))
+    _ = ApiHelper.post_a_credential(regular_client, put_body)
+    response = regular_client.post("/credentials/query", json=put_body)
+    expect(len(json.loads(response.data)["results"])).to(equal(2))
+
+
+@pytest.mark.requiresdb
+def test_cache_is_invalidated_by_other_workers(regular_client):
+    from data_resource_api.db import Session
+
+    ResponseCache.start_listener()
+    for _ in range(50):
+        if ResponseCache.listening:
+            break
+        sleep(0.1)
+
+    credential_id = ApiHelper.post_a_credential(
+        regular_client, {"credential_name": "cached"}
+    )
+
+    # The notification of the POST may arrive after the first read is cached
+    cache_key = ("1.0.0", ("id", "credential_name"), "get_one", credential_id)
+    for _ in range(50):
+        _ = ApiHelper.get_credential(regular_client, credential_id)
+        cached = ResponseCache.get("credentials", cache_key)
+        if cached is not None:
+            break
+        sleep(0.1)
+    expect(cached).not_to(equal(None))
+
+    # Write the way another worker would, through the database only
+    session = Session()
+    session.execute(
+        "UPDATE credentials SET credential_name = 'elsewhere' WHERE id = :id",
+        {"id": credential_id},
+    )
+    ResponseCache.notify(session, ["credentials"])
+    session.commit()
+    session.close()
+
+    for _ in range(50):
+        body = ApiHelper.get_credential(regular_client, credential_id)
+        if body["credential_name"] == "elsewhere":
+            break
+        sleep(0.1)
+
+    expect(body["credential_name"]).to(equal("elsewhere"))
+
+
+def post_a_program(client, program_name, **fields):
+    post_body = {
+        "program_name": program_name,
+        "program_code": 1,
+        "program_description": "description",
+        "program_status": "active",
+        "program_fees": 10.0,
+        "eligibility_criteria": "none",
+        "program_url": "https://example.com",
+    }
+    post_body.update(fields)
+    response = client.post("/programs", json=post_body)
+    expect(response.status_code).to(equal(201))
+    return json.loads(response.data)["id"]
+
+
+@pytest.mark.requiresdb
+def test_expand_many_to_many(regular_client):
+    credential_1 = ApiHelper.post_a_credential(regular_client, {"credential_name": "a"})
+    credential_2 = ApiHelper.post_a_credential(regular_client, {"credential_name": "b"})
+    program_1 = post_a_program(
+        regular_client, "one", credentials=[credential_2, credential_1]
+    )
+    program_2 = post_a_program(regular_client, "two")
+
+    response = regular_client.get("/programs?expand=credentials")
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    programs = {program["id"]: program for program in body["programs"]}
+    expect(programs[program_1]["credentials"]).to(
+        equal(sorted([credential_1, credential_2]))
+    )
+    expect(programs[program_2]["credentials"]).to(equal([]))
+
+    response = regular_client.get(f"/programs/{program_1}?expand=credentials")
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    expect(body["credentials"]).to(equal(sorted([credential_1, credential_2])))
+
+
+@pytest.mark.requiresdb
+def test_expand_foreign_key(regular_client):
+    credential_id = ApiHelper.post_a_credential(
+        regular_client, {"credential_name": "earned"}
+    )
+    program_1 = post_a_program(regular_client, "one", credential_earned=credential_id)
+    program_2 = post_a_program(regular_client, "two")
+
+    response = regular_client.get("/programs?expand=credential_earned&after=")
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    programs = {program["id"]: program for program in body["programs"]}
+    expect(programs[program_1]["credential_earned"]).to(
+        equal({"id": credential_id, "credential_name": "earned"})
+    )
+    expect(programs[program_2]["credential_earned"]).to(equal(None))
+
+
+@pytest.mark.requiresdb
+def test_expand_uses_one_query_per_relationship(regular_client):
+    from data_resource_api.db import engine
+    from sqlalchemy import event
+
+    credential_id = ApiHelper.post_a_credential(
+        regular_client, {"credential_name": "a"}
+    )
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def count_queries():
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            response = regular_client.get(
+                "/programs?expand=credentials,credential_earned&count=false"
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        expect(response.status_code).to(equal(200))
+        return len(statements)
+
+    post_a_program(
+        regular_client,
+        "one",
+        credentials=[credential_id],
+        credential_earned=credential_id,
+    )
+    one_program = count_queries()
+
+    for idx in range(5):
+        post_a_program(
+            regular_client,
+            f"program {idx}",
+            credentials=[credential_id],
+            credential_earned=credential_id,
+        )
+
+    expect(count_queries()).to(equal(one_program))
+
+
+@pytest.mark.requiresdb
+def test_expand_unknown_relationship(regular_client):
+    response = regular_client.get("/programs?expand=program_name")
+    expect(response.status_code).to(equal(400))
+
+    response = regular_client.get("/credentials?expand=programs")
+    expect(response.status_code).to(equal(400))
+
+
+@pytest.mark.requiresdb
+def test_sparse_fieldsets(regular_client):
+    credential_id = ApiHelper.post_a_credential(
+        regular_client, {"credential_name": "sparse"}
+    )
+
+    response = regular_client.get("/credentials?fields=credential_name")
+    body = json.loads(response.data)
+    expect(response.status_code).to(equal(200))
+    expect(body["credentials"]).to(equal([{"credential_name": "sparse"}]))
+
+    # Narrowed and full responses are cached apart
+    body = ApiHelper.get_credential(regular_client)
+    expect(body["credentials"]).to(
+        equal([{"id": credential_id, "credential_name": "sparse"}])
+    )
+
+    response = regular_client.get("/credentials?fields=id&after=")
+    body = json.loads(response.data)
+    expect(body["credentials"]).to(equal([{"id": credential_id}]))
+
+    response = regular_client.get(f"/credentials/{credential_id}?fields=id")
+    expect(json.loads(response.data)).to(equal({"id": credential_id}))
+
+    response = regular_client.post(
+        "/credentials/query?fields=id", json={"credential_name": "sparse"}
+    )
+    body = json.loads(response.data)
+    expect(body["results"]).to(equal([{"id": credential_id}]))
+
+
+@pytest.mark.requiresdb
+def test_sparse_fieldsets_unknown_field(regular_client):
+    response = regular_client.get("/credentials?fields=id,missing")
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(400))
+    expect(body["errors"]).to(equal(["Unknown or restricted field 'missing' found."]))
+
+
+@pytest.mark.requiresdb
+def test_query_operators_sort_and_cursor(regular_client, mocker):
+    fees = [5.0, 20.0, 10.0, 40.0, 30.0]
+    for idx, fee in enumerate(fees):
+        post_a_program(regular_client, f"program {idx}", program_fees=fee)
+    post_a_program(regular_client, "other", program_fees=15.0)
+
+    query = {
+        "program_name": {"startswith": "program"},
+        "or": [{"program_fees": {"gte": "10"}}, {"program_code": {"in": [2, 3]}}],
+        "sort": ["-program_fees"],
+        "limit": 2,
+    }
+
+    found = []
+    while True:
+        response = regular_client.post("/programs/query", json=query)
+        body = json.loads(response.data)
+        expect(response.status_code).to(equal(200))
+        found.extend(program["program_fees"] for program in body["results"])
+        if "next" not in body:
+            break
+        query["after"] = body["next"]
+
+    expect(found).to(equal([40.0, 30.0, 20.0, 10.0]))
+
+    # Without a limit results still come in pages, of the default size
+    mocker.patch("data_resource_api.app.utils.query_compiler.QUERY_DEFAULT_LIMIT", 3)
+    del query["limit"], query["after"]
+    response = regular_client.post("/programs/query", json=query)
+    body = json.loads(response.data)
+    expect(response.status_code).to(equal(200))
+    expect(len(body["results"])).to(equal(3))
+    expect(body).to(have_key("next"))
+
+
+@pytest.mark.requiresdb
+def test_query_invalid_operator(regular_client):
+    response = regular_client.post(
+        "/programs/query", json={"program_fees": {"between": [1, 2]}}
+    )
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(400))
+    expect(len(body["errors"])).to(equal(1))
+
+
+@pytest.mark.requiresdb
+def test_search_ranks_and_pages_matches(regular_client):
+    described = post_a_program(
+        regular_client, "Cooking", program_description="Welding for beginners"
+    )
+    named = post_a_program(
+        regular_client, "Welding", program_description="Learn to weld metal"
+    )
+    post_a_program(regular_client, "Nursing", program_description="Patient care")
+
+    response = regular_client.get("/programs/search?q=welding&limit=1")
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    expect([program["id"] for program in body["programs"]]).to(equal([named]))
+    expect(body["programs"][0]).not_to(have_key("search_vector"))
+    next_link = [link["href"] for link in body["links"] if link["rel"] == "next"]
+    expect(next_link).to(
+        equal(["/programs/search?q=welding&offset=1&limit=1&count=false"])
+    )
+
+    response = regular_client.get(next_link[0])
+    body = json.loads(response.data)
+
+    expect([program["id"] for program in body["programs"]]).to(equal([described]))
+    expect([link["rel"] for link in body["links"]]).not_to(contain("next"))
+
+
+@pytest.mark.requiresdb
+def test_search_needs_a_query(regular_client):
+    response = regular_client.get("/programs/search?q=%20")
+
+    expect(response.status_code).to(equal(400))
+
+
+@pytest.mark.requiresdb
+def test_search_needs_searchable_fields(regular_client):
+    response = regular_client.get("/credentials/search?q=welding")
+
+    expect(response.status_code).to(equal(405))
+
+
+@pytest.mark.requiresdb
+def test_aggregate_groups_matching_items(regular_client):
+    post_a_program(regular_client, "a", program_status="active", program_fees=10.0)
+    post_a_program(regular_client, "b", program_status="active", program_fees=30.0)
+    post_a_program(regular_client, "c", program_status="closed", program_fees=5.0)
+    post_a_program(regular_client, "d", program_status="closed", program_code=2)
+
+    response = regular_client.post(
+        "/programs/aggregate",
+        json={
+            "program_code": 1,
+            "group_by": ["program_status"],
+            "aggregates": {
+                "programs": {"count": "*"},
+                "total_fees": {"sum": "program_fees"},
+                "average_fees": {"avg": "program_fees"},
+            },
+        },
+    )
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    expect(body["results"]).to(
+        equal(
+            [
+                {
+                    "program_status": "active",
+                    "programs": 2,
+                    "total_fees": 40.0,
+                    "average_fees": 20.0,
+                },
+                {
+                    "program_status": "closed",
+                    "programs": 1,
+                    "total_fees": 5.0,
+                    "average_fees": 5.0,
+                },
+            ]
+        )
+    )
+
+
+@pytest.mark.requiresdb
+def test_aggregate_counts_without_groups(regular_client):
+    post_a_program(regular_client, "a")
+    post_a_program(regular_client, "b")
+
+    response = regular_client.post("/programs/aggregate", json={})
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    expect(body["results"]).to(equal([{"count": 2}]))
+
+
+@pytest.mark.requiresdb
+def test_aggregate_invalid_request(regular_client):
+    response = regular_client.post(
+        "/programs/aggregate",
+        json={
+            "group_by": ["missing"],
+            "aggregates": {"total": {"sum": "program_name"}},
+        },
+    )
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(400))
+    expect(body["errors"]).to(
+        equal(
+            [
+                "Unknown or restricted field 'missing' found.",
+                "Function 'sum' in aggregate 'total' cannot be computed over "
+                "field 'program_name'.",
+            ]
+        )
+    )
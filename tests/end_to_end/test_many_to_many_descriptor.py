@@ -60,6 +60,33 @@ def test_mn_put(frameworks_skills_client):
     ApiHelper.check_for_skills_on_framework(c, framework_id, [skill_3])
 
 
+@pytest.mark.requiresdb
+def test_mn_put_overlapping(frameworks_skills_client):
+    c = frameworks_skills_client
+
+    skill_1 = ApiHelper.post_a_skill(c, "skill1")
+    skill_2 = ApiHelper.post_a_skill(c, "skill2")
+    skill_3 = ApiHelper.post_a_skill(c, "skill3")
+    framework_id = ApiHelper.post_a_framework(c, [skill_1, skill_2])
+
+    response = c.put(
+        f"/frameworks/{framework_id}/skills", json={"skills": [skill_2, skill_3]}
+    )
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    expect(sorted(body["skills"])).to(equal([skill_2, skill_3]))
+    ApiHelper.check_for_skills_on_framework(c, framework_id, [skill_2, skill_3])
+
+    response = c.put(
+        f"/frameworks/{framework_id}/skills", json={"skills": [skill_3, skill_2]}
+    )
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(200))
+    expect(body["skills"]).to(equal([skill_2, skill_3]))
+
+
 @pytest.mark.requiresdb
 def test_mn_patch(frameworks_skills_client):
     c = frameworks_skills_client
@@ -76,6 +103,29 @@ def test_mn_patch(frameworks_skills_client):
     )
 
 
+@pytest.mark.requiresdb
+def test_mn_patch_existing_and_duplicate(frameworks_skills_client):
+    c = frameworks_skills_client
+
+    skill_1 = ApiHelper.post_a_skill(c, "skill1")
+    skill_2 = ApiHelper.post_a_skill(c, "skill2")
+    framework_id = ApiHelper.post_a_framework(c, [skill_1])
+
+    ApiHelper.patch_a_framework_skill(c, framework_id, [skill_1, skill_2, skill_2])
+    ApiHelper.check_for_skills_on_framework(c, framework_id, [skill_1, skill_2])
+
+
+@pytest.mark.requiresdb
+def test_mn_put_empty(frameworks_skills_client):
+    c = frameworks_skills_client
+
+    skill_1 = ApiHelper.post_a_skill(c, "skill1")
+    framework_id = ApiHelper.post_a_framework(c, [skill_1])
+
+    ApiHelper.put_a_framework_skill(c, framework_id, [])
+    ApiHelper.check_for_skills_on_framework(c, framework_id, [])
+
+
 @pytest.mark.requiresdb
 def test_mn_delete_one(frameworks_skills_client):
     c = frameworks_skills_client
@@ -130,3 +180,52 @@ def test_mn_reverse_relationship(frameworks_skills_client):
     resp = ApiHelper.get_frameworks_on_skill(c, skill_1)
 
     expect(resp["frameworks"]).to(equal([framework_id]))
+
+
+@pytest.mark.requiresdb
+def test_mn_bulk_insert(frameworks_skills_client):
+    c = frameworks_skills_client
+
+    skill_1 = ApiHelper.post_a_skill(c, "skill1")
+    skill_2 = ApiHelper.post_a_skill(c, "skill2")
+
+    post_body = [
+        {"name": "framework 1", "skills": [skill_1, skill_2, skill_1]},
+        {"name": "framework 2", "skills": [skill_2]},
+        {"name": "framework 3"},
+    ]
+    response = c.post("/frameworks", json=post_body)
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(201))
+    framework_1, framework_2, framework_3 = body["ids"]
+
+    ApiHelper.check_for_skills_on_framework(c, framework_1, [skill_1, skill_2])
+    ApiHelper.check_for_skills_on_framework(c, framework_2, [skill_2])
+    ApiHelper.check_for_skills_on_framework(c, framework_3, [])
+
+
+@pytest.mark.requiresdb
+def test_mn_bulk_insert_rejected_item(frameworks_skills_client):
+    c = frameworks_skills_client
+
+    skill_1 = ApiHelper.post_a_skill(c, "skill1")
+
+    post_body = [
+        {"name": "framework 1", "skills": [skill_1]},
+        {"name": "framework 2", "skills": [skill_1 + 1000]},
+    ]
+    response = c.post("/frameworks", json=post_body)
+    body = json.loads(response.data)
+
+    expect(response.status_code).to(equal(201))
+    expect(body["ids"][1]).to(equal(None))
+    expect(body["errors"][0]["index"]).to(equal(1))
+
+    ApiHelper.check_for_skills_on_framework(c, body["ids"][0], [skill_1])
+
+
+@pytest.mark.requiresdb
+def test_upsert_disabled(frameworks_skills_client):
+    response = frameworks_skills_client.post("/skills/upsert", json=[{"text": "a"}])
+    expect(response.status_code).to(equal(405))
@@ -0,0 +1,183 @@
+from copy import deepcopy
+
+import pytest
+from data_resource_api.factories.orm_factory import SEARCH_COLUMN, ORMFactory
+from expects import be_false, be_true, contain, equal, expect, have_len
+from sqlalchemy import UniqueConstraint
+
+
+TABLE_SCHEMA = {
+    "fields": [
+        {"name": "id", "type": "integer", "required": False},
+        {"name": "code", "type": "string", "required": True},
+        {"name": "name", "type": "string", "required": False},
+        {"name": "tags", "type": "array", "required": False},
+    ],
+    "primaryKey": "id",
+}
+
+API_SCHEMA = {"custom": []}
+
+
+def get_indexes(base, indexes):
+    data_model = ORMFactory(base).create_orm_from_dict(
+        TABLE_SCHEMA, "things", API_SCHEMA, indexes
+    )
+    return {index.name: index for index in data_model.__table__.indexes}
+
+
+@pytest.mark.unit
+def test_creates_no_indexes_by_default(base):
+    expect(get_indexes(base, [])).to(equal({}))
+
+
+@pytest.mark.unit
+def test_names_declared_indexes(base):
+    indexes = get_indexes(
+        base,
+        [
+            {"fields": ["name", "code"]},
+            {"fields": "code", "unique": True},
+            {"name": "things_by_name", "fields": ["name"]},
+        ],
+    )
+
+    expect(sorted(indexes)).to(
+        equal(["ix_things_name_code", "things_by_name", "ux_things_code"])
+    )
+    index = indexes["ix_things_name_code"]
+    expect([column.key for column in index.columns]).to(equal(["name", "code"]))
+    expect(index.unique).to(be_false)
+    expect(indexes["ux_things_code"].unique).to(be_true)
+
+
+@pytest.mark.unit
+def test_shortens_long_index_names(base):
+    name = ORMFactory(base).get_index_name("t" * 60, {"fields": ["code"]})
+
+    expect(name).to(have_len(63))
+    other_name = ORMFactory(base).get_index_name("t" * 61, {"fields": ["code"]})
+    expect(name).not_to(equal(other_name))
+
+
+@pytest.mark.unit
+def test_passes_postgresql_options(base):
+    indexes = get_indexes(
+        base,
+        [
+            {"fields": ["tags"], "method": "gin"},
+            {"fields": ["code"], "where": "name IS NOT NULL"},
+            {"fields": ["name"], "opclass": "text_pattern_ops"},
+        ],
+    )
+
+    gin = indexes["ix_things_tags"].dialect_options["postgresql"]
+    expect(gin["using"]).to(equal("gin"))
+    partial = indexes["ix_things_code"].dialect_options["postgresql"]
+    expect(str(partial["where"])).to(equal("name IS NOT NULL"))
+    pattern = indexes["ix_things_name"].dialect_options["postgresql"]
+    expect(pattern["ops"]).to(equal({"name": "text_pattern_ops"}))
+    expect(pattern["using"]).to(be_false)
+
+
+@pytest.mark.unit
+def test_skips_invalid_indexes(base):
+    indexes = get_indexes(
+        base,
+        [
+            {"fields": ["missing"]},
+            {"fields": ["code"], "method": "bitmap"},
+            {"fields": ["code"], "method": "hash", "unique": True},
+            {"fields": ["code", "name"], "method": "hash"},
+            {"fields": ["name"], "method": "hash"},
+        ],
+    )
+
+    expect(list(indexes)).to(equal(["ix_things_name"]))
+
+
+@pytest.mark.unit
+def test_replaces_indexes_of_earlier_model(base):
+    get_indexes(base, [{"fields": ["code"]}])
+    indexes = get_indexes(base, [{"fields": ["name"]}])
+
+    expect(list(indexes)).to(equal(["ix_things_name"]))
+    expect(base.metadata.tables["things"].indexes).to(have_len(1))
+    expect(list(indexes)).not_to(contain("ix_things_code"))
+
+
+def get_unique_columns(base, enforce_unique):
+    table_schema = deepcopy(TABLE_SCHEMA)
+    table_schema["fields"][1]["constraints"] = {"unique": True}
+    table = (
+        ORMFactory(base)
+        .create_orm_from_dict(
+            table_schema, "things", API_SCHEMA, enforce_unique=enforce_unique
+        )
+        .__table__
+    )
+    return [
+        [column.key for column in constraint.columns]
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+
+
+@pytest.mark.unit
+def test_enforces_unique_fields_when_declared(base):
+    expect(get_unique_columns(base, False)).to(equal([]))
+    expect(get_unique_columns(base, True)).to(equal([["code"]]))
+
+    # Turning it off drops the constraint of the earlier model
+    expect(get_unique_columns(base, False)).to(equal([]))
+
+
+@pytest.mark.unit
+def test_creates_search_column(base):
+    table_schema = deepcopy(TABLE_SCHEMA)
+    table_schema["fields"][1]["searchable"] = "A"
+    table_schema["fields"][2]["searchable"] = True
+    table_schema["fields"][0]["searchable"] = True
+
+    table = (
+        ORMFactory(base)
+        .create_orm_from_dict(table_schema, "things", API_SCHEMA)
+        .__table__
+    )
+
+    column = table.columns[SEARCH_COLUMN]
+    expect(str(column.computed.sqltext)).to(
+        equal(
+            "setweight(to_tsvector('english', coalesce(\"code\", '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(\"name\", '')), 'D')"
+        )
+    )
+    expect(column.comment).to(equal("Full-text search of code (A), name (D)"))
+    indexes = {index.name: index for index in table.indexes}
+    index = indexes["ix_things_search_vector"]
+    expect(index.dialect_options["postgresql"]["using"]).to(equal("gin"))
+
+
+@pytest.mark.unit
+def test_drops_search_column_of_earlier_model(base):
+    table_schema = deepcopy(TABLE_SCHEMA)
+    table_schema["fields"][2]["searchable"] = True
+    ORMFactory(base).create_orm_from_dict(table_schema, "things", API_SCHEMA)
+
+    table = (
+        ORMFactory(base)
+        .create_orm_from_dict(TABLE_SCHEMA, "things", API_SCHEMA)
+        .__table__
+    )
+
+    expect(table.columns.keys()).not_to(contain(SEARCH_COLUMN))
+    expect(table.indexes).to(have_len(0))
+
+
+@pytest.mark.unit
+def test_creates_no_search_column_by_default(base):
+    data_model = ORMFactory(base).create_orm_from_dict(
+        TABLE_SCHEMA, "things", API_SCHEMA
+    )
+
+    expect(data_model.__table__.columns.keys()).not_to(contain(SEARCH_COLUMN))
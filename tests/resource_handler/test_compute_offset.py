@@ -30,3 +30,19 @@ def test_compute_page():
     expect(handler.compute_page(19, 20)).to(equal(1))
     expect(handler.compute_page(20, 20)).to(equal(2))
     expect(handler.compute_page(99, 20)).to(equal(5))
+
+
+@pytest.mark.unit
+def test_build_links_without_count():
+    handler = ResourceHandler()
+
+    links = handler.build_links("credentials", 20, 20, None, True)
+    rels = [link["rel"] for link in links]
+
+    expect(rels).to(equal(["self", "first", "prev", "next"]))
+    expect(links[3]["href"]).to(equal("/credentials?offset=40&limit=20&count=false"))
+
+    links = handler.build_links("credentials", 20, 20, None, False)
+    rels = [link["rel"] for link in links]
+
+    expect(rels).to(equal(["self", "first", "prev"]))
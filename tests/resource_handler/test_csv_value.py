@@ -0,0 +1,18 @@
+from datetime import date, datetime
+
+import pytest
+from data_resource_api.api.v1_0_0 import ResourceHandler
+from expects import equal, expect
+
+
+@pytest.mark.unit
+def test_csv_value():
+    handler = ResourceHandler()
+
+    expect(handler.csv_value(None)).to(equal(""))
+    expect(handler.csv_value(1)).to(equal(1))
+    expect(handler.csv_value({"a": 1})).to(equal('{"a": 1}'))
+    expect(handler.csv_value(date(2014, 5, 12))).to(equal("2014-05-12"))
+    expect(handler.csv_value(datetime(2014, 5, 12, 23, 30))).to(
+        equal("2014-05-12T23:30:00Z")
+    )
@@ -0,0 +1,54 @@
+import pytest
+from data_resource_api.api.v1_0_0 import ResourceHandler
+from data_resource_api.app.utils.exception_handler import ApiError
+from expects import equal, expect
+
+
+@pytest.mark.unit
+def test_cursor_round_trip():
+    handler = ResourceHandler()
+
+    cursor = handler.encode_cursor([42])
+
+    expect(handler.decode_cursor(cursor, 1)).to(equal([42]))
+
+
+@pytest.mark.unit
+def test_cursor_round_trip_composite_key():
+    handler = ResourceHandler()
+
+    cursor = handler.encode_cursor([1, "abc"])
+
+    expect(handler.decode_cursor(cursor, 2)).to(equal([1, "abc"]))
+
+
+@pytest.mark.unit
+def test_invalid_cursor():
+    handler = ResourceHandler()
+
+    with pytest.raises(ApiError):
+        handler.decode_cursor("not-a-cursor", 1)
+
+    with pytest.raises(ApiError):
+        handler.decode_cursor(handler.encode_cursor([1, 2]), 1)
+
+
+@pytest.mark.unit
+def test_build_cursor_links():
+    handler = ResourceHandler()
+
+    links = handler.build_cursor_links(
+        "credentials", 20, ("after", "abc"), "abc", "def", True, True
+    )
+    rels = [link["rel"] for link in links]
+
+    expect(rels).to(equal(["self", "first", "prev", "next"]))
+    expect(links[2]["href"]).to(equal("/credentials?before=abc&limit=20"))
+    expect(links[3]["href"]).to(equal("/credentials?after=def&limit=20"))
+
+    links = handler.build_cursor_links(
+        "credentials", 20, ("after", ""), "abc", "def", False, False
+    )
+    rels = [link["rel"] for link in links]
+
+    expect(rels).to(equal(["self", "first"]))
@@ -0,0 +1,89 @@
+import pytest
+from data_resource_api.api.v1_0_0.resource_handler import ResourceHandler
+from data_resource_api.app.utils.exception_handler import ApiUnhandledError
+from data_resource_api.factories.orm_factory import ORMFactory
+from expects import equal, expect, raise_error
+
+
+TABLE_SCHEMA = {
+    "fields": [
+        {"name": "id", "type": "integer", "required": False},
+        {
+            "name": "code",
+            "type": "string",
+            "required": True,
+            "constraints": {"unique": True},
+        },
+        {"name": "name", "type": "string", "required": False},
+    ],
+    "primaryKey": "id",
+}
+
+
+def make_model(base):
+    fields = ORMFactory(base).create_sqlalchemy_fields(
+        TABLE_SCHEMA["fields"], TABLE_SCHEMA["primaryKey"], enforce_unique=True
+    )
+    fields["__tablename__"] = "things"
+    return type("things", (base,), fields)
+
+
+@pytest.mark.unit
+def test_upsert_key_defaults_to_primary_key(base):
+    key = ResourceHandler().get_upsert_key(make_model(base), TABLE_SCHEMA, {})
+
+    expect(key).to(equal(["id"]))
+
+
+@pytest.mark.unit
+def test_upsert_key_on_unique_field(base):
+    key = ResourceHandler().get_upsert_key(
+        make_model(base), TABLE_SCHEMA, {"key": "code"}
+    )
+
+    expect(key).to(equal(["code"]))
+
+
+@pytest.mark.unit
+def test_upsert_key_must_be_unique(base):
+    data_model = make_model(base)
+
+    def get_key():
+        ResourceHandler().get_upsert_key(data_model, TABLE_SCHEMA, {"key": ["name"]})
+
+    expect(get_key).to(raise_error(ApiUnhandledError))
+
+
+@pytest.mark.unit
+def test_upsert_key_needs_enforced_unique_field(base):
+    data_model = ORMFactory(base).create_orm_from_dict(
+        TABLE_SCHEMA, "things", {"custom": []}
+    )
+
+    def get_key():
+        ResourceHandler().get_upsert_key(data_model, TABLE_SCHEMA, {"key": "code"})
+
+    expect(get_key).to(raise_error(ApiUnhandledError))
+
+
+@pytest.mark.unit
+def test_upsert_key_on_unique_index(base):
+    data_model = ORMFactory(base).create_orm_from_dict(
+        TABLE_SCHEMA,
+        "things",
+        {"custom": []},
+        [
+            {"fields": ["name", "code"], "unique": True},
+            {"fields": ["name"], "unique": True, "where": "code IS NOT NULL"},
+        ],
+    )
+
+    key = ResourceHandler().get_upsert_key(
+        data_model, TABLE_SCHEMA, {"key": ["code", "name"]}
+    )
+    expect(key).to(equal(["code", "name"]))
+
+    def get_partial_key():
+        ResourceHandler().get_upsert_key(data_model, TABLE_SCHEMA, {"key": "name"})
+
+    expect(get_partial_key).to(raise_error(ApiUnhandledError))
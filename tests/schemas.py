@@ -102,11 +102,18 @@ credentials_descriptor = {
         "resource": "credentials",
         "methods": [
             {
-                "get": {"enabled": True, "secured": False, "grants": ["get:users"]},
+                "get": {
+                    "enabled": True,
+                    "secured": False,
+                    "grants": ["get:users"],
+                    "cache_control": "private, max-age=60",
+                    "cache": {"ttl": 60},
+                },
                 "post": {"enabled": True, "secured": False, "grants": []},
                 "put": {"enabled": True, "secured": False, "grants": []},
                 "patch": {"enabled": True, "secured": False, "grants": []},
                 "delete": {"enabled": True, "secured": False, "grants": []},
+                "upsert": {"enabled": True, "secured": False, "grants": []},
             }
         ],
     },
@@ -195,6 +202,7 @@ programs_descriptor = {
                     "type": "string",
                     "description": "Program's name.",
                     "required": True,
+                    "searchable": "A",
                 },
                 {
                     "name": "program_code",
@@ -209,6 +217,7 @@ programs_descriptor = {
                     "type": "string",
                     "description": "Program's Description",
                     "required": True,
+                    "searchable": True,
                 },
                 {
                     "name": "program_status",
@@ -0,0 +1,54 @@
+import pytest
+from data_resource_api.app.utils.notify_listener import (
+    KEEPALIVES,
+    NotifyListener,
+    connect,
+)
+from expects import equal, expect, have_keys
+
+
+class Stop(Exception):
+    pass
+
+
+@pytest.mark.unit
+def test_backoff_resets_once_listening(mocker):
+    mocker.patch(
+        "data_resource_api.app.utils.notify_listener.connect",
+        side_effect=[
+            Exception("down"),
+            Exception("down"),
+            mocker.MagicMock(),
+            Exception("down"),
+        ],
+    )
+    # The connection drops right after LISTEN succeeds
+    mocker.patch(
+        "data_resource_api.app.utils.notify_listener.select.select",
+        side_effect=Exception("dropped"),
+    )
+    sleep = mocker.patch(
+        "data_resource_api.app.utils.notify_listener.sleep",
+        side_effect=[None, None, None, Stop()],
+    )
+    listening = []
+
+    listener = NotifyListener("channel", lambda payload: None, listening.append)
+    with pytest.raises(Stop):
+        listener.run()
+
+    sleep_times = [call.args[0] for call in sleep.call_args_list]
+    expect(sleep_times).to(equal([1.5, 2.25, 1.5, 2.25]))
+    expect(listening).to(equal([False, False, True, False, False]))
+
+
+@pytest.mark.unit
+def test_listens_with_keepalives(mocker):
+    dbapi_connect = mocker.patch(
+        "data_resource_api.app.utils.notify_listener.engine.dialect.dbapi.connect"
+    )
+
+    connection = connect()
+
+    expect(connection).to(equal(dbapi_connect.return_value))
+    expect(dbapi_connect.call_args.kwargs).to(have_keys(KEEPALIVES))
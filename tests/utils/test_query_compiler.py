@@ -0,0 +1,216 @@
+import pytest
+from data_resource_api.app.utils.exception_handler import ApiError
+from data_resource_api.app.utils.query_compiler import (
+    QUERY_DEFAULT_LIMIT,
+    QUERY_MAX_LIMIT,
+    QueryCompiler,
+)
+from data_resource_api.app.utils.resource_validator import ResourceValidator
+from expects import contain, equal, expect, raise_error
+from sqlalchemy import Boolean, Column, Float, Integer, String
+from sqlalchemy.dialects import postgresql
+
+
+TABLE_SCHEMA = {
+    "fields": [
+        {"name": "id", "type": "integer", "required": False},
+        {"name": "name", "type": "string", "required": True},
+        {"name": "score", "type": "number", "required": False},
+        {"name": "active", "type": "boolean", "required": False},
+        {"name": "secret", "type": "string", "required": False},
+    ],
+    "primaryKey": "id",
+}
+
+
+def make_compiler(base):
+    model = type(
+        "scores",
+        (base,),
+        {
+            "__tablename__": "scores",
+            "id": Column(Integer, primary_key=True),
+            "name": Column(String),
+            "score": Column(Float),
+            "active": Column(Boolean),
+            "secret": Column(String),
+        },
+    )
+    return QueryCompiler(model, ResourceValidator(TABLE_SCHEMA, ["secret"]))
+
+
+def compile_clause(clause):
+    compiled = clause.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    return str(compiled)
+
+
+@pytest.mark.unit
+def test_equality_and_operators(base):
+    compiler = make_compiler(base)
+
+    sql = compile_clause(
+        compiler.where(
+            {
+                "name": "a",
+                "score": {"gte": "1.5", "lt": 10},
+                "id": {"in": ["1", 2]},
+                "active": {"null": False},
+            }
+        )
+    )
+    compiler.check_errors()
+
+    expect(sql).to(contain("scores.name = 'a'"))
+    expect(sql).to(contain("scores.score >= 1.5"))
+    expect(sql).to(contain("scores.score < 10.0"))
+    expect(sql).to(contain("scores.id IN (1, 2)"))
+    expect(sql).to(contain("scores.active IS NOT NULL"))
+
+
+@pytest.mark.unit
+def test_junctions_and_prefix(base):
+    compiler = make_compiler(base)
+
+    sql = compile_clause(
+        compiler.where({"or": [{"name": {"startswith": "a_"}}, {"id": 3}]})
+    )
+    compiler.check_errors()
+
+    expect(sql).to(contain(" OR "))
+    expect(sql).to(contain("LIKE 'a/_' || '%%' ESCAPE '/'"))
+
+
+@pytest.mark.unit
+def test_invalid_bodies(base):
+    bodies = [
+        {"secret": "a"},
+        {"missing": 1},
+        {"id": {"between": [1, 2]}},
+        {"id": "one"},
+        {"id": {"startswith": "1"}},
+        {"or": []},
+        {"active": {"null": "yes"}},
+    ]
+    compiler = make_compiler(base)
+    for body in bodies:
+        compiler.errors = []
+        compiler.where(body)
+        expect(compiler.check_errors).to(raise_error(ApiError))
+
+
+@pytest.mark.unit
+def test_options(base):
+    compiler = make_compiler(base)
+
+    condition, options = compiler.split({"name": "a", "sort": ["-score"], "limit": 5})
+    expect(condition).to(equal({"name": "a"}))
+    expect(options).to(equal({"sort": ["-score"], "limit": 5}))
+
+    expect(compiler.limit(None)).to(equal(QUERY_DEFAULT_LIMIT))
+    expect(compiler.limit(QUERY_MAX_LIMIT + 1)).to(equal(QUERY_MAX_LIMIT))
+    compiler.check_errors()
+
+    compiler.limit(0)
+    expect(compiler.check_errors).to(raise_error(ApiError))
+
+
+@pytest.mark.unit
+def test_sort_and_after(base):
+    compiler = make_compiler(base)
+
+    sort_keys = compiler.sort(["-score"], [compiler.columns["id"]])
+    expect([(column.key, descending) for column, descending in sort_keys]).to(
+        equal([("score", True), ("id", False)])
+    )
+
+    order_by = [compile_clause(clause) for clause in compiler.order_by(sort_keys)]
+    expect(order_by).to(
+        equal(["scores.score DESC NULLS LAST", "scores.id ASC NULLS LAST"])
+    )
+
+    sql = compile_clause(compiler.after(sort_keys, [2.5, 7]))
+    expect(sql).to(contain("scores.score < 2.5 OR scores.score IS NULL"))
+    expect(sql).to(
+        contain("scores.score = 2.5 AND (scores.id > 7 OR scores.id IS NULL)")
+    )
+
+    # Only the NULL rows remain after a NULL sort value
+    sql = compile_clause(compiler.after(sort_keys, [None, 7]))
+    expect(sql).to(
+        equal("scores.score IS NULL AND (scores.id > 7 OR scores.id IS NULL)")
+    )
+
+
+@pytest.mark.unit
+def test_group_by_and_aggregates(base):
+    compiler = make_compiler(base)
+
+    groups = compiler.group_by(["active", "active"])
+    aggregates = compiler.aggregates(
+        {
+            "rows": {"count": "*"},
+            "scored": {"count": "score"},
+            "average": {"avg": "score"},
+            "first": {"min": "name"},
+        },
+        ["active"],
+    )
+    compiler.check_errors()
+
+    expect([column.key for column in groups]).to(equal(["active"]))
+    expect([(a.key, compile_clause(a)) for a in aggregates]).to(
+        equal(
+            [
+                ("rows", "count(*)"),
+                ("scored", "count(scores.score)"),
+                ("average", "CAST(avg(scores.score) AS FLOAT)"),
+                ("first", "min(scores.name)"),
+            ]
+        )
+    )
+
+
+@pytest.mark.unit
+def test_aggregates_default_to_counting_rows(base):
+    compiler = make_compiler(base)
+
+    aggregates = compiler.aggregates(None, [])
+
+    expect([(a.key, compile_clause(a)) for a in aggregates]).to(
+        equal([("count", "count(*)")])
+    )
+
+
+@pytest.mark.unit
+def test_invalid_aggregates(base):
+    compiler = make_compiler(base)
+
+    compiler.group_by(["secret"])
+    compiler.aggregates(
+        {
+            "active": {"count": "*"},
+            "total": {"sum": "name"},
+            "most": {"max": "active"},
+            "median": {"median": "score"},
+            "both": {"min": "score", "max": "score"},
+        },
+        ["active"],
+    )
+
+    expect(compiler.errors).to(
+        equal(
+            [
+                "Unknown or restricted field 'secret' found.",
+                "Aggregate 'active' has the name of a grouped field.",
+                "Function 'sum' in aggregate 'total' cannot be computed over "
+                "field 'name'.",
+                "Function 'max' in aggregate 'most' cannot be computed over "
+                "field 'active'.",
+                "Unknown function 'median' in aggregate 'median'. "
+                "Use one of: count, sum, avg, min, max.",
+                "Aggregate 'both' must map one function to a field.",
+            ]
+        )
+    )
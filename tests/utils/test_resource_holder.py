@@ -0,0 +1,12 @@
+import pytest
+from data_resource_api.app.utils.resource_holder import ResourceHolder
+from expects import be, be_none, expect
+
+
+@pytest.mark.unit
+def test_use():
+    test_resource = object()
+    ResourceHolder.add_resource("holder_test_table", test_resource)
+
+    expect(ResourceHolder.lookup_resource("holder_test_table")).to(be(test_resource))
+    expect(ResourceHolder.lookup_resource("holder_test_missing")).to(be_none)
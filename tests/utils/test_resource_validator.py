@@ -0,0 +1,81 @@
+import pytest
+from data_resource_api.app.utils.exception_handler import SchemaValidationFailure
+from data_resource_api.app.utils.resource_validator import (
+    ResourceValidator,
+    compile_fields,
+)
+from expects import be_none, equal, expect, raise_error
+from tests.schemas import credentials_descriptor
+
+
+TABLE_SCHEMA = {
+    "fields": [
+        {"name": "id", "type": "integer", "required": False},
+        {"name": "name", "type": "string", "required": True},
+        {"name": "score", "type": "number", "required": False},
+        {"name": "active", "type": "boolean", "required": False},
+        {"name": "secret", "type": "string", "required": False},
+    ],
+    "primaryKey": "id",
+}
+
+
+@pytest.mark.unit
+def test_field_sets():
+    validator = ResourceValidator(TABLE_SCHEMA, ["secret"])
+
+    expect(validator.field_names).to(equal(("id", "name", "score", "active", "secret")))
+    expect(validator.required_fields).to(equal(("name",)))
+    expect("secret" in validator.restricted_fields).to(equal(True))
+    validator.check_schema()
+
+
+@pytest.mark.unit
+def test_uses_compiled_fields():
+    fields = compile_fields(TABLE_SCHEMA)
+    expect(fields["types"]["score"]).to(equal("number"))
+
+    validator = ResourceValidator(TABLE_SCHEMA, fields=fields, schema_valid=True)
+
+    expect(validator.field_names).to(equal(tuple(fields["field_names"])))
+    expect(validator.required_fields).to(equal(("name",)))
+    expect(validator.cast("score", "1.5")).to(equal((1.5, None)))
+
+
+@pytest.mark.unit
+def test_cast():
+    validator = ResourceValidator(TABLE_SCHEMA)
+
+    expect(validator.cast("id", "12")).to(equal((12, None)))
+    expect(validator.cast("score", 3)).to(equal((3.0, None)))
+    expect(validator.cast("active", "false")).to(equal((False, None)))
+    expect(validator.cast("name", 12)).to(equal((12, None)))
+    expect(validator.cast("id", None)).to(equal((None, None)))
+
+
+@pytest.mark.unit
+def test_cast_error():
+    validator = ResourceValidator(TABLE_SCHEMA)
+
+    value, error = validator.cast("id", "twelve")
+    expect(error).to(equal("Field 'id' must be of type 'integer'."))
+
+    value, error = validator.cast("active", True)
+    expect(error).to(be_none)
+
+    value, error = validator.cast("score", True)
+    expect(error).to(equal("Field 'score' must be of type 'number'."))
+
+
+@pytest.mark.unit
+def test_invalid_schema():
+    validator = ResourceValidator({"fields": [{"name": "id", "type": "unknown"}]})
+
+    expect(validator.check_schema).to(raise_error(SchemaValidationFailure))
+
+
+@pytest.mark.unit
+def test_descriptor_schema():
+    validator = ResourceValidator(credentials_descriptor["datastore"]["schema"])
+
+    expect(validator.required_fields).to(equal(("credential_name",)))
@@ -0,0 +1,78 @@
+import pytest
+from data_resource_api.app.utils.response_cache import ResponseCache
+from expects import be_none, equal, expect
+
+
+@pytest.fixture
+def cache():
+    listener, listening = ResponseCache.listener, ResponseCache.listening
+    max_entries = ResponseCache.max_entries
+    # Pretend the listener is running so that nothing connects to the database
+    ResponseCache.listener = object()
+    ResponseCache.set_listening(True)
+    yield ResponseCache
+    ResponseCache.set_listening(listening)
+    ResponseCache.listener, ResponseCache.max_entries = listener, max_entries
+
+
+def store(cache, name, key, response, ttl=60):
+    cache.set(name, key, response, ttl, cache.get_generation(name))
+
+
+@pytest.mark.unit
+def test_get_cache_settings():
+    expect(ResponseCache.get_cache_settings({"get": {}})).to(be_none)
+    expect(ResponseCache.get_cache_settings({"get": {"cache": True}})).to(
+        equal({"ttl": 60})
+    )
+    expect(ResponseCache.get_cache_settings({"get": {"cache": {"ttl": 5}}})).to(
+        equal({"ttl": 5})
+    )
+
+
+@pytest.mark.unit
+def test_set_and_invalidate(cache):
+    store(cache, "programs", ("get_one", 1), ({"id": 1}, 200))
+    store(cache, "credentials", ("get_one", 1), ({"id": 1}, 200))
+
+    expect(cache.get("programs", ("get_one", 1))).to(equal(({"id": 1}, 200)))
+
+    cache.invalidate("programs")
+    expect(cache.get("programs", ("get_one", 1))).to(be_none)
+    expect(cache.get("credentials", ("get_one", 1))).to(equal(({"id": 1}, 200)))
+
+
+@pytest.mark.unit
+def test_expired_entries_are_not_served(cache):
+    store(cache, "programs", ("get_one", 1), ({"id": 1}, 200), ttl=0)
+
+    expect(cache.get("programs", ("get_one", 1))).to(be_none)
+
+
+@pytest.mark.unit
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.max_entries = 2
+    store(cache, "programs", ("get_one", 1), ({"id": 1}, 200))
+    store(cache, "programs", ("get_one", 2), ({"id": 2}, 200))
+    _ = cache.get("programs", ("get_one", 1))
+    store(cache, "programs", ("get_one", 3), ({"id": 3}, 200))
+
+    expect(cache.get("programs", ("get_one", 2))).to(be_none)
+    expect(cache.get("programs", ("get_one", 1))).to(equal(({"id": 1}, 200)))
+
+
+@pytest.mark.unit
+def test_reads_started_before_a_write_are_not_cached(cache):
+    generation = cache.get_generation("programs")
+    cache.invalidate("programs")
+    cache.set("programs", ("get_one", 1), ({"id": 1}, 200), 60, generation)
+
+    expect(cache.get("programs", ("get_one", 1))).to(be_none)
+
+
+@pytest.mark.unit
+def test_nothing_is_served_without_the_listener(cache):
+    store(cache, "programs", ("get_one", 1), ({"id": 1}, 200))
+    cache.set_listening(False)
+
+    expect(cache.get("programs", ("get_one", 1))).to(be_none)
@@ -0,0 +1,86 @@
+import pytest
+from data_resource_api.app.utils.row_counter import RowCounter
+from expects import equal, expect
+
+
+class FakeQuery:
+    def __init__(self, session):
+        self.session = session
+
+    def count(self):
+        self.session.count_calls += 1
+        return 10
+
+
+class FakeSession:
+    def __init__(self):
+        self.count_calls = 0
+
+    def query(self, data_model):
+        return FakeQuery(self)
+
+
+class FakeModel:
+    __tablename__ = "fake_table"
+
+
+@pytest.mark.unit
+def test_get_count_settings():
+    expect(RowCounter.get_count_settings({"get": {"enabled": True}})).to(
+        equal({"strategy": "exact", "ttl": 60})
+    )
+
+    api_schema = {"get": {"count": {"strategy": "cached", "ttl": 5}}}
+    expect(RowCounter.get_count_settings(api_schema)).to(
+        equal({"strategy": "cached", "ttl": 5})
+    )
+
+    api_schema = {"get": {"count": "estimate"}}
+    expect(RowCounter.get_count_settings(api_schema)["strategy"]).to(equal("estimate"))
+
+    api_schema = {"get": {"count": {"strategy": "unknown"}}}
+    expect(RowCounter.get_count_settings(api_schema)["strategy"]).to(equal("exact"))
+
+
+@pytest.mark.unit
+def test_cached_count_is_reused_until_invalidated():
+    RowCounter.reset()
+    session = FakeSession()
+
+    expect(RowCounter.count(session, FakeModel, "cached", 60)).to(equal(10))
+    expect(RowCounter.count(session, FakeModel, "cached", 60)).to(equal(10))
+    expect(session.count_calls).to(equal(1))
+
+    RowCounter.invalidate(FakeModel.__tablename__)
+
+    expect(RowCounter.count(session, FakeModel, "cached", 60)).to(equal(10))
+    expect(session.count_calls).to(equal(2))
+
+
+@pytest.mark.unit
+def test_cached_count_expires():
+    RowCounter.reset()
+    session = FakeSession()
+
+    RowCounter.count(session, FakeModel, "cached", 0)
+    RowCounter.count(session, FakeModel, "cached", 0)
+
+    expect(session.count_calls).to(equal(2))
+
+
+@pytest.mark.unit
+def test_cached_count_is_not_kept_after_concurrent_invalidation():
+    RowCounter.reset()
+
+    class InvalidatingQuery(FakeQuery):
+        def count(self):
+            RowCounter.invalidate(FakeModel.__tablename__)
+            return super().count()
+
+    session = FakeSession()
+    session.query = lambda data_model: InvalidatingQuery(session)
+
+    RowCounter.count(session, FakeModel, "cached", 60)
+    RowCounter.count(session, FakeModel, "cached", 60)
+
+    expect(session.count_calls).to(equal(2))
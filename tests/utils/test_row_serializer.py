@@ -0,0 +1,84 @@
+from datetime import date
+
+import pytest
+from data_resource_api.app.utils.exception_handler import ApiError
+from data_resource_api.app.utils.row_serializer import RowSerializer
+from expects import contain, equal, expect, raise_error
+from sqlalchemy import Column, Date, Integer, String
+
+
+def make_model(base):
+    return type(
+        "people",
+        (base,),
+        {
+            "__tablename__": "people",
+            "id": Column(Integer, primary_key=True),
+            "name": Column(String),
+            "secret": Column(String),
+            "birthday": Column(Date),
+        },
+    )
+
+
+@pytest.mark.unit
+def test_serialize(base):
+    serializer = RowSerializer(make_model(base), ["secret"])
+
+    expect(serializer.column_names).to(equal(("id", "name", "birthday")))
+    expect(serializer.serialize((1, None, date(2014, 5, 12)))).to(
+        equal({"id": 1, "name": "", "birthday": "2014-05-12"})
+    )
+
+
+@pytest.mark.unit
+def test_restricted_primary_key_is_selected_but_not_returned(base):
+    serializer = RowSerializer(make_model(base), ["id"])
+
+    expect(serializer.column_names).to(equal(("name", "secret", "birthday")))
+    expect([column.key for column in serializer.columns]).to(
+        equal(["name", "secret", "birthday", "id"])
+    )
+
+    row = ("a", "b", None, 7)
+    expect(serializer.serialize(row)).to(
+        equal({"name": "a", "secret": "b", "birthday": ""})
+    )
+    expect(serializer.primary_key_values(row)).to(equal([7]))
+    expect(serializer.values(row)).to(equal(("a", "b", None)))
+
+
+@pytest.mark.unit
+def test_etag_follows_row_versions(base):
+    serializer = RowSerializer(make_model(base), ["secret"])
+    rows = [(1, "a", None, "100"), (2, "b", None, "101")]
+
+    etag = serializer.etag(rows, [{"rel": "self"}])
+    expect(serializer.etag(rows, [{"rel": "self"}])).to(equal(etag))
+    expect(serializer.etag(rows[:1], [{"rel": "self"}])).not_to(equal(etag))
+    expect(serializer.etag([rows[0], (2, "c", None, "102")], [{"rel": "self"}])).not_to(
+        equal(etag)
+    )
+
+
+@pytest.mark.unit
+def test_narrow_selects_only_requested_fields(base):
+    serializer = RowSerializer(make_model(base), ["secret"]).narrow(["birthday"])
+
+    expect(serializer.column_names).to(equal(("birthday",)))
+    expect([column.key for column in serializer.columns]).to(
+        equal(["birthday", "id"])
+    )
+    expect(str(serializer.select())).not_to(contain("name"))
+
+    row = (date(2014, 5, 12), 7, "100")
+    expect(serializer.serialize(row)).to(equal({"birthday": "2014-05-12"}))
+    expect(serializer.primary_key_values(row)).to(equal([7]))
+
+
+@pytest.mark.unit
+def test_narrow_rejects_unknown_and_restricted_fields(base):
+    serializer = RowSerializer(make_model(base), ["secret"])
+
+    expect(lambda: serializer.narrow(["secret"])).to(raise_error(ApiError))
+    expect(lambda: serializer.narrow(["missing"])).to(raise_error(ApiError))
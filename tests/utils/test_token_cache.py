@@ -0,0 +1,164 @@
+import json
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+from time import time
+
+import pytest
+import rsa
+from brighthive_authlib import OAuth2ProviderError
+from data_resource_api.app.utils.token_cache import (
+    CachedAuthZeroProvider,
+    JwksCache,
+    TokenCache,
+)
+from expects import be_true, equal, expect, raise_error
+from jose import jwk, jwt
+
+
+BASE_URL = "https://issuer.example.com"
+AUDIENCE = "http://localhost:8000"
+
+
+# Generating keys is slow, so tests share them
+@lru_cache(maxsize=None)
+def make_key(kid):
+    public_key, private_key = rsa.newkeys(1024)
+    public_jwk = jwk.construct(public_key.save_pkcs1(), "RS256").to_dict()
+    public_jwk.update({"kid": kid, "use": "sig"})
+    return private_key.save_pkcs1().decode(), public_jwk
+
+
+class JwksServer:
+    """A local stand-in for the identity provider's key set."""
+
+    def __init__(self):
+        self.keys = []
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                body = json.dumps({"keys": server.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/.well-known/jwks.json"
+        Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def jwks_server():
+    TokenCache.reset()
+    JwksCache.reset()
+    server = JwksServer()
+    yield server
+    server.httpd.shutdown()
+    TokenCache.reset()
+    JwksCache.reset()
+
+
+def make_provider(jwks_server):
+    provider = CachedAuthZeroProvider(refresh_interval=300)
+    provider.base_url = BASE_URL
+    provider.jwks_url = jwks_server.url
+    provider.algorithms = ["RS256"]
+    provider.audience = AUDIENCE
+    return provider
+
+
+def make_token(private_key, kid, expires_in=60, **claims):
+    claims.update(
+        {"iss": f"{BASE_URL}/", "aud": AUDIENCE, "exp": int(time()) + expires_in}
+    )
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.mark.unit
+def test_verifies_each_token_once(jwks_server, mocker):
+    private_key, public_jwk = make_key("one")
+    jwks_server.keys = [public_jwk]
+    provider = make_provider(jwks_server)
+    token = make_token(private_key, "one")
+    decode = mocker.spy(jwt, "decode")
+
+    expect(provider.validate_token(token)).to(be_true)
+    expect(provider.validate_token(token)).to(be_true)
+    expect(make_provider(jwks_server).validate_token(token)).to(be_true)
+
+    expect(decode.call_count).to(equal(1))
+    expect(jwks_server.requests).to(equal(1))
+
+
+@pytest.mark.unit
+def test_rejects_invalid_tokens(jwks_server):
+    private_key, public_jwk = make_key("one")
+    other_key, _ = make_key("other")
+    jwks_server.keys = [public_jwk]
+    provider = make_provider(jwks_server)
+
+    for token in [
+        make_token(other_key, "one"),
+        make_token(other_key, "other"),
+        make_token(private_key, "one", expires_in=-10),
+        make_token(private_key, "one", scope="read"),
+    ]:
+
+        def validate():
+            provider.validate_token(token, scopes=["write"])
+
+        expect(validate).to(raise_error(OAuth2ProviderError))
+
+
+@pytest.mark.unit
+def test_fetches_key_set_for_new_keys(jwks_server):
+    private_key, public_jwk = make_key("one")
+    new_private_key, new_public_jwk = make_key("two")
+    jwks_server.keys = [public_jwk]
+    provider = make_provider(jwks_server)
+    provider.validate_token(make_token(private_key, "one"))
+
+    jwks_server.keys = [public_jwk, new_public_jwk]
+    JwksCache.for_url(jwks_server.url, 300).fetched_at -= 60
+
+    expect(provider.validate_token(make_token(new_private_key, "two"))).to(be_true)
+    expect(jwks_server.requests).to(equal(2))
+
+
+@pytest.mark.unit
+def test_rejects_cached_tokens_of_revoked_keys(jwks_server):
+    private_key, public_jwk = make_key("one")
+    jwks_server.keys = [public_jwk]
+    provider = make_provider(jwks_server)
+    token = make_token(private_key, "one")
+    provider.validate_token(token)
+
+    jwks_server.keys = []
+    JwksCache.for_url(jwks_server.url, 300).refresh()
+
+    def validate():
+        provider.validate_token(token)
+
+    expect(validate).to(raise_error(OAuth2ProviderError))
+    expect(TokenCache.static_cache).to(equal({}))
+
+
+@pytest.mark.unit
+def test_token_cache_is_bounded_and_expires(jwks_server, monkeypatch):
+    monkeypatch.setattr(TokenCache, "max_entries", 2)
+
+    TokenCache.set("expired", {"exp": time() - 1}, "one")
+    TokenCache.set("a", {"exp": time() + 60}, "one")
+    TokenCache.set("b", {"exp": time() + 60}, "one")
+    TokenCache.set("c", {"exp": time() + 60}, "one")
+    TokenCache.set("forever", {}, "one")
+
+    expect(list(TokenCache.static_cache)).to(equal(["b", "c"]))
+    expect(TokenCache.get("expired")).to(equal(None))
@@ -0,0 +1,128 @@
+import logging
+
+import pytest
+from data_resource_api.api.core.versioned_resource import (
+    COLLECTION,
+    ITEM,
+    QUERY,
+    RESOURCE_HANDLERS,
+    SEARCH,
+    UPSERT,
+    CompiledResource,
+    VersionedResource,
+    VersionedResourceMany,
+)
+from data_resource_api.logging import LogFactory
+from expects import be, be_false, be_true, equal, expect, have_key, have_len
+from sqlalchemy import Column, Integer, MetaData, Table
+
+
+def make_data_model(columns: list = []):
+    table = Table(
+        "things", MetaData(), Column("id", Integer, primary_key=True), *columns
+    )
+    return type("Model", (), {"__table__": table})
+
+
+def make_resource(base, api_schema: dict, columns: list = []):
+    resource = type("things", (base,), {"data_resource_name": "things"})
+    resource.load(CompiledResource(make_data_model(columns), {}, api_schema))
+    return resource
+
+
+@pytest.mark.unit
+def test_compiles_enabled_routes():
+    resource = make_resource(
+        VersionedResource,
+        {
+            "get": {"enabled": True, "secured": False},
+            "post": {"enabled": True, "secured": True},
+            "put": {"enabled": False, "secured": True},
+            "patch": {"enabled": True, "secured": True},
+            "delete": {"enabled": False, "secured": True},
+        },
+    )
+    table = resource.compiled.dispatch_table
+
+    route = table[("get", COLLECTION, "1.0.0")]
+    expect(route.action).to(equal(VersionedResource.get_all))
+    expect(route.handler).to(be(RESOURCE_HANDLERS["1.0.0"]))
+    expect(route.secured).to(be_false)
+    expect(table[("get", ITEM, "1.0.0")].action).to(equal(VersionedResource.get_one))
+    expect(table[("post", QUERY, "1.0.0")].secured).to(be_true)
+    expect(table[("patch", ITEM, "1.0.0")].action).to(equal(VersionedResource.update))
+
+    expect(table).not_to(have_key(("put", ITEM, "1.0.0")))
+    expect(table).not_to(have_key(("delete", ITEM, "1.0.0")))
+    expect(table).not_to(have_key(("post", UPSERT, "1.0.0")))
+    expect(table).not_to(have_key(("get", SEARCH, "1.0.0")))
+    expect(table).not_to(have_key(("post", ITEM, "1.0.0")))
+
+
+@pytest.mark.unit
+def test_upsert_follows_its_own_settings():
+    resource = make_resource(
+        VersionedResource,
+        {
+            "get": {"enabled": False},
+            "post": {"enabled": True, "secured": True},
+            "upsert": {"enabled": True, "secured": False},
+        },
+    )
+
+    route = resource.compiled.dispatch_table[("post", UPSERT, "1.0.0")]
+    expect(route.action).to(equal(VersionedResource.upsert))
+    expect(route.secured).to(be_false)
+
+
+@pytest.mark.unit
+def test_recompiles_when_the_schema_changes():
+    resource = make_resource(VersionedResource, {"get": {"enabled": True}})
+    compiled = resource.compiled
+    expect(compiled.dispatch_table[("get", ITEM, "1.0.0")].secured).to(be_true)
+
+    resource.load(CompiledResource(make_data_model(), {}, {"get": {"enabled": False}}))
+
+    expect(resource.compiled.dispatch_table).to(have_len(0))
+    # Requests already dispatched keep the state they started with
+    expect(compiled.dispatch_table).to(have_len(4))
+
+
+@pytest.mark.unit
+def test_compiles_both_ends_of_relationships():
+    resource = make_resource(
+        VersionedResourceMany,
+        {
+            "custom": [
+                {
+                    "resource": "/things/skills",
+                    "methods": [
+                        {
+                            "get": {"enabled": True, "secured": False},
+                            "put": {"enabled": False, "secured": False},
+                            "patch": {"enabled": True, "secured": True},
+                            "delete": {"enabled": True, "secured": False},
+                        }
+                    ],
+                }
+            ]
+        },
+    )
+    table = resource.compiled.dispatch_table
+
+    for route in ("/things/skills", "/skills/things"):
+        expect(table[("get", route, "1.0.0")].secured).to(be_false)
+        expect(table[("patch", route, "1.0.0")].secured).to(be_true)
+        expect(table[("delete", route, "1.0.0")].secured).to(be_false)
+        expect(table).not_to(have_key(("put", route, "1.0.0")))
+
+
+@pytest.mark.unit
+def test_console_logger_adds_one_handler():
+    name = "test-console-logger"
+    logging.getLogger(name).handlers = []
+
+    for _ in range(3):
+        logger = LogFactory.get_console_logger(name)
+
+    expect(logger.handlers).to(have_len(1))